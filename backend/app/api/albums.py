@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Query, Form, UploadFile, File
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Form, Request, UploadFile, File
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from operator import attrgetter
 from typing import List, Optional
-import os
-import aiofiles
-import uuid
 from pathlib import Path
-from mutagen import File as MutagenFile
-from app.db.base import get_db
+from app.db.async_base import get_async_read_db
+from app.db.base import get_db, get_read_db
 from app.models.models import Album, Episode, User
 from app.models.schemas import (
     AlbumCreate, AlbumUpdate, AlbumResponse,
@@ -14,6 +14,13 @@ from app.models.schemas import (
 )
 from app.api.deps import get_current_admin, get_current_user
 from app.core.config import settings
+from app.core.album_stats import refresh_album_stats
+from app.core.catalog_cache import bump_catalog_version, catalog_response
+from app.core.cover_store import externalize_cover
+from app.core.ingest import IngestResult, UploadRejected, ingest_batch, insert_episodes, remove_stored, reserve_sort_orders
+from app.core.episode_cache import invalidate_album
+from app.core.pagination import ALBUM_SORT_KEYS, EPISODE_SORT_KEYS, InvalidCursor, paginate, paginate_rows_async
+from app.core.serialization import row_dicts
 
 router = APIRouter(prefix="/albums", tags=["专辑管理"])
 
@@ -22,6 +29,31 @@ router = APIRouter(prefix="/albums", tags=["专辑管理"])
 DEFAULT_COVER = 'data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48ZGVmcz48bGluZWFyR3JhZGllbnQgaWQ9ImciIHgxPSIwJSIgeTE9IjAlIiB4Mj0iMTAwJSIgeTI9IjEwMCUiPjxzdG9wIG9mZnNldD0iMCUiIHN0eWxlPSJzdG9wLWNvbG9yIiMzYfGQ3OTUiLz48c3RvcCBvZmZzZXQ9IjEwMCUiIHN0eWxlPSJzdG9wLWNvbG9yOiM3YzNhZWQiLz48L2xpbmVhckdyYWRpZW50PjwvZGVmcz48cmVjdCB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgZmlsbD0idXJsKCNnKSIvPjx0ZXh0IHg9IjUwJSIgeT0iNTAlIiBkb21pbmFudC1iYXNlbGluZT0iY2VudHJhbCIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZmlsbD0id2hpdGUiIGZvbnQtc2l6ZT0iNDBweCIgZm9udC1mYW1pbHk9IkFyaWFsIj7lha3lia88L3RleHQ+PC9zdmc+'
 
 
+# 专辑列表按列查询的字段（与 AlbumResponse 一致），行直接序列化，不构造模型
+ALBUM_LIST_COLUMNS = (
+    Album.id, Album.title, Album.cover_image, Album.description, Album.sort_order,
+    Album.episode_count, Album.total_duration, Album.total_bytes, Album.last_episode_at,
+    Album.created_at, Album.updated_at,
+)
+
+# 剧集列表可通过 fields 返回的列
+EPISODE_FIELD_COLUMNS = {attr.key: getattr(Episode, attr.key) for attr in Episode.__mapper__.column_attrs}
+DEFAULT_EPISODE_FIELDS = ['id', 'title', 'duration', 'sort_order', 'created_at']
+
+
+def _episode_field_getters(requested_fields: List[str]) -> list:
+    """fields 中每个字段的取值函数（按列查询的行），不认识的字段忽略"""
+    getters = []
+    for field in requested_fields:
+        if field == 'stream_url':
+            getters.append((field, lambda row: f"/api/stream/{row.id}"))
+        elif field in EPISODE_FIELD_COLUMNS:
+            getters.append((field, attrgetter(field)))
+        elif field == 'date':
+            getters.append((field, lambda row: row.created_at.isoformat() if row.created_at else None))
+    return getters
+
+
 def _album_to_response(album: Album) -> AlbumResponse:
     """将Album模型转换为AlbumResponse"""
     return AlbumResponse(
@@ -31,36 +63,61 @@ def _album_to_response(album: Album) -> AlbumResponse:
         description=album.description,
         sort_order=album.sort_order,
         episode_count=album.episode_count,
+        total_duration=album.total_duration,
+        total_bytes=album.total_bytes,
+        last_episode_at=album.last_episode_at,
         created_at=album.created_at,
         updated_at=album.updated_at
     )
 
 
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="分页游标无效"
+    )
+
+
 @router.get("", response_model=AlbumsListResponse)
 async def get_albums(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，指定时忽略 page"),
+    include_total: Optional[bool] = Query(None, description="是否返回总数，默认仅按页码翻页时返回"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """获取专辑列表（分页）"""
-    # 计算总数
-    total = db.query(Album).count()
-
-    # 查询专辑（分页）
-    albums = db.query(Album).order_by(
-        Album.sort_order.asc(),
-        Album.created_at.desc()
-    ).offset((page - 1) * page_size).limit(page_size).all()
-
-    items = [_album_to_response(album) for album in albums]
-
-    return AlbumsListResponse(
-        total=total,
-        page=page,
-        page_size=page_size,
-        items=items
-    )
+    """获取专辑列表（分页：按页码，或按游标；响应按目录版本缓存）"""
+    if include_total is None:
+        include_total = cursor is None
+
+    async def build():
+        # 查询专辑（游标分页，没有游标时按页码定位）
+        try:
+            rows, next_cursor = paginate(
+                db.query(*ALBUM_LIST_COLUMNS),
+                ALBUM_SORT_KEYS,
+                page_size,
+                cursor=cursor,
+                offset=(page - 1) * page_size
+            )
+        except InvalidCursor:
+            raise _invalid_cursor()
+
+        # 计算总数（可选）
+        total = db.query(func.count(Album.id)).scalar() if include_total else None
+
+        # 字段与 AlbumsListResponse 一致
+        return {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "items": row_dicts(rows),
+            "next_cursor": next_cursor
+        }
+
+    return await catalog_response(request, build)
 
 
 @router.post("", response_model=AlbumResponse, status_code=status.HTTP_201_CREATED)
@@ -70,15 +127,25 @@ async def create_album(
     current_user: User = Depends(get_current_admin)
 ):
     """创建专辑"""
+    # Base64封面转存到封面存储，列中只保存引用
+    try:
+        cover_image = externalize_cover(album_data.cover_image or DEFAULT_COVER)
+    except UploadRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
     album = Album(
         title=album_data.title,
-        cover_image=album_data.cover_image or DEFAULT_COVER,
+        cover_image=cover_image,
         description=album_data.description,
         sort_order=album_data.sort_order
     )
     db.add(album)
     db.commit()
     db.refresh(album)
+    bump_catalog_version()
 
     return _album_to_response(album)
 
@@ -86,18 +153,21 @@ async def create_album(
 @router.get("/{album_id}", response_model=AlbumResponse)
 async def get_album(
     album_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """获取专辑详情"""
-    album = db.query(Album).filter(Album.id == album_id).first()
-    if not album:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="专辑不存在"
-        )
+    """获取专辑详情（响应按目录版本缓存）"""
+    async def build():
+        album = db.query(Album).filter(Album.id == album_id).first()
+        if not album:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="专辑不存在"
+            )
+        return _album_to_response(album)
 
-    return _album_to_response(album)
+    return await catalog_response(request, build)
 
 
 @router.put("/{album_id}", response_model=AlbumResponse)
@@ -117,11 +187,20 @@ async def update_album(
 
     # 更新字段
     update_data = album_update.model_dump(exclude_unset=True)
+    if update_data.get("cover_image"):
+        try:
+            update_data["cover_image"] = externalize_cover(update_data["cover_image"])
+        except UploadRejected as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
     for field, value in update_data.items():
         setattr(album, field, value)
 
     db.commit()
     db.refresh(album)
+    bump_catalog_version()
 
     return _album_to_response(album)
 
@@ -143,6 +222,8 @@ async def delete_album(
     # 删除专辑及关联的剧集（级联删除）
     db.delete(album)
     db.commit()
+    invalidate_album(album_id)
+    bump_catalog_version()
 
     return {"success": True, "data": "专辑已删除"}
 
@@ -151,56 +232,72 @@ async def delete_album(
 
 ALLOWED_TYPES = ["audio/mpeg", "audio/mp4", "audio/flac", "audio/x-m4a", "audio/mp3", "audio/x-mp3"]
 MAX_FILE_SIZE = settings.UPLOAD_MAX_FILE_SIZE  # 100MB
-MEDIA_DIR = "/media/albums"
+MEDIA_DIR = settings.MEDIA_DIR
 
 
 @router.get("/{album_id}/episodes", response_model=dict)
 async def get_album_episodes(
     album_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
     page: int = Query(1, ge=1),
     page_size: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，指定时忽略 page"),
+    include_total: Optional[bool] = Query(None, description="是否返回总数，默认仅按页码翻页时返回"),
     fields: Optional[str] = Query(None, description="返回字段: id,title,duration,created_at")
 ):
-    """获取专辑的剧集列表（分页，支持字段过滤）"""
-    album = db.query(Album).filter(Album.id == album_id).first()
-    if not album:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="专辑不存在"
-        )
-
-    # 计算总数
-    total = db.query(Episode).filter(Episode.album_id == album_id).count()
-
-    # 查询剧集（分页）
-    episodes = db.query(Episode).filter(
-        Episode.album_id == album_id
-    ).order_by(Episode.sort_order.asc()).offset((page - 1) * page_size).limit(page_size).all()
-
-    # 根据请求字段返回数据
-    requested_fields = fields.split(',') if fields else ['id', 'title', 'duration', 'sort_order', 'created_at']
-
-    items = []
-    for ep in episodes:
-        item = {}
-        for field in requested_fields:
-            if field == 'stream_url':
-                item[field] = f"/api/stream/{ep.id}"
-            elif hasattr(ep, field):
-                item[field] = getattr(ep, field)
-            elif field == 'date':
-                item[field] = ep.created_at.isoformat() if ep.created_at else None
-        items.append(item)
-
-    return {
-        "album_id": album_id,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "items": items
-    }
+    """获取专辑的剧集列表（分页：按页码，或按游标；支持字段过滤；响应按目录版本缓存）"""
+    if include_total is None:
+        include_total = cursor is None
+
+    async def build():
+        if await db.scalar(select(Album.id).where(Album.id == album_id)) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="专辑不存在"
+            )
+
+        # 只查询请求的列，另加排序键列用于生成游标
+        requested_fields = list(dict.fromkeys(fields.split(','))) if fields else DEFAULT_EPISODE_FIELDS
+        names = [field for field in requested_fields if field in EPISODE_FIELD_COLUMNS]
+        names += [key.name for key in EPISODE_SORT_KEYS if key.name not in names]
+
+        # 查询剧集（游标分页，没有游标时按页码定位）
+        try:
+            rows, next_cursor = await paginate_rows_async(
+                db,
+                select(*(EPISODE_FIELD_COLUMNS[name] for name in names)).where(Episode.album_id == album_id),
+                EPISODE_SORT_KEYS,
+                page_size,
+                cursor=cursor,
+                offset=(page - 1) * page_size
+            )
+        except InvalidCursor:
+            raise _invalid_cursor()
+
+        # 计算总数（可选）
+        total = await db.scalar(
+            select(func.count()).select_from(Episode).where(Episode.album_id == album_id)
+        ) if include_total else None
+
+        # 根据请求字段返回数据（查询的列恰好是请求的字段时直接转换）
+        if names == requested_fields:
+            items = row_dicts(rows)
+        else:
+            getters = _episode_field_getters(requested_fields)
+            items = [{field: get(row) for field, get in getters} for row in rows]
+
+        return {
+            "album_id": album_id,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "items": items,
+            "next_cursor": next_cursor
+        }
+
+    return await catalog_response(request, build)
 
 
 @router.post("/{album_id}/episodes", response_model=EpisodeResponse, status_code=status.HTTP_201_CREATED)
@@ -222,11 +319,14 @@ async def create_episode(
         album_id=album_id,
         title=episode_data.title,
         duration=0,
-        sort_order=episode_data.sort_order or album.episode_count + 1
+        sort_order=episode_data.sort_order or reserve_sort_orders(db, album_id)
     )
     db.add(episode)
+    db.flush()
+    refresh_album_stats(db, [album_id])
     db.commit()
     db.refresh(episode)
+    bump_catalog_version()
 
     return EpisodeResponse(
         id=episode.id,
@@ -253,83 +353,49 @@ async def batch_upload_episodes(
             detail="专辑不存在"
         )
 
-    uploaded_episodes = []
+    results: list[Optional[IngestResult]] = [None] * len(files)
+    accepted = []
 
-    for upload_file in files:
+    for index, upload_file in enumerate(files):
         print(f"Processing file: {upload_file.filename}, content_type: {upload_file.content_type}")
 
         # 文件类型校验（更宽松，允许空类型）
         if upload_file.content_type and upload_file.content_type not in ALLOWED_TYPES and upload_file.content_type != "application/octet-stream":
             print(f"Skipping file due to unsupported content_type: {upload_file.content_type}")
+            results[index] = IngestResult(
+                filename=upload_file.filename or "",
+                status="rejected",
+                error=f"不支持的文件类型: {upload_file.content_type}"
+            )
             continue  # 跳过不支持的文件类型
 
-        # 文件大小校验
-        file_content = await upload_file.read()
-        file_size = len(file_content)
-        print(f"File size: {file_size} bytes")
-
-        if file_size > MAX_FILE_SIZE or file_size == 0:
-            print(f"Skipping file due to size issue: 0 < {file_size} < {MAX_FILE_SIZE}")
-            continue
-
-        # 生成文件名
-        file_ext = Path(upload_file.filename or "").suffix or ".mp3"
-        filename = f"{uuid.uuid4()}{file_ext}"
-        file_dir = os.path.join(MEDIA_DIR, str(album_id))
-        os.makedirs(file_dir, exist_ok=True)
-        file_path = os.path.join(file_dir, filename)
-
-        # 保存文件
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(file_content)
-
-        print(f"File saved to: {file_path}")
-
-        # 解析音频时长
-        duration = 0
-        try:
-            audio_file = MutagenFile(file_path)
-            if audio_file and hasattr(audio_file.info, 'length') and audio_file.info.length:
-                duration = int(audio_file.info.length)
-                print(f"Audio duration parsed: {duration} seconds")
-            else:
-                # mutagen 未能解析，尝试使用估算
-                print("Mutagen failed to parse duration, using file size estimation")
-                duration = int(file_size / 16384)  # 128kbps = 16KB/s
-                print(f"Estimated duration from file size: {duration} seconds")
-        except Exception as e:
-            print(f"Failed to parse audio metadata: {e}")
-            # 使用文件大小估算（假设128kbps）
-            duration = int(file_size / 16384)  # 128kbps = 16KB/s
-            print(f"Estimated duration from file size: {duration} seconds")
-
-        # 创建剧集记录
-        episode = Episode(
-            album_id=album_id,
-            title=Path(upload_file.filename or f"音频{len(uploaded_episodes)+1}").stem,
-            file_path=file_path,
-            file_size=file_size,
-            duration=duration,
-            sort_order=album.episode_count + 1
-        )
-        db.add(episode)
-
-        # 更新专辑的episode_count
-        album.episode_count += 1
-
-        uploaded_episodes.append(episode)
-        print(f"Episode created successfully")
-
-    # 提交事务
-    db.commit()
-    print(f"Transaction committed, uploaded {len(uploaded_episodes)} episodes")
-
-    # 刷新所有episode以获取ID
-    for ep in uploaded_episodes:
-        db.refresh(ep)
+        accepted.append(index)
+
+    # 并发落盘并解析音频时长（并发数受 UPLOAD_BATCH_CONCURRENCY 限制）
+    ingested = await ingest_batch([files[index] for index in accepted], album_id)
+    for index, result in zip(accepted, ingested):
+        results[index] = result
+        print(f"{result.filename}: {result.status} ({result.elapsed_ms:.0f} ms) {result.error or ''}")
+
+    # 一次性批量插入剧集记录，并在同一事务中刷新专辑汇总数据
+    stored = [result for result in results if result.status == "stored"]
+    entries = [
+        (Path(result.filename or f"音频{position + 1}").stem, result)
+        for position, result in enumerate(stored)
+    ]
+    try:
+        insert_episodes(db, album_id, entries)
+        db.commit()
+    except Exception:
+        db.rollback()
+        remove_stored(stored)
+        raise
+    bump_catalog_version()
+    print(f"Transaction committed, uploaded {len(entries)} episodes")
 
     return {
         "success": True,
-        "uploaded": len(uploaded_episodes),
-        "total": len(files)
+        "uploaded": len(entries),
+        "total": len(files),
+        "results": [result.to_dict() for result in results]
     }
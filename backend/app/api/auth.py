@@ -1,6 +1,8 @@
+import anyio
 from fastapi import APIRouter, Depends, status, Request, HTTPException
-from sqlalchemy.orm import Session
-from app.db.base import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.async_base import get_async_db
 from app.models.models import User
 from app.models.schemas import LoginRequest, LoginResponse, SuccessResponse
 from app.core.security import verify_password, create_access_token
@@ -9,7 +11,6 @@ from app.core.session_crud import (
     delete_session,
     refresh_session,
     check_can_login,
-    cleanup_expired_sessions,
 )
 from app.api.deps import get_current_user
 
@@ -20,15 +21,15 @@ router = APIRouter(prefix="/auth", tags=["鉴权"])
 async def login(
     login_data: LoginRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """登录接口"""
-    # 0. 顺手清理一次已过期的会话，避免 sessions 表无限增长
-    await cleanup_expired_sessions(db)
-
+    """登录接口（过期会话由后台任务清理，见 session_sweeper.py）"""
     # 1. 验证用户名和密码
-    user = db.query(User).filter(User.username == login_data.username).first()
-    if not user or not verify_password(login_data.password, user.password_hash):
+    user = await db.scalar(select(User).where(User.username == login_data.username))
+    # bcrypt 校验耗时数十毫秒，放到线程池中执行，不阻塞事件循环
+    if not user or not await anyio.to_thread.run_sync(
+        verify_password, login_data.password, user.password_hash
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
@@ -42,7 +43,7 @@ async def login(
         )
 
     # 3. 并发控制检查
-    can_login = await check_can_login(db, user.id)
+    can_login = await check_can_login(user.id)
     if not can_login:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -57,13 +58,13 @@ async def login(
     # 5. 创建Session
     ip_address = request.client.host
     user_agent = request.headers.get("user-agent", "")
-    await create_session(db, user.id, access_token, ip_address, user_agent)
+    await create_session(user.id, access_token, ip_address, user_agent)
 
     # 6. 更新最后登录时间
     from datetime import datetime
 
     user.last_login_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
 
     from app.core.config import settings
 
@@ -78,22 +79,18 @@ async def login(
 @router.post("/logout", response_model=SuccessResponse)
 async def logout(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
     """登出接口"""
-    await delete_session(db, current_user.id)
+    await delete_session(current_user.id)
     return SuccessResponse(success=True, data="已成功登出")
 
 
 @router.post("/heartbeat", response_model=SuccessResponse)
 async def heartbeat(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
     """心跳保活接口"""
-    # 定期请求心跳时也顺带清理一次
-    await cleanup_expired_sessions(db)
-    await refresh_session(db, current_user.id)
+    await refresh_session(current_user.id)
     from app.core.config import settings
 
     return SuccessResponse(
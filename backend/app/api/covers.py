@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Request, Query, status, HTTPException
+from fastapi.responses import Response
+from typing import Optional
+import os
+from app.core.conditional import http_date, is_not_modified
+from app.core.cover_store import cover_media_type, cover_path, is_cover_digest
+from app.core.cover_variants import get_variant, negotiate_format, snap_width, variants_available
+from app.core.streaming import RangeFileResponse
+
+router = APIRouter(prefix="/covers", tags=["专辑封面"])
+
+# 内容按哈希寻址，同一 URL 的内容永远不变
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/{digest}")
+async def get_cover(
+    digest: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=4096, description="缩略图宽度，取最接近的预设宽度")
+):
+    """
+    获取专辑封面（无需认证，<img> 标签可直接引用）
+
+    指定 w 时返回缩略图：浏览器支持时为 WebP，否则为 JPEG。
+    """
+    if not is_cover_digest(digest):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="封面不存在"
+        )
+
+    path = cover_path(digest)
+    try:
+        # 内容不可变，Last-Modified 始终使用原图的时间
+        last_modified = os.stat(path).st_mtime
+        resize = w is not None and variants_available(digest)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="封面不存在"
+        )
+
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Last-Modified": http_date(last_modified),
+        "X-Content-Type-Options": "nosniff",
+    }
+    if resize:
+        # 缩略图：按 Accept 协商格式
+        width = snap_width(w)
+        fmt = negotiate_format(request.headers.get("accept"))
+        headers["ETag"] = f'"{digest}-{width}.{fmt}"'
+        headers["Vary"] = "Accept"
+    else:
+        headers["ETag"] = f'"{digest}"'
+
+    if is_not_modified(request.headers, headers["ETag"], last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if resize:
+        path, media_type = await get_variant(digest, width, fmt)
+    else:
+        media_type = cover_media_type(digest)
+        if media_type == "image/svg+xml":
+            # SVG 可以包含脚本，禁止其在直接打开时执行
+            headers["Content-Security-Policy"] = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+
+    return RangeFileResponse(
+        path,
+        0,
+        os.path.getsize(path) - 1,
+        status_code=200,
+        headers=headers,
+        media_type=media_type,
+    )
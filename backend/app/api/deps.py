@@ -1,17 +1,44 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.db.base import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.async_base import get_async_read_db
 from app.models.models import User
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.security import decode_token
 
 # 安全方案
 security = HTTPBearer()
 
+# 用户记录短时缓存（user_id -> 脱离Session的User快照），用户修改/删除时失效
+_user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+def _user_snapshot(user: User) -> User:
+    """复制鉴权所需字段，得到不绑定任何Session的User对象"""
+    return User(
+        id=user.id,
+        username=user.username,
+        role=user.role,
+        is_active=user.is_active,
+        created_at=user.created_at,
+        last_login_at=user.last_login_at,
+    )
+
+
+def invalidate_user_cache(user_id: int) -> None:
+    """用户信息修改或删除后调用"""
+    _user_cache.pop(user_id)
+
+
+def user_cache_stats() -> dict:
+    return _user_cache.stats()
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ) -> User:
     """获取当前登录用户"""
     credentials_exception = HTTPException(
@@ -30,10 +57,14 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
-
+    user = _user_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        user = await db.scalar(select(User).where(User.id == user_id))
+
+        if user is None:
+            raise credentials_exception
+
+        _user_cache.set(user_id, _user_snapshot(user))
 
     if not user.is_active:
         raise HTTPException(
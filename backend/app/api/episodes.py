@@ -1,22 +1,34 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Query, Form, UploadFile, File
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Form, Request, UploadFile, File
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
-import aiofiles
-import uuid
-from pathlib import Path
-from mutagen import File as MutagenFile
-from app.db.base import get_db
+from app.db.async_base import get_async_read_db
+from app.db.base import get_db, get_read_db
 from app.models.models import Album, Episode, User
 from app.models.schemas import EpisodeCreate, EpisodeUpdate, EpisodeResponse, UploadResponse
 from app.api.deps import get_current_admin, get_current_user, get_stream_auth_user
+from app.core.album_stats import refresh_album_stats
+from app.core.audio_probe import probe_audio
+from app.core.catalog_cache import bump_catalog_version, catalog_response
 from app.core.config import settings
+from app.core.ingest import UploadRejected, store_upload
+from app.core.episode_cache import invalidate_episode
+from app.core.pagination import EPISODE_SORT_KEYS, InvalidCursor, paginate_rows_async
+from app.core.serialization import FastJSONResponse, row_dicts
 
 router = APIRouter(prefix="/episodes", tags=["剧集管理"])
 
 ALLOWED_TYPES = ["audio/mpeg", "audio/mp4", "audio/flac", "audio/x-m4a", "audio/mp3", "audio/x-mp3"]
 MAX_FILE_SIZE = settings.UPLOAD_MAX_FILE_SIZE  # 100MB
-MEDIA_DIR = "/media/albums"
+MEDIA_DIR = settings.MEDIA_DIR
+
+
+# 剧集列表按列查询的字段，行直接序列化，不经过 ORM 对象
+EPISODE_LIST_COLUMNS = (
+    Episode.id, Episode.album_id, Episode.title, Episode.duration, Episode.sort_order, Episode.created_at,
+)
 
 
 def _episode_to_response(episode: Episode, stream_url: Optional[str] = None) -> EpisodeResponse:
@@ -34,49 +46,55 @@ def _episode_to_response(episode: Episode, stream_url: Optional[str] = None) ->
 
 @router.get("", response_model=dict)
 async def get_episodes(
+    request: Request,
     album_id: int = Query(..., description="专辑ID"),
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="每页数量，不指定时返回全部"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """获取专辑的剧集列表（用户视角）"""
-    album = db.query(Album).filter(Album.id == album_id).first()
-    if not album:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="专辑不存在"
-        )
-
-    episodes = db.query(Episode).filter(
-        Episode.album_id == album_id
-    ).order_by(Episode.sort_order.asc()).all()
-
-    items = [
-        {
-            "id": ep.id,
-            "album_id": ep.album_id,
-            "title": ep.title,
-            "duration": ep.duration,
-            "sort_order": ep.sort_order,
-            "created_at": ep.created_at,
-            "stream_url": f"/api/stream/{ep.id}"
+    """获取专辑的剧集列表（用户视角，指定 limit 或 cursor 时按游标分页；响应按目录版本缓存）"""
+    async def build():
+        if await db.scalar(select(Album.id).where(Album.id == album_id)) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="专辑不存在"
+            )
+
+        statement = select(*EPISODE_LIST_COLUMNS).where(Episode.album_id == album_id)
+        if limit is None and cursor is None:
+            result = await db.execute(statement.order_by(*(key.order_by() for key in EPISODE_SORT_KEYS)))
+            rows, next_cursor = result.all(), None
+        else:
+            try:
+                rows, next_cursor = await paginate_rows_async(db, statement, EPISODE_SORT_KEYS, limit or 100, cursor=cursor)
+            except InvalidCursor:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="分页游标无效"
+                )
+
+        items = row_dicts(rows)
+        for item in items:
+            item["stream_url"] = f"/api/stream/{item['id']}"
+
+        return {
+            "album_id": album_id,
+            "items": items,
+            "next_cursor": next_cursor
         }
-        for ep in episodes
-    ]
 
-    return {
-        "album_id": album_id,
-        "items": items
-    }
+    return await catalog_response(request, build)
 
 
 @router.get("/{episode_id}", response_model=dict)
 async def get_episode_by_id(
     episode_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """获取剧集详情（用于播放器）"""
-    episode = db.query(Episode).filter(Episode.id == episode_id).first()
+    episode = await db.get(Episode, episode_id)
     if not episode:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -97,7 +115,7 @@ async def get_episode_by_id(
 @router.get("/admin", response_model=dict)
 async def get_episodes_admin(
     album_id: int = Query(..., description="专辑ID"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
     """获取专辑的剧集列表（管理员视角）"""
@@ -108,26 +126,14 @@ async def get_episodes_admin(
             detail="专辑不存在"
         )
 
-    episodes = db.query(Episode).filter(
+    rows = db.query(*EPISODE_LIST_COLUMNS).filter(
         Episode.album_id == album_id
     ).order_by(Episode.sort_order.asc()).all()
 
-    items = [
-        {
-            "id": ep.id,
-            "album_id": ep.album_id,
-            "title": ep.title,
-            "duration": ep.duration,
-            "sort_order": ep.sort_order,
-            "created_at": ep.created_at
-        }
-        for ep in episodes
-    ]
-
-    return {
+    return FastJSONResponse({
         "album_id": album_id,
-        "items": items
-    }
+        "items": row_dicts(rows)
+    })
 
 
 @router.put("/{episode_id}", response_model=EpisodeResponse)
@@ -152,6 +158,8 @@ async def update_episode(
 
     db.commit()
     db.refresh(episode)
+    invalidate_episode(episode_id)
+    bump_catalog_version()
 
     return _episode_to_response(episode)
 
@@ -175,7 +183,11 @@ async def delete_episode(
         os.remove(episode.file_path)
 
     db.delete(episode)
+    db.flush()
+    refresh_album_stats(db, [episode.album_id])
     db.commit()
+    invalidate_episode(episode_id)
+    bump_catalog_version()
 
     return {"success": True, "data": "剧集已删除"}
 
@@ -202,53 +214,30 @@ async def upload_episode_file(
         # 不阻止上传，只是记录警告
         pass
 
-    # 文件大小校验
-    file_content = await file.read()
-    file_size = len(file_content)
-
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"文件大小超过限制（最大100MB）"
-        )
-
-    if file_size == 0:
+    # 流式保存文件（边写边校验大小）
+    try:
+        stored = await store_upload(file, episode.album_id)
+    except UploadRejected as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="文件为空"
+            detail=str(e)
         )
+    file_path = stored.file_path
+    file_size = stored.file_size
 
-    # 生成文件名
-    file_ext = Path(file.filename or "").suffix or ".mp3"
-    album_id = episode.album_id
-    filename = f"{uuid.uuid4()}{file_ext}"
-    file_dir = os.path.join(MEDIA_DIR, str(album_id))
-    os.makedirs(file_dir, exist_ok=True)
-    file_path = os.path.join(file_dir, filename)
-
-    # 保存文件
-    async with aiofiles.open(file_path, 'wb') as f:
-        await f.write(file_content)
-
-    # 解析音频时长
-    duration = 0
-    try:
-        audio_file = MutagenFile(file_path)
-        if audio_file and hasattr(audio_file.info, 'length') and audio_file.info.length:
-            duration = int(audio_file.info.length)
-        else:
-            # mutagen 未能解析，尝试使用估算
-            duration = int(file_size / 16384)  # 128kbps = 16KB/s
-    except Exception:
-        # 使用文件大小估算（假设128kbps）
-        duration = int(file_size / 16384)  # 128kbps = 16KB/s
+    # 解析音频时长（在执行器中运行，不阻塞事件循环）
+    audio_info = await probe_audio(file_path, file_size)
 
     # 更新剧集信息
     episode.file_path = file_path
     episode.file_size = file_size
-    episode.duration = duration
+    episode.duration = audio_info.duration
+    db.flush()
+    refresh_album_stats(db, [episode.album_id])
 
     db.commit()
     db.refresh(episode)
+    invalidate_episode(episode_id)
+    bump_catalog_version()
 
     return _episode_to_response(episode)
@@ -0,0 +1,47 @@
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.api.deps import get_current_admin
+from app.core.media_reconcile import reconcile_media
+from app.db.base import SessionLocal
+from app.models.models import User
+
+router = APIRouter(prefix="/media", tags=["媒体文件"])
+
+# 同一时间只允许一次核对（reclaim 会删除文件）
+_reconcile_lock = anyio.Lock()
+
+
+def _reconcile(reclaim: bool, album_id: Optional[int]) -> dict:
+    db = SessionLocal()
+    try:
+        return reconcile_media(db, reclaim=reclaim, album_id=album_id)
+    finally:
+        db.close()
+
+
+@router.post("/reconcile", response_model=dict)
+async def reconcile(
+    reclaim: bool = Query(False, description="删除孤儿文件和已删除专辑的目录"),
+    album_id: Optional[int] = Query(None, ge=1, description="只核对指定专辑"),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    核对媒体目录与剧集记录
+
+    报告孤儿文件（目录中有、没有剧集引用）和缺失文件（剧集记录的文件不存在），
+    reclaim=true 时删除孤儿文件。
+    """
+    if _reconcile_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="媒体目录核对正在进行中"
+        )
+
+    async with _reconcile_lock:
+        # 遍历目录和删除文件都是阻塞操作，放到线程中执行
+        report = await anyio.to_thread.run_sync(_reconcile, reclaim, album_id)
+
+    return {"success": True, "data": report}
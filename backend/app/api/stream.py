@@ -1,10 +1,20 @@
 from fastapi import APIRouter, Depends, status, HTTPException, Request, Query
-from sqlalchemy.orm import Session
-import os
-from app.db.base import get_db
-from app.models.models import Episode, User
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.async_base import get_async_read_db
+from app.models.models import User
 from app.api.deps import get_stream_auth_user, get_current_user
 from app.core.security import generate_stream_token, verify_stream_token
+from app.core.conditional import (
+    http_date,
+    if_range_matches,
+    is_not_modified,
+    make_file_etag,
+    private_cache_control,
+)
+from app.core.episode_cache import get_episode_file_info
+from app.core.ranges import RangeNotSatisfiable, parse_range_header
+from app.core.streaming import MultipartRangeFileResponse, RangeFileResponse
 
 router = APIRouter(prefix="/stream", tags=["音频流"])
 
@@ -28,7 +38,7 @@ async def get_stream_token(
 async def stream_audio(
     episode_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     获取音频流（防下载核心接口）
@@ -43,6 +53,7 @@ async def stream_audio(
     query_token = request.query_params.get("token", "")
 
     user_id = None
+    token_exp = None
 
     # 2. 验证Token
     if auth_token:
@@ -51,6 +62,7 @@ async def stream_audio(
         payload = decode_token(auth_token)
         if payload and "user_id" in payload:
             user_id = payload["user_id"]
+            token_exp = payload.get("exp")
     elif query_token:
         # 方式2: 流式专用token（需要验证）
         from app.core.security import decode_token
@@ -60,6 +72,7 @@ async def stream_audio(
             if (payload.get("user_id") and
                 payload.get("episode_id") == episode_id):
                 user_id = payload["user_id"]
+                token_exp = payload.get("exp")
 
     # 3. 检查认证是否成功
     if not user_id:
@@ -68,63 +81,84 @@ async def stream_audio(
             detail="需要认证"
         )
 
-    # 4. 查询音频文件
-    episode = db.query(Episode).filter(Episode.id == episode_id).first()
-    if not episode:
+    # 4. 查询音频文件（优先读缓存，命中时不查库、不stat文件）
+    try:
+        file_info = await get_episode_file_info(db, episode_id)
+    except FileNotFoundError:
+        # 5. 文件不存在
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="音频不存在"
+            detail="音频文件丢失"
         )
-
-    # 5. 检查文件是否存在
-    if not os.path.exists(episode.file_path):
+    if not file_info:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="音频文件丢失"
+            detail="音频不存在"
         )
 
-    # 6. 读取文件
-    file_size = os.path.getsize(episode.file_path)
+    # 6. 生成校验器（文件名为UUID，内容不可变）
+    file_path = file_info.file_path
+    file_size = file_info.size
+    media_type = file_info.media_type
+    last_modified = file_info.mtime
+    etag = make_file_etag(episode_id, file_size, last_modified)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": "inline",  # 强制浏览器播放
+        "X-Content-Type-Options": "nosniff",
+        # 仅允许浏览器在本Token有效期内私有缓存，CDN/代理不得存储
+        "Cache-Control": private_cache_control(token_exp),
+        "Vary": "Authorization",
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+    }
+
+    # 7. 条件请求：客户端已有相同内容时返回304
+    if is_not_modified(request.headers, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    # 7. 处理Range请求（断点续传）
+    # 8. 处理Range请求（断点续传），If-Range 校验器不匹配时返回完整文件
+    ranges = None
     range_header = request.headers.get("range")
-    if range_header:
-        # 解析Range header（格式: bytes=start-end）
-        start, end = range_header.replace("bytes=", "").split("-")
-        start = int(start)
-        end = int(end) if end else file_size - 1
-        content_length = end - start + 1
-
-        # 读取指定范围的数据
-        with open(episode.file_path, "rb") as f:
-            f.seek(start)
-            data = f.read(content_length)
-
-        # 返回206 Partial Content
-        from fastapi.responses import Response
-        return Response(
-            content=data,
-            status_code=206,
-            media_type="audio/mpeg",
-            headers={
-                "Content-Range": f"bytes {start}-{end}/{file_size}",
-                "Content-Length": str(content_length),
-                "Accept-Ranges": "bytes",
-                "Content-Disposition": "inline",  # 强制浏览器播放
-                "X-Content-Type-Options": "nosniff",
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-            }
-        )
-    else:
+    if range_header and if_range_matches(request.headers, etag, last_modified):
+        try:
+            ranges = parse_range_header(range_header, file_size)
+        except RangeNotSatisfiable:
+            # 416：区间全部超出文件范围
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{file_size}"},
+            )
+
+    if not ranges:
         # 完整文件返回
-        from fastapi.responses import FileResponse
-        return FileResponse(
-            episode.file_path,
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": "inline",  # 强制浏览器播放
-                "X-Content-Type-Options": "nosniff",
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Accept-Ranges": "bytes",
-            }
+        return RangeFileResponse(
+            file_path,
+            0,
+            file_size - 1,
+            status_code=200,
+            media_type=media_type,
+            headers=headers,
+        )
+
+    if len(ranges) == 1:
+        # 返回206 Partial Content（分块流式发送，不整体读入内存）
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        return RangeFileResponse(
+            file_path,
+            start,
+            end,
+            status_code=206,
+            media_type=media_type,
+            headers=headers,
         )
+
+    # 多区间：multipart/byteranges
+    return MultipartRangeFileResponse(
+        file_path,
+        ranges,
+        file_size,
+        media_type=media_type,
+        headers=headers,
+    )
@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Form, UploadFile, File
+from fastapi import APIRouter, Depends, status, HTTPException, Form, UploadFile, File, Query, Request
 from sqlalchemy.orm import Session
 import os
-import aiofiles
-from mutagen import File as MutagenFile
 from app.db.base import get_db
 from app.models.models import Album, Episode, User
-from app.models.schemas import UploadResponse
+from app.models.schemas import UploadResponse, UploadSessionCreate
 from app.api.deps import get_current_admin, get_current_user
-import uuid
 from pathlib import Path
 from app.core.config import settings
+from app.core.album_stats import refresh_album_stats
+from app.core.audio_probe import probe_audio
+from app.core.catalog_cache import bump_catalog_version
+from app.core.episode_cache import invalidate_episode
+from app.core.ingest import IngestResult, UploadRejected, ingest_batch, insert_episodes, remove_stored
+from app.core import upload_sessions
+from app.core.cover_store import cover_media_type, cover_url, store_cover_upload
+from app.core.cover_variants import pregenerate_variants
+from app.core.upload_sessions import UploadSessionNotFound
 
 router = APIRouter(prefix="/upload", tags=["文件上传"])
 
@@ -37,106 +43,223 @@ async def batch_upload(
             detail="专辑不存在"
         )
 
-    uploaded_episodes = []
-    media_dir = "/media/albums"
-
+    # 1. 文件类型校验（全部通过后才开始落盘）
     for upload_file in files:
-        # 1. 文件类型校验
         if upload_file.content_type not in ALLOWED_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"不支持的文件类型: {upload_file.content_type}（仅支持MP3、M4A、FLAC）"
             )
 
-        # 2. 文件大小校验
-        file_content = await upload_file.read()
-        file_size = len(file_content)
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"文件大小超过限制（最大100MB）: {upload_file.filename}"
-            )
-
-        if file_size == 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="文件为空"
-            )
-
-        # 3. 生成文件名（UUID + 原始扩展名）
-        file_ext = Path(upload_file.filename).suffix
-        filename = f"{uuid.uuid4()}{file_ext}"
-        file_dir = os.path.join(media_dir, str(album_id))
-        os.makedirs(file_dir, exist_ok=True)
-        file_path = os.path.join(file_dir, filename)
-
-        # 4. 保存文件
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(file_content)
-
-        # 5. 解析音频元数据（时长）
-        duration = 0
-        try:
-            audio_file = MutagenFile(file_path)
-            if audio_file and hasattr(audio_file.info, 'length') and audio_file.info.length:
-                duration = int(audio_file.info.length)
-            else:
-                # mutagen 未能解析，尝试使用估算
-                duration = int(file_size / 16384)  # 128kbps = 16KB/s
-        except Exception as e:
-            # 解析失败，使用文件大小估算
-            duration = int(file_size / 16384)  # 128kbps = 16KB/s
-
-        # 6. 创建剧集记录
-        episode = Episode(
-            album_id=album_id,
-            title=upload_file.filename.rsplit(file_ext, 1)[0],  # 去除扩展名作为标题
-            file_path=file_path,
-            file_size=file_size,
-            duration=duration,
-            sort_order=album.episode_count + 1  # 自动递增排序
+    # 2-5. 并发落盘（边写边校验大小）并解析音频元数据
+    results = await ingest_batch(files, album_id, default_ext="")
+    failed = next((result for result in results if result.status != "stored"), None)
+    if failed:
+        remove_stored(results)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=failed.error
         )
-        db.add(episode)
-
-        # 7. 更新专辑的episode_count
-        album.episode_count += 1
-
-        uploaded_episodes.append(episode)
 
-    # 8. 提交事务
-    db.commit()
+    # 6-8. 批量创建剧集记录（sort_order 自动递增），同一事务中刷新专辑汇总数据
+    entries = [(Path(result.filename).stem, result) for result in results]  # 去除扩展名作为标题
+    try:
+        rows = insert_episodes(db, album_id, entries)
+        db.commit()
+    except Exception:
+        db.rollback()
+        remove_stored(results)
+        raise
+    bump_catalog_version()
 
-    # 9. 刷新所有episode以获取ID
-    for ep in uploaded_episodes:
-        db.refresh(ep)
-
-    # 10. 返回结果
+    # 9. 返回结果
     episodes_response = [
         {
-            "id": ep.id,
-            "album_id": ep.album_id,
-            "title": ep.title,
-            "duration": ep.duration,
-            "sort_order": ep.sort_order,
-            "created_at": ep.created_at
+            "id": row["id"],
+            "album_id": row["album_id"],
+            "title": row["title"],
+            "duration": row["duration"],
+            "sort_order": row["sort_order"],
+            "created_at": row["created_at"]
         }
-        for ep in uploaded_episodes
+        for row in rows
     ]
 
     return UploadResponse(
         success=True,
-        count=len(uploaded_episodes),
+        count=len(rows),
         episodes=episodes_response
     )
 
 
+# ==================== 可续传的分块上传 ====================
+# 1. POST /sessions 创建会话  2. PUT /sessions/{id}?offset=N 上传分块（可并行、可重试）
+# 3. GET /sessions/{id} 查询已接收区间（断点续传）  4. POST /sessions/{id}/finalize 入库
+
+def _session_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="上传会话不存在或已过期"
+    )
+
+
+@router.post("/sessions", response_model=dict)
+async def create_upload_session(
+    data: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin)
+):
+    """创建分块上传会话"""
+    album = db.query(Album).filter(Album.id == data.album_id).first()
+    if not album:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="专辑不存在"
+        )
+    if data.episode_id is not None:
+        episode = db.query(Episode).filter(
+            Episode.id == data.episode_id,
+            Episode.album_id == data.album_id
+        ).first()
+        if not episode:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="剧集不存在"
+            )
+
+    try:
+        session_info = upload_sessions.create_session(
+            data.album_id, data.filename, data.total_size, data.episode_id
+        )
+    except UploadRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return {
+        "success": True,
+        "data": session_info,
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE
+    }
+
+
+@router.get("/sessions/{upload_id}", response_model=dict)
+async def get_upload_session(
+    upload_id: str,
+    current_user = Depends(get_current_admin)
+):
+    """查询上传进度：已接收的字节区间与下一个顺序偏移"""
+    try:
+        session_info = upload_sessions.get_session(upload_id)
+    except UploadSessionNotFound:
+        raise _session_not_found()
+    return {"success": True, "data": session_info}
+
+
+@router.put("/sessions/{upload_id}", response_model=dict)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="分块在文件中的起始偏移"),
+    current_user = Depends(get_current_admin)
+):
+    """上传一个分块（请求体为原始字节），同一偏移重复上传会覆盖"""
+    try:
+        session_info = await upload_sessions.write_chunk(upload_id, offset, request)
+    except UploadSessionNotFound:
+        raise _session_not_found()
+    except UploadRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"success": True, "data": session_info}
+
+
+@router.post("/sessions/{upload_id}/finalize", response_model=dict)
+async def finalize_upload_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin)
+):
+    """所有分块接收完成后，移动文件并创建（或更新）剧集记录"""
+
+    # 1. 校验完整性并移动到专辑目录
+    try:
+        session_info, stored = upload_sessions.complete_session(upload_id)
+    except UploadSessionNotFound:
+        raise _session_not_found()
+    except UploadRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    # 2. 解析音频元数据  3. 更新已有剧集，或创建新剧集（失败时删除已移动的文件）
+    try:
+        audio_info = await probe_audio(stored.file_path, stored.file_size)
+        episode_id = session_info["episode_id"]
+        if episode_id is not None:
+            episode = db.query(Episode).filter(Episode.id == episode_id).first()
+            if not episode:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="剧集不存在"
+                )
+            episode.file_path = stored.file_path
+            episode.file_size = stored.file_size
+            episode.duration = audio_info.duration
+            db.flush()
+            refresh_album_stats(db, [episode.album_id])
+            db.commit()
+            invalidate_episode(episode_id)
+        else:
+            result = IngestResult(
+                filename=session_info["filename"],
+                status="stored",
+                stored=stored,
+                audio_info=audio_info
+            )
+            insert_episodes(db, session_info["album_id"], [(Path(result.filename).stem, result)])
+            db.commit()
+            episode_id = result.episode_id
+    except Exception:
+        db.rollback()
+        if os.path.exists(stored.file_path):
+            os.remove(stored.file_path)
+        raise
+    bump_catalog_version()
+
+    return {
+        "success": True,
+        "data": {
+            "episode_id": episode_id,
+            "file_size": stored.file_size,
+            "duration": audio_info.duration
+        }
+    }
+
+
+@router.delete("/sessions/{upload_id}", response_model=dict)
+async def abort_upload_session(
+    upload_id: str,
+    current_user = Depends(get_current_admin)
+):
+    """放弃上传，删除已接收的数据"""
+    try:
+        upload_sessions.abort_session(upload_id)
+    except UploadSessionNotFound:
+        raise _session_not_found()
+    return {"success": True}
+
+
 @router.post("/cover", response_model=dict)
 async def upload_cover(
     image: UploadFile = File(..., description="封面图片"),
-    db: Session = Depends(get_db),
     current_user = Depends(get_current_admin)
 ):
-    """上传专辑封面图片（Base64编码）"""
+    """上传专辑封面图片，返回封面引用（/api/covers/<哈希>），用作专辑的 cover_image"""
 
     if not image.content_type.startswith("image/"):
         raise HTTPException(
@@ -144,14 +267,21 @@ async def upload_cover(
             detail="只能上传图片文件"
         )
 
-    # 读取文件
-    import base64
-    file_content = await image.read()
-    base64_data = base64.b64encode(file_content).decode('utf-8')
+    # 流式保存（边写边计算哈希），相同图片只保存一份
+    try:
+        digest = await store_cover_upload(image)
+    except UploadRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    # 后台预生成缩略图（?w=），首次请求时无需等待
+    pregenerate_variants(digest)
 
-    # 返回Base64编码的图片
     return {
         "success": True,
-        "data": base64_data,
-        "format": image.content_type
+        "data": cover_url(digest),
+        "hash": digest,
+        "format": cover_media_type(digest)
     }
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
-from app.db.base import get_db
+from app.db.base import get_db, get_read_db
 from app.models.models import User
-from app.api.deps import get_current_admin
+from app.api.deps import get_current_admin, invalidate_user_cache
 from app.core.security import get_password_hash
+from app.core.pagination import USER_SORT_KEYS, InvalidCursor, paginate
+from app.core.serialization import FastJSONResponse, row_dicts
 
 router = APIRouter(prefix="/users", tags=["用户管理"])
 
@@ -37,8 +40,13 @@ class UserResponse(BaseModel):
 
 
 class UsersListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # include_total=false 时不计算
     items: List[UserResponse]
+    next_cursor: Optional[str] = None  # 下一页游标，没有下一页时为空
+
+
+# 用户列表按列查询的字段（与 UserResponse 一致，不含密码哈希）
+USER_LIST_COLUMNS = (User.id, User.username, User.role, User.is_active, User.created_at, User.last_login_at)
 
 
 # ==================== API Endpoints ====================
@@ -46,32 +54,42 @@ class UsersListResponse(BaseModel):
 
 @router.get("", response_model=UsersListResponse)
 async def get_users(
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="每页数量，不指定时返回全部"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    include_total: Optional[bool] = Query(None, description="是否返回总数，默认仅第一页返回"),
+    db: Session = Depends(get_read_db),
     current_admin: User = Depends(get_current_admin)
 ):
-    """获取用户列表（管理员）"""
-    total = db.query(User).count()
-    users = db.query(User).order_by(User.created_at.desc()).all()
-
-    items = [
-        UserResponse(
-            id=user.id,
-            username=user.username,
-            role=user.role,
-            is_active=user.is_active,
-            created_at=user.created_at.isoformat() if user.created_at else "",
-            last_login_at=user.last_login_at.isoformat() if user.last_login_at else None
-        )
-        for user in users
-    ]
-
-    return UsersListResponse(total=total, items=items)
+    """获取用户列表（管理员，指定 limit 或 cursor 时按游标分页）"""
+    query = db.query(*USER_LIST_COLUMNS)
+    if limit is None and cursor is None:
+        rows, next_cursor = query.order_by(*(key.order_by() for key in USER_SORT_KEYS)).all(), None
+    else:
+        try:
+            rows, next_cursor = paginate(query, USER_SORT_KEYS, limit or 100, cursor=cursor)
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="分页游标无效"
+            )
+
+    if include_total is None:
+        include_total = cursor is None
+    total = db.query(func.count(User.id)).scalar() if include_total else None
+
+    # 按列查询的行直接序列化（datetime 由 orjson 编码为 ISO 格式），字段与 UsersListResponse 一致
+    items = row_dicts(rows)
+    for item in items:
+        if item["created_at"] is None:
+            item["created_at"] = ""
+
+    return FastJSONResponse({"total": total, "items": items, "next_cursor": next_cursor})
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """获取用户详情（管理员）"""
@@ -156,6 +174,7 @@ async def update_user(
 
     db.commit()
     db.refresh(user)
+    invalidate_user_cache(user_id)
 
     return UserResponse(
         id=user.id,
@@ -184,5 +203,6 @@ async def delete_user(
 
     db.delete(user)
     db.commit()
+    invalidate_user_cache(user_id)
 
     return {"success": True, "data": "用户已删除"}
@@ -0,0 +1,100 @@
+"""
+专辑汇总数据
+
+albums 表中物化保存剧集数、总时长、总字节数和最近一集的创建时间，
+读取专辑时无需 JOIN / GROUP BY。
+
+- 所有增删改剧集的接口在同一事务中调用 refresh_album_stats，
+  由数据库按 episodes 重新计算（不做 +1/-1 的增量维护，不会累积误差）
+- reconcile_album_stats 一次 GROUP BY 扫描全部剧集，批量修复偏差的专辑，
+  可作为定时任务或手动执行：
+
+    python -m app.core.album_stats
+"""
+
+from typing import Iterable
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.models import Album, Episode
+
+# 批量修复时每条 UPDATE 语句包含的专辑数
+RECONCILE_BATCH_SIZE = 500
+
+
+def _aggregate(expression, default=None):
+    value = select(expression).where(Episode.album_id == Album.id).scalar_subquery()
+    return func.coalesce(value, default) if default is not None else value
+
+
+def refresh_album_stats(db: Session, album_ids: Iterable[int]) -> None:
+    """按 episodes 重新计算指定专辑的汇总数据（不提交事务）"""
+    album_ids = sorted(set(album_ids))
+    if not album_ids:
+        return
+    db.execute(
+        update(Album)
+        .where(Album.id.in_(album_ids))
+        .values(
+            episode_count=_aggregate(func.count(Episode.id)),
+            total_duration=_aggregate(func.sum(Episode.duration), 0),
+            total_bytes=_aggregate(func.sum(Episode.file_size), 0),
+            last_episode_at=_aggregate(func.max(Episode.created_at)),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reconcile_album_stats(db: Session) -> int:
+    """修复所有与 episodes 不一致的专辑汇总数据，返回修复的专辑数（会提交事务）"""
+    stats = (
+        select(
+            Episode.album_id,
+            func.count(Episode.id).label("episode_count"),
+            func.coalesce(func.sum(Episode.duration), 0).label("total_duration"),
+            func.coalesce(func.sum(Episode.file_size), 0).label("total_bytes"),
+            func.max(Episode.created_at).label("last_episode_at"),
+        )
+        .group_by(Episode.album_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(
+            Album.id,
+            Album.episode_count,
+            Album.total_duration,
+            Album.total_bytes,
+            Album.last_episode_at,
+            func.coalesce(stats.c.episode_count, 0),
+            func.coalesce(stats.c.total_duration, 0),
+            func.coalesce(stats.c.total_bytes, 0),
+            stats.c.last_episode_at,
+        ).outerjoin(stats, stats.c.album_id == Album.id)
+    ).all()
+
+    drifted = [
+        {
+            "id": row[0],
+            "episode_count": row[5],
+            "total_duration": row[6],
+            "total_bytes": row[7],
+            "last_episode_at": row[8],
+        }
+        for row in rows
+        if tuple(row[1:5]) != tuple(row[5:9])
+    ]
+    for start in range(0, len(drifted), RECONCILE_BATCH_SIZE):
+        db.execute(update(Album), drifted[start:start + RECONCILE_BATCH_SIZE])
+    db.commit()
+    return len(drifted)
+
+
+if __name__ == "__main__":
+    from app.db.base import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(f"✅ 已修复 {reconcile_album_stats(session)} 个专辑的汇总数据")
+    finally:
+        session.close()
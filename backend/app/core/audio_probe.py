@@ -0,0 +1,114 @@
+"""
+音频元数据解析
+
+mutagen 只读取格式头部（MP3 帧头/Xing、FLAC 元数据块、MP4 moov 等），
+但对大文件仍需多次磁盘 IO，因此放到独立的进程池（或线程池）中执行，
+不阻塞事件循环。执行器类型与并发数由 AUDIO_PROBE_EXECUTOR /
+AUDIO_PROBE_WORKERS 配置。
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from mutagen import File as MutagenFile
+
+from app.core.config import settings
+from app.core.duration_scanner import scan_duration
+
+# mutagen 和帧头扫描都失败时按 128kbps 估算：128kbps = 16KB/s
+FALLBACK_BYTES_PER_SECOND = 16384
+
+
+@dataclass
+class AudioInfo:
+    duration: int  # 秒
+    bitrate: Optional[int] = None  # bps
+    codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    estimated: bool = False  # duration 是否为估算值
+
+
+def probe_file(file_path: str, file_size: int) -> AudioInfo:
+    """同步解析音频元数据（在执行器中运行）"""
+    try:
+        audio_file = MutagenFile(file_path)
+    except Exception as e:
+        print(f"Failed to parse audio metadata: {file_path}: {e}")
+        audio_file = None
+
+    info = getattr(audio_file, "info", None)
+    length = getattr(info, "length", None)
+    if not length:
+        return _scan_or_estimate(file_path, file_size)
+
+    mime = getattr(audio_file, "mime", None) or [None]
+    return AudioInfo(
+        duration=int(length),
+        bitrate=getattr(info, "bitrate", None) or None,
+        codec=getattr(info, "codec", None) or mime[0],
+        sample_rate=getattr(info, "sample_rate", None) or None,
+        channels=getattr(info, "channels", None) or None,
+    )
+
+
+def _scan_or_estimate(file_path: str, file_size: int) -> AudioInfo:
+    """mutagen 解析失败时：先扫描帧头/容器头，仍失败再按文件大小估算"""
+    try:
+        scanned = scan_duration(file_path)
+    except (OSError, ValueError) as e:
+        print(f"Failed to scan audio duration: {file_path}: {e}")
+        scanned = None
+
+    if scanned and scanned.duration > 0:
+        return AudioInfo(
+            duration=int(scanned.duration),
+            codec=scanned.codec,
+            sample_rate=scanned.sample_rate,
+            channels=scanned.channels,
+        )
+
+    return AudioInfo(
+        duration=int(file_size / FALLBACK_BYTES_PER_SECOND),
+        estimated=True,
+    )
+
+
+_executor: Optional[Executor] = None
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        workers = settings.AUDIO_PROBE_WORKERS
+        if settings.AUDIO_PROBE_EXECUTOR == "process":
+            # spawn：避免在已有线程的进程中 fork
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audio-probe")
+    return _executor
+
+
+async def probe_audio(file_path: str, file_size: int) -> AudioInfo:
+    """在执行器中解析单个文件"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), probe_file, file_path, file_size)
+
+
+async def probe_many(files: Iterable[Tuple[str, int]]) -> List[AudioInfo]:
+    """并发解析多个文件，结果顺序与输入一致"""
+    return list(await asyncio.gather(*(probe_audio(path, size) for path, size in files)))
+
+
+def shutdown_probe_executor() -> None:
+    """应用关闭时释放执行器"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,73 @@
+"""
+目录接口响应缓存
+
+专辑列表、专辑详情、剧集列表只在管理员修改时变化，而每个听众的请求都要查询数据库、
+构造 Pydantic 模型再序列化。这些接口的响应按 路径 + 查询参数 缓存序列化后的字节：
+
+- 键中包含目录版本号，管理员修改专辑、剧集的接口调用 bump_catalog_version()，
+  旧版本的条目不再命中，按 LRU 淘汰
+- 版本号只在本进程内有效，CATALOG_CACHE_TTL_SECONDS 兜底多 worker 部署下其他进程的修改
+- ETag 取响应内容的哈希，与进程、版本号无关；If-None-Match 匹配时返回 304，
+  客户端重新校验只需一次认证，不查询数据库、不传输内容
+
+仍然经过接口的认证依赖，缓存只省去查询和序列化。
+"""
+
+import hashlib
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.cache import TTLCache
+from app.core.conditional import etag_matches
+from app.core.config import settings
+from app.core.serialization import dumps
+
+# 需要认证的内容，只允许浏览器缓存，每次使用前重新校验
+CATALOG_CACHE_CONTROL = "private, no-cache"
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+_cache = TTLCache(
+    maxsize=settings.CATALOG_CACHE_SIZE,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+)
+_version = 0
+_not_modified = 0
+
+
+def bump_catalog_version() -> None:
+    """专辑或剧集已修改（管理接口提交事务后调用）"""
+    global _version
+    _version += 1
+
+
+async def catalog_response(request: Request, build: Callable[[], Awaitable[Any]]) -> Response:
+    """
+    返回缓存的响应；未命中时调用 build() 生成响应内容并缓存
+
+    build 中抛出的 HTTPException（404、400 等）不缓存。
+    """
+    global _not_modified
+    # 先取版本号：生成过程中目录被修改时，结果存在旧版本下，不会被之后的请求命中
+    key = (_version, request.url.path, tuple(sorted(request.query_params.multi_items())))
+    cached = _cache.get(key)
+    if cached is None:
+        body = dumps(await build())
+        cached = CachedResponse(body, f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"')
+        _cache.set(key, cached)
+
+    headers = {"ETag": cached.etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if etag_matches(request.headers, cached.etag):
+        _not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+def catalog_cache_stats() -> dict:
+    return dict(_cache.stats(), version=_version, not_modified=_not_modified)
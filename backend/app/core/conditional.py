@@ -0,0 +1,94 @@
+"""
+HTTP 条件请求（RFC 9110 §13）
+
+提供强校验器（ETag / Last-Modified）的生成，以及 If-None-Match、
+If-Modified-Since、If-Range 的判断。
+"""
+
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional
+
+
+def make_file_etag(resource_id: int, size: int, mtime: float) -> str:
+    """由资源ID + 文件大小 + 修改时间生成强 ETag"""
+    return f'"{resource_id:x}-{size:x}-{int(mtime * 1_000_000):x}"'
+
+
+def http_date(timestamp: float) -> str:
+    """格式化为 HTTP 日期（IMF-fixdate）"""
+    return formatdate(timestamp, usegmt=True)
+
+
+def parse_http_date(value: str) -> Optional[int]:
+    """解析 HTTP 日期，返回整秒时间戳；格式错误返回 None"""
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _etag_list(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _weak_equal(a: str, b: str) -> bool:
+    return a.removeprefix("W/") == b.removeprefix("W/")
+
+
+def etag_matches(headers: Mapping[str, str], etag: str) -> bool:
+    """If-None-Match 是否包含 etag（弱比较）；没有该请求头时返回 False"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = _etag_list(if_none_match)
+    return "*" in tags or any(_weak_equal(tag, etag) for tag in tags)
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, last_modified: float) -> bool:
+    """
+    判断是否可以返回 304 Not Modified
+
+    If-None-Match 存在时忽略 If-Modified-Since（弱比较）。
+    """
+    if headers.get("if-none-match") is not None:
+        return etag_matches(headers, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        since = parse_http_date(if_modified_since)
+        return since is not None and int(last_modified) <= since
+
+    return False
+
+
+def if_range_matches(headers: Mapping[str, str], etag: str, last_modified: float) -> bool:
+    """
+    判断 If-Range 是否允许按 Range 返回部分内容
+
+    没有 If-Range 时返回 True；校验器不匹配时应忽略 Range 返回完整内容。
+    ETag 使用强比较，日期必须与 Last-Modified 完全一致。
+    """
+    if_range = headers.get("if-range")
+    if not if_range:
+        return True
+
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return not if_range.startswith("W/") and if_range == etag
+
+    return parse_http_date(if_range) == int(last_modified)
+
+
+def private_cache_control(expires_at: Optional[float], now: Optional[float] = None) -> str:
+    """
+    私有缓存策略：只允许浏览器在凭据有效期内缓存，过期后必须重新校验
+
+    共享缓存（CDN/代理）不得存储，也不得转码。
+    """
+    if expires_at is None:
+        return "private, no-cache, no-transform"
+    remaining = int(expires_at - (now if now is not None else time.time()))
+    if remaining <= 0:
+        return "private, no-cache, no-transform"
+    return f"private, max-age={remaining}, must-revalidate, no-transform"
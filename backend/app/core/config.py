@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # 域名配置
@@ -7,21 +7,69 @@ class Settings(BaseSettings):
 
     # 数据库
     DATABASE_URL: str = "sqlite:///./data/audio_drama.db"
+    DATABASE_READ_URL: str = ""  # 只读查询使用的库，为空时使用 DATABASE_URL
+    DB_POOL_SIZE: int = 8  # 每个 worker 的常驻连接数
+    DB_MAX_OVERFLOW: int = 16
+    DB_POOL_TIMEOUT: int = 10  # 等待空闲连接的秒数
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256MB
+    SQLITE_CACHE_SIZE_KB: int = 65536  # 每个连接 64MB 页缓存
 
     # 密钥
     SECRET_KEY: str = "your-secret-key-change-in-production"
     JWT_SECRET_KEY: str = "your-jwt-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_SECONDS: int = 1800
+    TOKEN_CACHE_SIZE: int = 100000  # 已验证Token缓存条目数，条目在Token过期时失效
+    USER_CACHE_SIZE: int = 10000  # 活跃用户记录缓存条目数
+    USER_CACHE_TTL_SECONDS: int = 30  # 多进程部署下其他worker修改用户后最长的可见延迟
 
     # 并发控制
     MAX_CONCURRENT_USERS: int = 1000000
     SESSION_EXPIRE_SECONDS: int = 1800
+    SESSION_STORE: str = "memory"  # 会话存储：memory / socket（多 worker 共享）/ sql（sessions 表）
+    SESSION_STORE_SOCKET: str = "./data/sessions.sock"  # socket 存储的会话服务地址
+    SESSION_SWEEP_INTERVAL_SECONDS: int = 60  # 后台清理过期会话的间隔
+    SESSION_SWEEP_BATCH_SIZE: int = 1000  # 每批删除的会话数
+    SESSION_SWEEP_MAX_BATCHES: int = 50  # 每轮最多批数，剩余的留到下一轮
+    HEARTBEAT_FLUSH_INTERVAL_SECONDS: int = 10  # 合并后的心跳写入间隔
+    HEARTBEAT_REFRESH_THRESHOLD_SECONDS: int = 1500  # 会话剩余有效期高于此值时跳过刷新
+    ONLINE_RESYNC_SECONDS: int = 60  # 在线人数计数与会话存储校准的间隔
+    ONLINE_HISTORY_MINUTES: int = 1440  # 保留的按分钟在线人数统计
+    STORAGE_RESCAN_INTERVAL_SECONDS: int = 0  # 定期扫描媒体目录核对存储用量的间隔，0 表示不启用
+    STORAGE_RESCAN_FILES_PER_SECOND: int = 5000  # 扫描速度上限
+    STORAGE_RESCAN_FIX: bool = False  # 定期扫描时是否修正记录的文件大小
+    MEDIA_RECONCILE_MIN_AGE_SECONDS: int = 3600  # 核对清理时，修改时间在此之内的孤儿文件不删除
 
     # 文件上传
+    MEDIA_DIR: str = "/media/albums"
     UPLOAD_MAX_FILE_SIZE: int = 104857600  # 100MB
+    UPLOAD_CHUNK_SIZE: int = 1048576  # 1MB，上传落盘时每次读写的块大小
+    UPLOAD_BATCH_CONCURRENCY: int = 4  # 批量上传时同时处理的文件数
+    UPLOAD_STAGING_DIR: str = ""  # 分块上传暂存目录，为空时使用 MEDIA_DIR/.staging
+    UPLOAD_SESSION_TTL_SECONDS: int = 86400  # 分块上传会话无进展多久后清理
+    AUDIO_PROBE_EXECUTOR: str = "process"  # 音频元数据解析执行器：process / thread
+    AUDIO_PROBE_WORKERS: int = 2
+    COVER_DIR: str = "/media/covers"  # 封面存储目录（按内容哈希存放）
+    COVER_MAX_SIZE: int = 5242880  # 5MB
+    COVER_VARIANT_DIR: str = ""  # 封面缩略图缓存目录，为空时使用 COVER_DIR/.variants
+    COVER_VARIANT_WIDTHS: List[int] = [160, 320, 640]  # 缩略图宽度（像素）
+    COVER_VARIANT_QUALITY: int = 80
+    COVER_VARIANT_CACHE_BYTES: int = 268435456  # 256MB，超出后按最近访问淘汰
+    COVER_VARIANT_WORKERS: int = 2
     STREAM_TOKEN_EXPIRE_SECONDS: int = 600
 
+    # 音频流
+    STREAM_CHUNK_SIZE: int = 65536  # 64KB，单个请求每次发送的块大小
+    EPISODE_CACHE_SIZE: int = 10000  # 剧集文件信息缓存条目数
+    EPISODE_CACHE_TTL_SECONDS: int = 300
+
+    # 目录接口（专辑、剧集列表）响应缓存
+    CATALOG_CACHE_SIZE: int = 2048  # 缓存的响应条目数
+    CATALOG_CACHE_TTL_SECONDS: int = 60  # 多 worker 部署下其他进程修改后的最长延迟
+
     # 默认管理员密码
     DEFAULT_ADMIN_PASSWORD: str = "123456"
 
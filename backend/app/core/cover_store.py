@@ -0,0 +1,163 @@
+"""
+专辑封面存储（按内容寻址）
+
+封面图片按 SHA-256 存放在 COVER_DIR/<前两位>/<哈希>，albums.cover_image
+只保存短引用 /api/covers/<哈希>。相同图片只存一份；内容不可变，
+因此可以被浏览器和 CDN 长期缓存。
+
+图片类型在读取时由文件头识别，不信任上传时的 Content-Type。
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import uuid
+from functools import lru_cache
+from typing import Optional
+
+import aiofiles
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.core.ingest import PARTIAL_SUFFIX, UploadRejected
+
+COVER_URL_PREFIX = "/api/covers/"
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URL_RE = re.compile(r"^data:([\w.+/-]+)?(?:;[\w=.-]+)*;base64,", re.IGNORECASE)
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """根据文件头识别图片类型，不是支持的图片返回 None"""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    text = head.lstrip()[:256].lower()
+    if text.startswith(b"<svg") or (text.startswith(b"<?xml") and b"<svg" in text):
+        return "image/svg+xml"
+    return None
+
+
+def is_cover_digest(value: str) -> bool:
+    return bool(_DIGEST_RE.match(value))
+
+
+def cover_path(digest: str) -> str:
+    return os.path.join(settings.COVER_DIR, digest[:2], digest)
+
+
+def cover_url(digest: str) -> str:
+    return COVER_URL_PREFIX + digest
+
+
+def _size_limit_message() -> str:
+    return f"图片大小超过限制（最大{settings.COVER_MAX_SIZE // 1024 // 1024}MB）"
+
+
+def _commit(partial_path: str, digest: str) -> None:
+    """把临时文件移动到最终位置；同内容的文件已存在时直接丢弃"""
+    final_path = cover_path(digest)
+    if os.path.exists(final_path):
+        os.remove(partial_path)
+        return
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(partial_path, final_path)
+
+
+def save_cover_bytes(data: bytes) -> str:
+    """保存内存中的图片，返回内容哈希"""
+    if sniff_image_type(data[:512]) is None:
+        raise UploadRejected("不支持的图片格式")
+    if len(data) > settings.COVER_MAX_SIZE:
+        raise UploadRejected(_size_limit_message())
+
+    digest = hashlib.sha256(data).hexdigest()
+    if os.path.exists(cover_path(digest)):
+        return digest
+
+    os.makedirs(settings.COVER_DIR, exist_ok=True)
+    partial_path = os.path.join(settings.COVER_DIR, f"{uuid.uuid4()}{PARTIAL_SUFFIX}")
+    try:
+        with open(partial_path, "wb") as f:
+            f.write(data)
+        _commit(partial_path, digest)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return digest
+
+
+async def store_cover_upload(upload_file: UploadFile) -> str:
+    """流式保存上传的封面，边写边计算哈希，返回内容哈希"""
+    os.makedirs(settings.COVER_DIR, exist_ok=True)
+    partial_path = os.path.join(settings.COVER_DIR, f"{uuid.uuid4()}{PARTIAL_SUFFIX}")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(partial_path, "wb") as f:
+            while True:
+                chunk = await upload_file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if size == 0 and sniff_image_type(chunk[:512]) is None:
+                    raise UploadRejected("不支持的图片格式")
+                size += len(chunk)
+                if size > settings.COVER_MAX_SIZE:
+                    raise UploadRejected(_size_limit_message())
+                hasher.update(chunk)
+                await f.write(chunk)
+
+        if size == 0:
+            raise UploadRejected("图片为空")
+
+        digest = hasher.hexdigest()
+        _commit(partial_path, digest)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return digest
+
+
+def decode_inline_cover(value: str) -> Optional[bytes]:
+    """解码 data URL 或裸 Base64 形式的图片，不是内联图片返回 None"""
+    match = _DATA_URL_RE.match(value)
+    payload = value[match.end():] if match else value
+    if not match and (len(payload) < 64 or payload.startswith(("/", "http:", "https:"))):
+        return None
+    try:
+        data = base64.b64decode(payload, validate=False)
+    except (binascii.Error, ValueError):
+        return None
+    if sniff_image_type(data[:512]) is None:
+        return None
+    return data
+
+
+def externalize_cover(value: Optional[str]) -> Optional[str]:
+    """
+    把内联（Base64）封面存入封面存储，返回 /api/covers/<哈希> 引用
+
+    已经是引用或外部 URL 的值原样返回。
+    """
+    if not value or value.startswith(COVER_URL_PREFIX):
+        return value
+    data = decode_inline_cover(value)
+    if data is None:
+        return value
+    return cover_url(save_cover_bytes(data))
+
+
+@lru_cache(maxsize=4096)
+def cover_media_type(digest: str) -> str:
+    """读取文件头识别图片类型（内容不可变，结果可以永久缓存）"""
+    with open(cover_path(digest), "rb") as f:
+        return sniff_image_type(f.read(512)) or "application/octet-stream"
@@ -0,0 +1,233 @@
+"""
+专辑封面缩略图
+
+为封面生成固定宽度（COVER_VARIANT_WIDTHS）的 WebP / JPEG 版本，供列表卡片等
+小尺寸场景使用。上传封面时在后台预生成，未生成的在首次请求时生成。
+
+- 缩放与编码在线程池中执行（Pillow 在缩放/编码时释放 GIL），不阻塞事件循环
+- 生成结果缓存在 COVER_VARIANT_DIR，总大小超过 COVER_VARIANT_CACHE_BYTES 时
+  按最近访问时间淘汰（命中时更新 mtime，重启后仍能恢复访问顺序）
+- Pillow 未安装、或原图为 SVG/GIF 时不生成，直接使用原图
+"""
+
+import asyncio
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.cover_store import cover_media_type, cover_path
+from app.core.ingest import PARTIAL_SUFFIX
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow 为可选依赖
+    Image = None
+
+# 可以缩放的原图类型
+RESIZABLE_TYPES = {"image/png", "image/jpeg", "image/webp"}
+
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+
+def variant_dir() -> str:
+    return settings.COVER_VARIANT_DIR or os.path.join(settings.COVER_DIR, ".variants")
+
+
+def variants_available(digest: str) -> bool:
+    """原图是否支持生成缩略图"""
+    return Image is not None and cover_media_type(digest) in RESIZABLE_TYPES
+
+
+def snap_width(requested: int) -> int:
+    """取不小于请求宽度的最小预设宽度，超过最大预设时取最大值"""
+    widths = sorted(settings.COVER_VARIANT_WIDTHS)
+    return next((width for width in widths if width >= requested), widths[-1])
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    return "webp" if accept and "image/webp" in accept else "jpeg"
+
+
+def variant_path(digest: str, width: int, fmt: str) -> str:
+    return os.path.join(variant_dir(), digest[:2], f"{digest}-{width}.{fmt}")
+
+
+def _render(source: str, dest: str, width: int, fmt: str) -> int:
+    """生成单个缩略图（在线程池中执行），返回文件大小"""
+    pil_format, _ = VARIANT_FORMATS[fmt]
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            height = max(round(image.height * width / image.width), 1)
+            image = image.resize((width, height), Image.LANCZOS)
+        if fmt == "jpeg":
+            if image.mode in ("RGBA", "LA", "P"):
+                # JPEG 不支持透明：铺白底
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                rgba = image.convert("RGBA")
+                background.paste(rgba, mask=rgba.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        partial_path = f"{dest}.{uuid.uuid4().hex}{PARTIAL_SUFFIX}"
+        try:
+            image.save(partial_path, pil_format, quality=settings.COVER_VARIANT_QUALITY)
+            os.replace(partial_path, dest)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+    return os.path.getsize(dest)
+
+
+class _VariantCache:
+    """磁盘缩略图的 LRU 索引（按总字节数淘汰）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Optional["OrderedDict[str, int]"] = None
+        self._total = 0
+
+    def _load(self) -> None:
+        # 首次使用时扫描目录，按 mtime 恢复访问顺序
+        entries = []
+        directory = variant_dir()
+        if os.path.isdir(directory):
+            for dirpath, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    if filename.endswith(PARTIAL_SUFFIX):
+                        continue
+                    stat_result = os.stat(os.path.join(dirpath, filename))
+                    entries.append((stat_result.st_mtime, os.path.join(dirpath, filename), stat_result.st_size))
+        entries.sort()
+        self._entries = OrderedDict((path, size) for _, path, size in entries)
+        self._total = sum(self._entries.values())
+
+    def touch(self, path: str) -> bool:
+        """命中时更新访问顺序，文件不存在返回 False"""
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            if path not in self._entries:
+                return False
+            self._entries.move_to_end(path)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # 被其他进程淘汰
+            with self._lock:
+                self._total -= self._entries.pop(path, 0)
+            return False
+        return True
+
+    def add(self, path: str, size: int) -> None:
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            self._total += size - self._entries.pop(path, 0)
+            self._entries[path] = size
+            while self._total > settings.COVER_VARIANT_CACHE_BYTES and len(self._entries) > 1:
+                evicted, evicted_size = self._entries.popitem(last=False)
+                self._total -= evicted_size
+                try:
+                    os.remove(evicted)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "files": len(self._entries or ()),
+                "bytes": self._total,
+                "max_bytes": settings.COVER_VARIANT_CACHE_BYTES,
+            }
+
+
+_cache = _VariantCache()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# 正在生成的缩略图，避免并发请求重复生成
+_pending: Dict[str, Future] = {}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.COVER_VARIANT_WORKERS,
+                thread_name_prefix="cover-variant",
+            )
+        return _executor
+
+
+def _generate(digest: str, width: int, fmt: str) -> str:
+    dest = variant_path(digest, width, fmt)
+    try:
+        _cache.add(dest, _render(cover_path(digest), dest, width, fmt))
+    finally:
+        with _executor_lock:
+            _pending.pop(dest, None)
+    return dest
+
+
+def _submit(digest: str, width: int, fmt: str) -> Future:
+    dest = variant_path(digest, width, fmt)
+    executor = _get_executor()
+    with _executor_lock:
+        future = _pending.get(dest)
+        if future is None:
+            future = executor.submit(_generate, digest, width, fmt)
+            _pending[dest] = future
+        return future
+
+
+async def get_variant(digest: str, width: int, fmt: str) -> Tuple[str, str]:
+    """返回 (缩略图路径, 媒体类型)，未生成时在线程池中生成"""
+    path = variant_path(digest, width, fmt)
+    if not _cache.touch(path):
+        if os.path.exists(path):
+            # 由其他 worker 生成
+            _cache.add(path, os.path.getsize(path))
+            return path, VARIANT_FORMATS[fmt][1]
+        path = await asyncio.wrap_future(_submit(digest, width, fmt))
+    return path, VARIANT_FORMATS[fmt][1]
+
+
+def pregenerate_variants(digest: str) -> None:
+    """上传封面后在后台生成全部缩略图（不等待结果）"""
+    if not variants_available(digest):
+        return
+    for width in settings.COVER_VARIANT_WIDTHS:
+        for fmt in VARIANT_FORMATS:
+            if not os.path.exists(variant_path(digest, width, fmt)):
+                _submit(digest, width, fmt).add_done_callback(_log_failure)
+
+
+def _log_failure(future: Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Failed to generate cover variant: {future.exception()}")
+
+
+def variant_cache_stats() -> dict:
+    return _cache.stats()
+
+
+def shutdown_variant_executor() -> None:
+    """应用关闭时释放线程池"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
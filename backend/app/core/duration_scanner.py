@@ -0,0 +1,271 @@
+"""
+音频时长快速扫描
+
+mutagen 无法解析时的后备方案，只读取头部结构（通过 mmap，未访问的页不会读盘）：
+- MP3：Xing/Info（含 LAME 编码延迟）、VBRI 头；都没有时逐帧遍历帧头累加采样数
+- FLAC：STREAMINFO 中的总采样数
+- MP4/M4A：moov/mvhd 中的 duration / timescale
+
+无法识别的文件返回 None。
+"""
+
+import mmap
+import os
+import struct
+from typing import NamedTuple, Optional
+
+# MPEG 版本位 -> 版本（1 为保留值）
+_MPEG_VERSIONS = {0: 2.5, 2: 2, 3: 1}
+
+# 采样率表 [版本][索引]
+_SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+
+# 码率表 (kbps)：[(版本是否为 MPEG1, layer)][索引]
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# 查找首帧时最多扫描的字节数（ID3v2 标签之后）
+_SYNC_SEARCH_LIMIT = 256 * 1024
+
+
+class ScanResult(NamedTuple):
+    duration: float  # 秒
+    codec: str
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+
+
+class _FrameHeader(NamedTuple):
+    version: float
+    layer: int
+    bitrate: int  # bps
+    sample_rate: int
+    channels: int
+    frame_length: int
+    samples: int  # 每帧采样数
+
+
+def _parse_frame_header(data, pos: int) -> Optional[_FrameHeader]:
+    """解析 pos 处的 MPEG 音频帧头，不合法返回 None"""
+    if pos + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[pos], data[pos + 1], data[pos + 2], data[pos + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = _MPEG_VERSIONS.get((b1 >> 3) & 0x03)
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version is None or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version == 1
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    channels = 1 if (b3 >> 6) == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        frame_length = 72 * bitrate // sample_rate + padding
+
+    return _FrameHeader(version, layer, bitrate, sample_rate, channels, frame_length, samples)
+
+
+def _skip_id3v2(data) -> int:
+    """返回 ID3v2 标签之后的偏移"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _find_first_frame(data, start: int) -> Optional[int]:
+    """查找首个有效帧：要求紧随其后的位置也是合法帧头，避免误同步"""
+    limit = min(len(data), start + _SYNC_SEARCH_LIMIT)
+    pos = data.find(b"\xff", start, limit)
+    while pos != -1:
+        header = _parse_frame_header(data, pos)
+        if header is not None:
+            following = pos + header.frame_length
+            if following + 4 > len(data) or _parse_frame_header(data, following) is not None:
+                return pos
+        pos = data.find(b"\xff", pos + 1, limit)
+    return None
+
+
+def _xing_offset(header: _FrameHeader) -> int:
+    """Xing/Info 头相对帧起始的偏移（帧头 + side info）"""
+    if header.version == 1:
+        return 4 + (17 if header.channels == 1 else 32)
+    return 4 + (9 if header.channels == 1 else 17)
+
+
+def _scan_xing(data, pos: int, header: _FrameHeader) -> Optional[float]:
+    offset = pos + _xing_offset(header)
+    if data[offset:offset + 4] not in (b"Xing", b"Info"):
+        return None
+    flags = struct.unpack(">I", data[offset + 4:offset + 8])[0]
+    if not flags & 0x01:
+        return None
+    frames = struct.unpack(">I", data[offset + 8:offset + 12])[0]
+
+    # LAME 扩展头紧跟在 Xing 的可选字段之后，记录了编码器延迟和填充采样数
+    lame = offset + 12
+    lame += 4 if flags & 0x02 else 0
+    lame += 100 if flags & 0x04 else 0
+    lame += 4 if flags & 0x08 else 0
+    total_samples = frames * header.samples
+    if data[lame:lame + 4] == b"LAME" and lame + 24 <= len(data):
+        b0, b1, b2 = data[lame + 21], data[lame + 22], data[lame + 23]
+        delay = (b0 << 4) | (b1 >> 4)
+        padding = ((b1 & 0x0F) << 8) | b2
+        total_samples = max(total_samples - delay - padding, 0)
+    return total_samples / header.sample_rate
+
+
+def _scan_vbri(data, pos: int, header: _FrameHeader) -> Optional[float]:
+    offset = pos + 4 + 32
+    if data[offset:offset + 4] != b"VBRI":
+        return None
+    frames = struct.unpack(">I", data[offset + 14:offset + 18])[0]
+    return frames * header.samples / header.sample_rate
+
+
+def _walk_frames(data, pos: int) -> float:
+    """逐帧遍历帧头，累加采样数（CBR 或没有 VBR 头的文件）"""
+    total_seconds = 0.0
+    end = len(data)
+    # 同一文件中不同的帧头只有少数几种，按原始字节缓存解析结果
+    parsed = {}
+    while pos + 4 <= end:
+        raw = data[pos:pos + 4]
+        header = parsed.get(raw)
+        if header is None:
+            header = _parse_frame_header(data, pos)
+            if header is not None:
+                parsed[raw] = header
+        if header is None or header.frame_length <= 0:
+            # 文件尾部的 ID3v1/APE 标签或损坏数据：尝试重新同步
+            if data[pos:pos + 3] == b"TAG" or data[pos:pos + 8] == b"APETAGEX":
+                break
+            pos = _find_first_frame(data, pos + 1)
+            if pos is None:
+                break
+            continue
+        if pos + header.frame_length > end:
+            break
+        total_seconds += header.samples / header.sample_rate
+        pos += header.frame_length
+    return total_seconds
+
+
+def _scan_mp3(data) -> Optional[ScanResult]:
+    pos = _find_first_frame(data, _skip_id3v2(data))
+    if pos is None:
+        return None
+    header = _parse_frame_header(data, pos)
+
+    duration = _scan_xing(data, pos, header)
+    if duration is None:
+        duration = _scan_vbri(data, pos, header)
+    if duration is None:
+        duration = _walk_frames(data, pos)
+
+    codec = "mp3" if header.layer == 3 else f"mp{header.layer}"
+    return ScanResult(duration, codec, header.sample_rate, header.channels)
+
+
+def _scan_flac(data, start: int) -> Optional[ScanResult]:
+    pos = start + 4
+    while pos + 4 <= len(data):
+        block_header = data[pos]
+        block_type = block_header & 0x7F
+        block_length = int.from_bytes(data[pos + 1:pos + 4], "big")
+        if block_type == 0 and block_length >= 18:
+            info = int.from_bytes(data[pos + 14:pos + 22], "big")
+            sample_rate = info >> 44
+            channels = ((info >> 41) & 0x07) + 1
+            total_samples = info & 0xFFFFFFFFF
+            if not sample_rate:
+                return None
+            return ScanResult(total_samples / sample_rate, "flac", sample_rate, channels)
+        if block_header & 0x80:
+            break
+        pos += 4 + block_length
+    return None
+
+
+def _iter_boxes(data, start: int, end: int):
+    """遍历 [start, end) 内的 MP4 box，产出 (类型, 内容起始, box结束)"""
+    pos = start
+    while pos + 8 <= end:
+        size = struct.unpack(">I", data[pos:pos + 4])[0]
+        box_type = bytes(data[pos + 4:pos + 8])
+        header_size = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack(">Q", data[pos + 8:pos + 16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            return
+        yield box_type, pos + header_size, min(pos + size, end)
+        pos += size
+
+
+def _scan_mp4(data) -> Optional[ScanResult]:
+    for box_type, body, box_end in _iter_boxes(data, 0, len(data)):
+        if box_type != b"moov":
+            continue
+        for child_type, child_body, _ in _iter_boxes(data, body, box_end):
+            if child_type != b"mvhd":
+                continue
+            version = data[child_body]
+            if version == 1:
+                timescale, duration = struct.unpack(">IQ", data[child_body + 20:child_body + 32])
+            else:
+                timescale, duration = struct.unpack(">II", data[child_body + 12:child_body + 20])
+            if not timescale:
+                return None
+            return ScanResult(duration / timescale, "mp4")
+    return None
+
+
+def scan_duration(file_path: str) -> Optional[ScanResult]:
+    """扫描文件头部结构得到时长，无法识别返回 None"""
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                if data[4:8] == b"ftyp":
+                    return _scan_mp4(data)
+                start = _skip_id3v2(data)
+                if data[start:start + 4] == b"fLaC":
+                    return _scan_flac(data, start)
+                return _scan_mp3(data)
+            except (IndexError, struct.error):
+                return None
@@ -0,0 +1,96 @@
+"""
+音频流热路径的剧集文件信息缓存
+
+episode_id -> (file_path, size, mtime, media_type)，命中时无需查询数据库和 stat 文件。
+剧集的上传、修改、删除会使对应条目失效；TTL 兜底多进程部署下其他 worker 的修改。
+"""
+
+import os
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.models import Episode
+
+# 扩展名 -> Content-Type
+MEDIA_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".mp4": "audio/mp4",
+    ".aac": "audio/aac",
+    ".flac": "audio/flac",
+    ".ogg": "audio/ogg",
+    ".wav": "audio/wav",
+}
+DEFAULT_MEDIA_TYPE = "audio/mpeg"
+
+
+class EpisodeFileInfo(NamedTuple):
+    episode_id: int
+    album_id: int
+    file_path: str
+    size: int
+    mtime: float
+    media_type: str
+
+
+_cache = TTLCache(
+    maxsize=settings.EPISODE_CACHE_SIZE,
+    ttl=settings.EPISODE_CACHE_TTL_SECONDS,
+)
+
+
+def guess_media_type(file_path: str) -> str:
+    """根据扩展名推断音频 Content-Type"""
+    return MEDIA_TYPES.get(Path(file_path).suffix.lower(), DEFAULT_MEDIA_TYPE)
+
+
+async def get_episode_file_info(db: AsyncSession, episode_id: int) -> Optional[EpisodeFileInfo]:
+    """
+    获取剧集的文件信息
+
+    剧集不存在返回 None；剧集存在但没有文件或文件丢失时抛出 FileNotFoundError。
+    """
+    info = _cache.get(episode_id)
+    if info is not None:
+        return info
+
+    row = (await db.execute(
+        select(Episode.album_id, Episode.file_path).where(Episode.id == episode_id)
+    )).first()
+    if row is None:
+        return None
+
+    album_id, file_path = row
+    if not file_path:
+        raise FileNotFoundError(episode_id)
+    stat_result = os.stat(file_path)
+
+    info = EpisodeFileInfo(
+        episode_id=episode_id,
+        album_id=album_id,
+        file_path=file_path,
+        size=stat_result.st_size,
+        mtime=stat_result.st_mtime,
+        media_type=guess_media_type(file_path),
+    )
+    _cache.set(episode_id, info)
+    return info
+
+
+def invalidate_episode(episode_id: int) -> None:
+    """剧集文件或记录变更后调用"""
+    _cache.pop(episode_id)
+
+
+def invalidate_album(album_id: int) -> None:
+    """专辑删除后调用，移除该专辑下所有剧集"""
+    _cache.pop_where(lambda _, info: info.album_id == album_id)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
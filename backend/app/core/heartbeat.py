@@ -0,0 +1,124 @@
+"""
+心跳合并写入
+
+客户端每次心跳都刷新会话有效期，而大多数刷新只是把过期时间往后推几秒。
+心跳先记录在内存中，由后台任务合并写入：
+
+- 本进程最近一次写入的过期时间距现在还超过 HEARTBEAT_REFRESH_THRESHOLD_SECONDS
+  时直接跳过（登录时记为刚刷新）
+- 其余的心跳按用户去重，每 HEARTBEAT_FLUSH_INTERVAL_SECONDS 秒调用一次
+  SessionStore.refresh_many 批量写入
+
+默认配置下（有效期 1800 秒、阈值 1500 秒）每个在线用户约 5 分钟写一次。
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.session_store import get_session_store
+
+
+class HeartbeatAggregator:
+    def __init__(self):
+        self._expires: Dict[int, float] = {}  # user_id -> 本进程最近一次写入的过期时间
+        self._pending: Set[int] = set()
+        self.received = 0
+        self.skipped = 0
+        self.flushes = 0
+        self.refreshed_users = 0
+
+    def note_refreshed(self, user_id: int) -> None:
+        """用户的所有会话刚写入过期时间"""
+        self._expires[user_id] = time.time() + settings.SESSION_EXPIRE_SECONDS
+
+    def note_created(self, user_id: int) -> None:
+        """用户新建了会话；已有会话时保留较早的过期时间，多端登录时旧会话不会漏刷新"""
+        self._expires.setdefault(user_id, time.time() + settings.SESSION_EXPIRE_SECONDS)
+
+    def forget(self, user_id: int) -> None:
+        """会话已删除（登出）"""
+        self._expires.pop(user_id, None)
+        self._pending.discard(user_id)
+
+    def record(self, user_id: int) -> bool:
+        """记录一次心跳，返回是否需要写入（False 表示剩余有效期充足，已跳过）"""
+        self.received += 1
+        remaining = self._expires.get(user_id, 0) - time.time()
+        if remaining > settings.HEARTBEAT_REFRESH_THRESHOLD_SECONDS:
+            self.skipped += 1
+            return False
+        self._pending.add(user_id)
+        return True
+
+    async def flush(self) -> int:
+        """把等待中的心跳批量写入会话存储，返回刷新的用户数"""
+        now = time.time()
+        # 已过期的记录不再需要
+        for user_id in [user_id for user_id, expires_at in self._expires.items() if expires_at <= now]:
+            del self._expires[user_id]
+
+        if not self._pending:
+            return 0
+        user_ids, self._pending = sorted(self._pending), set()
+        try:
+            await get_session_store().refresh_many(user_ids)
+        except Exception:
+            # 写入失败时放回，下次重试
+            self._pending.update(user_ids)
+            raise
+        for user_id in user_ids:
+            self.note_refreshed(user_id)
+        self.flushes += 1
+        self.refreshed_users += len(user_ids)
+        return len(user_ids)
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "skipped": self.skipped,
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "refreshed_users": self.refreshed_users,
+        }
+
+
+heartbeats = HeartbeatAggregator()
+_task: Optional[asyncio.Task] = None
+
+
+async def _run() -> None:
+    while True:
+        await asyncio.sleep(settings.HEARTBEAT_FLUSH_INTERVAL_SECONDS)
+        try:
+            await heartbeats.flush()
+        except Exception as e:
+            print(f"⚠️  心跳写入失败：{e}")
+
+
+def start_heartbeat_flusher() -> None:
+    """在当前事件循环中启动后台写入任务（应用启动时调用）"""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_run())
+
+
+async def stop_heartbeat_flusher() -> None:
+    """停止后台任务，并写入剩余的心跳"""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    try:
+        await heartbeats.flush()
+    except Exception as e:
+        print(f"⚠️  心跳写入失败：{e}")
+
+
+def heartbeat_stats() -> dict:
+    return heartbeats.stats()
@@ -0,0 +1,224 @@
+"""
+上传文件落盘与批量入库
+
+所有上传入口共用：按固定大小分块把上传内容写入同目录下的临时文件，
+写入过程中检查大小上限（超限立即中止），完成后原子重命名到
+/media/albums/<album_id>/<uuid>.<ext>。任何时刻只在内存中持有一个块。
+
+批量上传时多个文件并发落盘、解析（并发数受 UPLOAD_BATCH_CONCURRENCY 限制），
+之后一次性批量插入剧集记录。
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import aiofiles
+from fastapi import UploadFile
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.album_stats import refresh_album_stats
+from app.core.audio_probe import AudioInfo, probe_audio
+from app.core.config import settings
+from app.models.models import Album, Episode
+
+# 写入中的临时文件后缀
+PARTIAL_SUFFIX = ".part"
+
+
+class UploadRejected(Exception):
+    """上传文件不符合要求（为空或超过大小限制）"""
+
+
+class StoredFile(NamedTuple):
+    file_path: str
+    file_size: int
+
+
+def album_media_dir(album_id: int) -> str:
+    """专辑音频文件目录"""
+    return os.path.join(settings.MEDIA_DIR, str(album_id))
+
+
+def _size_limit_message(filename: str) -> str:
+    limit_mb = settings.UPLOAD_MAX_FILE_SIZE // 1024 // 1024
+    return f"文件大小超过限制（最大{limit_mb}MB）: {filename}"
+
+
+async def store_upload(
+    upload_file: UploadFile,
+    album_id: int,
+    default_ext: str = ".mp3",
+) -> StoredFile:
+    """
+    流式保存上传文件
+
+    文件为空或超过 UPLOAD_MAX_FILE_SIZE 时抛出 UploadRejected，不会留下任何文件。
+    """
+    filename = upload_file.filename or ""
+    max_size = settings.UPLOAD_MAX_FILE_SIZE
+
+    # multipart 解析时已知大小的，直接拒绝，不必读取
+    if upload_file.size is not None and upload_file.size > max_size:
+        raise UploadRejected(_size_limit_message(filename))
+
+    file_ext = Path(filename).suffix or default_ext
+    file_dir = album_media_dir(album_id)
+    os.makedirs(file_dir, exist_ok=True)
+    file_path = os.path.join(file_dir, f"{uuid.uuid4()}{file_ext}")
+    partial_path = file_path + PARTIAL_SUFFIX
+
+    file_size = 0
+    try:
+        async with aiofiles.open(partial_path, "wb") as f:
+            while True:
+                chunk = await upload_file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise UploadRejected(_size_limit_message(filename))
+                await f.write(chunk)
+
+        if file_size == 0:
+            raise UploadRejected(f"文件为空: {filename}")
+
+        os.replace(partial_path, file_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    return StoredFile(file_path=file_path, file_size=file_size)
+
+
+@dataclass
+class IngestResult:
+    """批量上传中单个文件的处理结果"""
+    filename: str
+    status: str  # stored / rejected / failed
+    stored: Optional[StoredFile] = None
+    audio_info: Optional[AudioInfo] = None
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+    episode_id: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "filename": self.filename,
+            "status": self.status,
+            "episode_id": self.episode_id,
+            "duration": self.audio_info.duration if self.audio_info else None,
+            "error": self.error,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+        }
+
+
+async def _ingest_one(
+    upload_file: UploadFile,
+    album_id: int,
+    default_ext: str,
+    semaphore: asyncio.Semaphore,
+) -> IngestResult:
+    async with semaphore:
+        started = time.perf_counter()
+        result = IngestResult(filename=upload_file.filename or "", status="stored")
+        try:
+            result.stored = await store_upload(upload_file, album_id, default_ext)
+            result.audio_info = await probe_audio(result.stored.file_path, result.stored.file_size)
+        except UploadRejected as e:
+            result.status, result.error = "rejected", str(e)
+        except Exception as e:
+            print(f"Failed to ingest {result.filename}: {e}")
+            if result.stored and os.path.exists(result.stored.file_path):
+                os.remove(result.stored.file_path)
+            result.stored = None
+            result.status, result.error = "failed", "文件处理失败"
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        return result
+
+
+async def ingest_batch(
+    files: Sequence[UploadFile],
+    album_id: int,
+    default_ext: str = ".mp3",
+    concurrency: Optional[int] = None,
+) -> List[IngestResult]:
+    """并发落盘并解析多个文件，结果顺序与输入一致"""
+    semaphore = asyncio.Semaphore(concurrency or settings.UPLOAD_BATCH_CONCURRENCY)
+    return list(await asyncio.gather(
+        *(_ingest_one(upload_file, album_id, default_ext, semaphore) for upload_file in files)
+    ))
+
+
+def reserve_sort_orders(db: Session, album_id: int) -> int:
+    """
+    返回专辑中下一个可用的 sort_order（不提交事务）
+
+    用一条 UPDATE ... RETURNING 锁定专辑行并读取当前最大的 sort_order，
+    同一事务中从返回值开始连续使用，并发创建时不会重复；
+    删除剧集后也不会与剩余剧集重复（不能用 episode_count 推算）。
+    """
+    # 按参数过滤而不是关联 albums.id：UPDATE ... RETURNING 中的关联子查询会渲染为
+    # 不带表名的 "album_id = id"，SQLite 会把 id 解析为 episodes.id
+    max_sort_order = (
+        select(func.coalesce(func.max(Episode.sort_order), 0))
+        .where(Episode.album_id == album_id)
+        .scalar_subquery()
+    )
+    return db.execute(
+        update(Album)
+        .where(Album.id == album_id)
+        .values(updated_at=datetime.utcnow())
+        .returning(max_sort_order)
+    ).scalar_one() + 1
+
+
+def insert_episodes(db: Session, album_id: int, entries: List[Tuple[str, IngestResult]]) -> List[dict]:
+    """
+    为已落盘的文件批量创建剧集记录（不提交事务）
+
+    entries 为 (标题, 处理结果)。先预留连续的 sort_order（reserve_sort_orders），
+    再用一条 INSERT 插入所有记录，最后在同一事务中刷新专辑汇总数据。
+    """
+    if not entries:
+        return []
+
+    first_sort_order = reserve_sort_orders(db, album_id)
+
+    rows = [
+        {
+            "album_id": album_id,
+            "title": title,
+            "file_path": result.stored.file_path,
+            "file_size": result.stored.file_size,
+            "duration": result.audio_info.duration,
+            "sort_order": first_sort_order + index,
+        }
+        for index, (title, result) in enumerate(entries)
+    ]
+    inserted = db.execute(
+        insert(Episode).returning(Episode.id, Episode.created_at, sort_by_parameter_order=True),
+        rows,
+    ).all()
+
+    for row, (episode_id, created_at), (_, result) in zip(rows, inserted, entries):
+        row["id"] = episode_id
+        row["created_at"] = created_at
+        result.episode_id = episode_id
+
+    refresh_album_stats(db, [album_id])
+    return rows
+
+
+def remove_stored(results: List[IngestResult]) -> None:
+    """批量入库失败时清理已落盘的文件"""
+    for result in results:
+        if result.stored and os.path.exists(result.stored.file_path):
+            os.remove(result.stored.file_path)
@@ -0,0 +1,130 @@
+"""
+在线人数统计
+
+/api/online 和 /api/system/status 被前端轮询，不能每次都统计会话存储。
+在线人数保存在内存计数器中，读取为 O(1)：
+
+- 登录 +1，登出、过期清理减去删除的会话数（由 session_crud 调用）
+- 后台任务每 ONLINE_RESYNC_SECONDS 秒先清理一轮过期会话（删除数量照常计入），
+  再用 SessionStore.count_online() 校准，修正多 worker 部署下其他进程的变化。
+  先清理再校准：否则校准值不含尚未清理的过期会话，之后清理时会被重复扣除
+
+按分钟的统计保存在环形缓冲区中（最近 ONLINE_HISTORY_MINUTES 分钟），
+每个桶记录该分钟的最高在线人数、分钟末在线人数以及登录、登出、过期、心跳次数，
+由 /api/online/history 返回。
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.session_store import get_session_store
+
+
+class OnlineTracker:
+    def __init__(self, history_minutes: int):
+        self.current = 0
+        self.synced_at: Optional[float] = None
+        self._minutes: List[int] = [-1] * history_minutes  # 桶对应的分钟序号，-1 表示空
+        self._buckets: List[dict] = [self._empty_bucket(0) for _ in range(history_minutes)]
+
+    @staticmethod
+    def _empty_bucket(online: int) -> dict:
+        return {"online_max": online, "online_last": online, "logins": 0, "logouts": 0, "expired": 0, "heartbeats": 0}
+
+    def _bucket(self) -> dict:
+        """当前分钟的桶，跨分钟时重置"""
+        minute = int(time.time() // 60)
+        index = minute % len(self._minutes)
+        bucket = self._buckets[index]
+        if self._minutes[index] != minute:
+            self._minutes[index] = minute
+            bucket.update(self._empty_bucket(self.current))
+        return bucket
+
+    def _set_current(self, value: int) -> None:
+        self.current = max(value, 0)
+        bucket = self._bucket()
+        bucket["online_max"] = max(bucket["online_max"], self.current)
+        bucket["online_last"] = self.current
+
+    def on_login(self) -> None:
+        self._bucket()["logins"] += 1
+        self._set_current(self.current + 1)
+
+    def on_logout(self, sessions: int) -> None:
+        self._bucket()["logouts"] += 1
+        self._set_current(self.current - sessions)
+
+    def on_expired(self, sessions: int) -> None:
+        if sessions:
+            self._bucket()["expired"] += sessions
+            self._set_current(self.current - sessions)
+
+    def on_heartbeat(self) -> None:
+        self._bucket()["heartbeats"] += 1
+
+    def sync(self, count: int) -> None:
+        """用会话存储的实际数量校准"""
+        self.synced_at = time.time()
+        self._set_current(count)
+
+    def history(self, minutes: int) -> List[dict]:
+        """最近 minutes 分钟（含当前分钟）的统计，按时间升序；没有事件的分钟沿用上一分钟的在线人数"""
+        self._bucket()
+        minutes = min(minutes, len(self._minutes))
+        now_minute = int(time.time() // 60)
+        items, carry = [], None
+        for minute in range(now_minute - minutes + 1, now_minute + 1):
+            index = minute % len(self._minutes)
+            if self._minutes[index] == minute:
+                values = dict(self._buckets[index])
+                carry = values["online_last"]
+            elif carry is not None:
+                values = self._empty_bucket(carry)
+            else:
+                continue
+            items.append({"minute": datetime.utcfromtimestamp(minute * 60).isoformat(), **values})
+        return items
+
+
+online = OnlineTracker(settings.ONLINE_HISTORY_MINUTES)
+_task: Optional[asyncio.Task] = None
+
+
+async def resync_online_count() -> int:
+    from app.core.session_sweeper import sweep_once  # session_crud 依赖本模块，避免循环导入
+
+    await sweep_once()
+    count = await get_session_store().count_online()
+    online.sync(count)
+    return count
+
+
+async def _run() -> None:
+    while True:
+        try:
+            await resync_online_count()
+        except Exception as e:
+            print(f"⚠️  在线人数校准失败：{e}")
+        await asyncio.sleep(settings.ONLINE_RESYNC_SECONDS)
+
+
+def start_online_tracker() -> None:
+    """启动时立即校准一次，之后定期校准（应用启动时调用）"""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_run())
+
+
+async def stop_online_tracker() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,196 @@
+"""
+游标（keyset）分页
+
+OFFSET 分页需要先扫描并丢弃前面所有行，越往后翻越慢。游标分页记录上一页
+最后一行的排序键，下一页直接用 WHERE (排序键) > (上一页最后的值) 定位，
+配合与排序一致的索引，任何深度的翻页代价都相同。
+
+游标对客户端不透明：排序键的值序列化为 JSON 后做 base64url 编码。
+排序键必须包含唯一列（id）作为最后一列，保证顺序稳定、不重不漏。
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Select, and_, literal, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+from app.models.models import Album, Episode, User
+
+
+class InvalidCursor(Exception):
+    """游标格式错误或与当前排序不匹配"""
+
+
+class SortKey(NamedTuple):
+    column: Any  # ORM 列属性，如 Album.sort_order
+    descending: bool = False
+
+    @property
+    def name(self) -> str:
+        return self.column.key
+
+    def order_by(self):
+        return self.column.desc() if self.descending else self.column.asc()
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _matches_column(key: SortKey, value) -> bool:
+    """游标中的值与排序列的类型是否一致（bool 不当作整数）"""
+    if value is None:
+        return True
+    expected = key.column.type.python_type
+    if isinstance(value, bool):
+        return expected is bool
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, keys: Sequence[SortKey]) -> List:
+    """解码游标；格式错误、长度或值的类型与 keys 不符时抛出 InvalidCursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise InvalidCursor(cursor)
+        values = [_decode_value(value) for value in values]
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if not all(_matches_column(key, value) for key, value in zip(keys, values)):
+        raise InvalidCursor(cursor)
+    return values
+
+
+def _after(keys: Sequence[SortKey], values: Sequence):
+    """
+    构造“排在游标之后”的条件
+
+    各列方向相同时使用行值比较 (a, b, c) > (va, vb, vc)，SQLite 可以直接在
+    索引上定位起点。方向不同时展开为
+    a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc)，
+    并附加首列的范围条件 a >= va，使查询仍能利用首列索引缩小扫描范围。
+    """
+    def beyond(key: SortKey, value):
+        return key.column < value if key.descending else key.column > value
+
+    columns = [key.column for key in keys]
+    if len({key.descending for key in keys}) == 1:
+        row = tuple_(*columns)
+        target = tuple_(*(literal(value, column.type) for column, value in zip(columns, values)))
+        return row < target if keys[0].descending else row > target
+
+    clauses = []
+    for index, key in enumerate(keys):
+        equal = [columns[i] == values[i] for i in range(index)]
+        clauses.append(and_(*equal, beyond(key, values[index])))
+    first = keys[0]
+    leading = first.column <= values[0] if first.descending else first.column >= values[0]
+    return and_(leading, or_(*clauses))
+
+
+# 各列表的排序键（与原有排序一致，最后追加 id 作为唯一键）
+ALBUM_SORT_KEYS = (
+    SortKey(Album.sort_order),
+    SortKey(Album.created_at, descending=True),
+    SortKey(Album.id, descending=True),
+)
+EPISODE_SORT_KEYS = (
+    SortKey(Episode.sort_order),
+    SortKey(Episode.created_at),
+    SortKey(Episode.id),
+)
+USER_SORT_KEYS = (
+    SortKey(User.created_at, descending=True),
+    SortKey(User.id, descending=True),
+)
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: Optional[str]
+
+
+def _page_query(query, keys: Sequence[SortKey], limit: int, cursor: Optional[str], offset: int):
+    """对 Query 或 select() 添加排序、游标条件与 LIMIT（多取一行）"""
+    query = query.order_by(*(key.order_by() for key in keys))
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(cursor, keys)))
+    elif offset:
+        query = query.offset(offset)
+    return query.limit(limit + 1)
+
+
+def _to_page(rows: list, keys: Sequence[SortKey], limit: int) -> Page:
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    return Page(rows, cursor_for(rows[-1], keys))
+
+
+def paginate(
+    query: Query,
+    keys: Sequence[SortKey],
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> Page:
+    """
+    按 keys 排序并返回一页
+
+    指定 cursor 时忽略 offset（offset 只用于兼容按页码翻页的旧接口）。
+    多取一行用于判断是否还有下一页；没有下一页时 next_cursor 为 None。
+    """
+    rows = _page_query(query, keys, limit, cursor, offset).all()
+    return _to_page(rows, keys, limit)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    statement: Select,
+    keys: Sequence[SortKey],
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> Page:
+    """paginate 的异步版本，statement 为 select(Model)"""
+    result = await db.execute(_page_query(statement, keys, limit, cursor, offset))
+    return _to_page(list(result.scalars()), keys, limit)
+
+
+async def paginate_rows_async(
+    db: AsyncSession,
+    statement: Select,
+    keys: Sequence[SortKey],
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> Page:
+    """paginate_async 的按列版本：statement 为 select(列, ...)，返回 Row（须包含全部排序键列）"""
+    result = await db.execute(_page_query(statement, keys, limit, cursor, offset))
+    return _to_page(result.all(), keys, limit)
+
+
+def cursor_for(row, keys: Sequence[SortKey]) -> str:
+    """以 row 作为上一页最后一行生成游标"""
+    return encode_cursor([getattr(row, key.name) for key in keys])
@@ -0,0 +1,102 @@
+"""
+HTTP Range 请求头解析（RFC 9110 §14）
+
+支持：
+- bytes=start-end / bytes=start- / bytes=-suffix
+- 多区间请求，重叠或相邻的区间会被合并
+- end 超出文件大小时截断到文件末尾
+
+语法错误或非 bytes 单位的 Range 头按规范忽略（返回 None，按完整文件响应）；
+所有区间都无法满足时抛出 RangeNotSatisfiable，由调用方返回 416。
+"""
+
+from typing import List, Optional, Tuple
+
+# 单个请求最多接受的区间数（合并后），防止大量碎片区间拖垮服务器
+MAX_RANGES = 16
+
+ByteRange = Tuple[int, int]
+
+
+class RangeNotSatisfiable(Exception):
+    """Range 头合法，但没有任何区间落在文件范围内"""
+
+    def __init__(self, file_size: int):
+        super().__init__(f"bytes */{file_size}")
+        self.file_size = file_size
+
+
+def _parse_spec(spec: str, file_size: int) -> Optional[ByteRange]:
+    """
+    解析单个区间，返回闭区间 (start, end)
+
+    语法错误抛出 ValueError；语法正确但无法满足时返回 None。
+    """
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        raise ValueError(spec)
+    first = first.strip()
+    last = last.strip()
+
+    if not first:
+        # 后缀区间：最后 N 个字节
+        if not last.isdigit():
+            raise ValueError(spec)
+        suffix = int(last)
+        if suffix == 0 or file_size == 0:
+            return None
+        return max(file_size - suffix, 0), file_size - 1
+
+    if not first.isdigit() or (last and not last.isdigit()):
+        raise ValueError(spec)
+    start = int(first)
+    if last and int(last) < start:
+        raise ValueError(spec)
+    if start >= file_size:
+        return None
+    end = int(last) if last else file_size - 1
+    return start, min(end, file_size - 1)
+
+
+def coalesce_ranges(ranges: List[ByteRange]) -> List[ByteRange]:
+    """合并重叠或相邻的区间，结果按起始位置升序"""
+    merged: List[ByteRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def parse_range_header(header: str, file_size: int) -> Optional[List[ByteRange]]:
+    """
+    解析 Range 头
+
+    返回合并后的区间列表；Range 头应被忽略时返回 None。
+    """
+    unit, sep, specs = header.partition("=")
+    if not sep or unit.strip().lower() != "bytes":
+        return None
+
+    spec_list = [spec for spec in specs.split(",") if spec.strip()]
+    if not spec_list:
+        return None
+
+    ranges: List[ByteRange] = []
+    try:
+        for spec in spec_list:
+            byte_range = _parse_spec(spec, file_size)
+            if byte_range is not None:
+                ranges.append(byte_range)
+    except ValueError:
+        return None
+
+    if not ranges:
+        raise RangeNotSatisfiable(file_size)
+
+    ranges = coalesce_ranges(ranges)
+    if len(ranges) > MAX_RANGES:
+        return None
+    return ranges
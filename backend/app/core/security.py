@@ -1,9 +1,15 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
+from app.core.cache import TTLCache
 from app.core.config import settings
 
+# 已验证Token的payload缓存，键为Token的SHA-256摘要
+_token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.JWT_EXPIRE_SECONDS)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
@@ -33,17 +39,30 @@ def create_access_token(data: dict) -> str:
 
 
 def decode_token(token: str) -> Optional[dict]:
-    """解码JWT token"""
+    """解码JWT token（已验证的payload缓存到Token过期为止）"""
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(
             token,
             settings.JWT_SECRET_KEY,
             algorithms=[settings.JWT_ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
 
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        _token_cache.set(key, dict(payload), ttl=exp - time.time())
+    return payload
+
+
+def token_cache_stats() -> dict:
+    return _token_cache.stats()
+
 
 def generate_stream_token(user_id: int, episode_id: int) -> str:
     """生成音频流Token"""
@@ -0,0 +1,45 @@
+"""
+JSON 序列化快速路径
+
+默认的 JSONResponse 先用 jsonable_encoder 逐个字段转换，再用标准库 json 编码；
+返回 Pydantic 模型时还要按 response_model 再校验一遍。列表接口逐行执行这些步骤，
+大专辑下序列化占了请求的大部分时间。
+
+- FastJSONResponse：orjson 编码的响应类（应用的默认响应类）
+- row_dicts：按列 select() 的结果（Row 元组，不经过 ORM 身份映射）直接转为 dict，
+  datetime 等类型由 orjson 原生编码，不再逐个转换
+- dumps：Pydantic 模型等 orjson 不认识的对象回退到 jsonable_encoder
+
+orjson 对 datetime 的输出与 isoformat() 一致（无时区的时间不带后缀，
+微秒为 0 时省略），与原来的响应格式相同。
+"""
+
+from typing import Any, List, Sequence
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.engine import Row
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=JSON_OPTIONS)
+
+
+def row_dicts(rows: Sequence[Row]) -> List[dict]:
+    """把按列查询的行转为 dict 列表，键为 select() 中的列名"""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,109 +1,66 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from datetime import datetime, timedelta
-from app.models.models import Session as SessionModel
-from app.core.config import settings
+"""
+会话操作
 
+具体存储由 SESSION_STORE 配置决定（见 session_store.py），
+默认保存在进程内存中，不再读写 sessions 表。
+"""
 
-def get_db_session():
-    """获取数据库会话的依赖"""
-    from app.db.base import SessionLocal
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+from app.core.heartbeat import heartbeats
+from app.core.online_tracker import online
+from app.core.session_store import get_session_store
 
 
-async def cleanup_expired_sessions(db: Session) -> int:
+async def cleanup_expired_sessions(limit: int = 1000) -> int:
     """
-    清理已过期的会话记录
+    清理已过期的会话记录（最多 limit 条）
 
     返回删除的记录数量，用于日志或调试（生产环境可忽略返回值）。
     """
-    now = datetime.utcnow()
-    deleted = db.query(SessionModel).filter(
-        SessionModel.expires_at <= now
-    ).delete()
-    db.commit()
+    deleted = await get_session_store().sweep(limit)
+    online.on_expired(deleted)
     return deleted
 
 
-async def get_current_online_count(db: Session) -> int:
-    """获取当前在线人数"""
-    now = datetime.utcnow()
-    count = db.query(SessionModel).filter(
-        SessionModel.expires_at > now
-    ).count()
-    return count
+async def get_current_online_count() -> int:
+    """获取当前在线人数（内存计数，定期与会话存储校准，见 online_tracker.py）"""
+    return online.current
 
 
-async def create_session(db: Session, user_id: int, token: str, ip: str = None, user_agent: str = None) -> bool:
+async def create_session(user_id: int, token: str, ip: str = None, user_agent: str = None) -> bool:
     """创建Session"""
-    expires_at = datetime.utcnow() + timedelta(seconds=settings.SESSION_EXPIRE_SECONDS)
-
-    session = SessionModel(
-        user_id=user_id,
-        token=token,
-        ip_address=ip or "",
-        user_agent=user_agent or "",
-        expires_at=expires_at
-    )
-    db.add(session)
-    db.commit()
+    await get_session_store().create(user_id, token, ip or "", user_agent or "")
+    heartbeats.note_created(user_id)
+    online.on_login()
     return True
 
 
-async def delete_session(db: Session, user_id: int) -> bool:
+async def delete_session(user_id: int) -> bool:
     """删除Session（根据 user_id）"""
-    db.query(SessionModel).filter(
-        SessionModel.user_id == user_id
-    ).delete()
-    db.commit()
+    deleted = await get_session_store().delete(user_id)
+    heartbeats.forget(user_id)
+    online.on_logout(deleted)
     return True
 
 
-async def delete_session_by_token(db: Session, token: str) -> bool:
+async def delete_session_by_token(token: str) -> bool:
     """删除Session（根据 token）"""
-    db.query(SessionModel).filter(
-        SessionModel.token == token
-    ).delete()
-    db.commit()
+    online.on_logout(await get_session_store().delete_by_token(token))
     return True
 
 
-async def refresh_session(db: Session, user_id: int) -> bool:
-    """刷新Session过期时间"""
-    expires_at = datetime.utcnow() + timedelta(seconds=settings.SESSION_EXPIRE_SECONDS)
-    db.query(SessionModel).filter(
-        SessionModel.user_id == user_id
-    ).update({"expires_at": expires_at})
-    db.commit()
+async def refresh_session(user_id: int) -> bool:
+    """刷新Session过期时间（由 heartbeat.py 合并后批量写入）"""
+    heartbeats.record(user_id)
+    online.on_heartbeat()
     return True
 
 
-async def check_can_login(db: Session, user_id: int) -> bool:
+async def check_can_login(user_id: int) -> bool:
     """检查是否可以登录（并发控制）"""
     # 去掉并发控制，始终允许登录
     return True
 
 
-async def get_session(db: Session, user_id: int) -> dict | None:
+async def get_session(user_id: int) -> dict | None:
     """获取Session"""
-    now = datetime.utcnow()
-    session = db.query(SessionModel).filter(
-        and_(
-            SessionModel.user_id == user_id,
-            SessionModel.expires_at > now
-        )
-    ).first()
-
-    if session:
-        return {
-            "token": session.token,
-            "user_id": session.user_id,
-            "ip": session.ip_address,
-            "user_agent": session.user_agent,
-            "expires_at": int(session.expires_at.timestamp())
-        }
-    return None
+    return await get_session_store().get(user_id)
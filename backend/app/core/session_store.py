@@ -0,0 +1,440 @@
+"""
+会话存储
+
+登录、心跳、登出都要修改会话，原先每次都写 sessions 表并顺带执行一次
+过期清理的 DELETE，在线用户多时成为写入瓶颈。会话只用于在线人数统计
+（鉴权由 JWT 完成），不要求持久化，因此由 SESSION_STORE 选择存储方式：
+
+- memory：进程内 dict + 过期时间小顶堆（默认，单 worker 部署）
+- socket：多个 worker 通过 Unix socket 共享同一个会话服务进程，
+  服务进程内部使用 memory 存储，需单独启动：
+
+    python -m app.core.session_store serve
+
+- sql：原 sessions 表，需要会话在重启后保留时使用
+
+session_crud 中的函数委托给 get_session_store() 返回的实例。
+"""
+
+import asyncio
+import heapq
+import json
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, select, update
+
+from app.core.config import settings
+from app.db.async_base import AsyncSessionLocal
+from app.models.models import Session as SessionModel
+
+# refresh_many 每条 UPDATE 语句包含的用户数
+REFRESH_BATCH_SIZE = 500
+
+
+class SessionStoreError(Exception):
+    """会话服务返回错误或无法连接"""
+
+
+@dataclass
+class SessionRecord:
+    token: str
+    user_id: int
+    ip: str
+    user_agent: str
+    expires_at: float  # Unix 时间戳
+
+
+class SessionStore(ABC):
+    """会话存储接口，同一用户可以有多个会话（多端登录）"""
+
+    @abstractmethod
+    async def create(self, user_id: int, token: str, ip: str = "", user_agent: str = "") -> None:
+        """创建会话，有效期 SESSION_EXPIRE_SECONDS"""
+
+    @abstractmethod
+    async def get(self, user_id: int) -> Optional[dict]:
+        """获取用户的一个未过期会话"""
+
+    @abstractmethod
+    async def refresh(self, user_id: int) -> bool:
+        """延长用户所有会话的有效期，没有会话时返回 False"""
+
+    @abstractmethod
+    async def refresh_many(self, user_ids: List[int]) -> int:
+        """批量延长多个用户的会话有效期，返回刷新的会话数"""
+
+    @abstractmethod
+    async def delete(self, user_id: int) -> int:
+        """删除用户的所有会话，返回删除数量"""
+
+    @abstractmethod
+    async def delete_by_token(self, token: str) -> int:
+        """删除指定会话，返回删除数量"""
+
+    @abstractmethod
+    async def count_online(self) -> int:
+        """未过期的会话数"""
+
+    @abstractmethod
+    async def sweep(self, limit: int) -> int:
+        """最多删除 limit 个已过期的会话，返回删除数量"""
+
+
+def _session_dict(record: SessionRecord) -> dict:
+    return {
+        "token": record.token,
+        "user_id": record.user_id,
+        "ip": record.ip,
+        "user_agent": record.user_agent,
+        "expires_at": int(record.expires_at),
+    }
+
+
+class MemorySessionStore(SessionStore):
+    """
+    进程内会话存储
+
+    过期时间保存在小顶堆中：刷新会话时压入新条目，旧条目留在堆中，
+    弹出时与会话当前的过期时间比较，不一致即为旧条目，直接丢弃。
+    堆中的旧条目超过会话数时整体重建，内存占用与会话数成正比。
+
+    过期会话只由 sweep() 删除（后台清理任务经 cleanup_expired_sessions 调用，
+    删除数量计入在线人数），其他操作不会顺带删除，否则在线人数计数器无法得知。
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, SessionRecord] = {}
+        self._by_user: Dict[int, Set[str]] = {}
+        self._expiry: List[Tuple[float, str]] = []
+
+    def _push(self, record: SessionRecord) -> None:
+        heapq.heappush(self._expiry, (record.expires_at, record.token))
+        if len(self._expiry) > 2 * len(self._sessions) + 1024:
+            self._expiry = [(record.expires_at, token) for token, record in self._sessions.items()]
+            heapq.heapify(self._expiry)
+
+    def _remove(self, token: str) -> bool:
+        record = self._sessions.pop(token, None)
+        if record is None:
+            return False
+        tokens = self._by_user.get(record.user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[record.user_id]
+        return True
+
+    def _sweep(self, now: float, limit: Optional[int]) -> int:
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now and (limit is None or removed < limit):
+            expires_at, token = heapq.heappop(self._expiry)
+            record = self._sessions.get(token)
+            if record is not None and record.expires_at == expires_at:
+                self._remove(token)
+                removed += 1
+        return removed
+
+    async def create(self, user_id: int, token: str, ip: str = "", user_agent: str = "") -> None:
+        now = time.time()
+        self._remove(token)
+        record = SessionRecord(token, user_id, ip or "", user_agent or "", now + settings.SESSION_EXPIRE_SECONDS)
+        self._sessions[token] = record
+        self._by_user.setdefault(user_id, set()).add(token)
+        self._push(record)
+
+    async def get(self, user_id: int) -> Optional[dict]:
+        now = time.time()
+        for token in self._by_user.get(user_id, ()):
+            record = self._sessions[token]
+            if record.expires_at > now:
+                return _session_dict(record)
+        return None
+
+    async def refresh(self, user_id: int) -> bool:
+        now = time.time()
+        tokens = self._by_user.get(user_id)
+        if not tokens:
+            return False
+        expires_at = now + settings.SESSION_EXPIRE_SECONDS
+        for token in tokens:
+            record = self._sessions[token]
+            record.expires_at = expires_at
+            self._push(record)
+        return True
+
+    async def refresh_many(self, user_ids: List[int]) -> int:
+        refreshed = 0
+        for user_id in user_ids:
+            if await self.refresh(user_id):
+                refreshed += len(self._by_user[user_id])
+        return refreshed
+
+    async def delete(self, user_id: int) -> int:
+        tokens = list(self._by_user.get(user_id, ()))
+        for token in tokens:
+            self._remove(token)
+        return len(tokens)
+
+    async def delete_by_token(self, token: str) -> int:
+        return int(self._remove(token))
+
+    async def count_online(self) -> int:
+        now = time.time()
+        return sum(1 for record in self._sessions.values() if record.expires_at > now)
+
+    async def sweep(self, limit: int) -> int:
+        return self._sweep(time.time(), limit)
+
+
+class SqlSessionStore(SessionStore):
+    """sessions 表（可在重启后保留会话）"""
+
+    async def create(self, user_id: int, token: str, ip: str = "", user_agent: str = "") -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.SESSION_EXPIRE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            db.add(SessionModel(
+                user_id=user_id,
+                token=token,
+                ip_address=ip or "",
+                user_agent=user_agent or "",
+                expires_at=expires_at
+            ))
+            await db.commit()
+
+    async def get(self, user_id: int) -> Optional[dict]:
+        async with AsyncSessionLocal() as db:
+            session = await db.scalar(
+                select(SessionModel).where(
+                    SessionModel.user_id == user_id,
+                    SessionModel.expires_at > datetime.utcnow()
+                ).limit(1)
+            )
+        if session is None:
+            return None
+        return {
+            "token": session.token,
+            "user_id": session.user_id,
+            "ip": session.ip_address,
+            "user_agent": session.user_agent,
+            "expires_at": int(session.expires_at.timestamp())
+        }
+
+    async def refresh(self, user_id: int) -> bool:
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.SESSION_EXPIRE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(SessionModel)
+                .where(SessionModel.user_id == user_id)
+                .values(expires_at=expires_at)
+            )
+            await db.commit()
+        return result.rowcount > 0
+
+    async def refresh_many(self, user_ids: List[int]) -> int:
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.SESSION_EXPIRE_SECONDS)
+        refreshed = 0
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(user_ids), REFRESH_BATCH_SIZE):
+                result = await db.execute(
+                    update(SessionModel)
+                    .where(SessionModel.user_id.in_(user_ids[start:start + REFRESH_BATCH_SIZE]))
+                    .values(expires_at=expires_at)
+                )
+                refreshed += result.rowcount
+            await db.commit()
+        return refreshed
+
+    async def delete(self, user_id: int) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(SessionModel).where(SessionModel.user_id == user_id))
+            await db.commit()
+        return result.rowcount
+
+    async def delete_by_token(self, token: str) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(SessionModel).where(SessionModel.token == token))
+            await db.commit()
+        return result.rowcount
+
+    async def count_online(self) -> int:
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(
+                select(func.count()).select_from(SessionModel).where(SessionModel.expires_at > datetime.utcnow())
+            )
+
+    async def sweep(self, limit: int) -> int:
+        expired = (
+            select(SessionModel.id)
+            .where(SessionModel.expires_at <= datetime.utcnow())
+            .limit(limit)
+            .scalar_subquery()
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(SessionModel).where(SessionModel.id.in_(expired)))
+            await db.commit()
+        return result.rowcount
+
+
+# ==================== Unix socket 共享存储 ====================
+#
+# 协议：每行一个 JSON 请求 {"op": 方法名, "args": [...]}，
+# 服务端返回一行 {"result": ...} 或 {"error": "..."}。
+
+SOCKET_OPS = {"create", "get", "refresh", "refresh_many", "delete", "delete_by_token", "count_online", "sweep"}
+
+
+class SocketSessionStore(SessionStore):
+    """连接到会话服务进程的客户端，空闲连接复用"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._idle: List[Tuple[asyncio.AbstractEventLoop, asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    def _take_idle(self, loop):
+        while self._idle:
+            conn_loop, reader, writer = self._idle.pop()
+            if conn_loop is loop and not writer.is_closing():
+                return reader, writer
+            if not conn_loop.is_closed():
+                writer.close()
+        return None
+
+    async def _request(self, reader, writer, payload: bytes) -> bytes:
+        writer.write(payload)
+        await writer.drain()
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError("会话服务关闭了连接")
+        return line
+
+    async def _call(self, op: str, *args):
+        loop = asyncio.get_running_loop()
+        payload = json.dumps({"op": op, "args": args}).encode() + b"\n"
+
+        conn = self._take_idle(loop)
+        line = None
+        if conn is not None:
+            try:
+                line = await self._request(*conn, payload)
+            except (ConnectionError, OSError):
+                # 复用的连接已失效（例如会话服务重启），换新连接重试一次
+                conn[1].close()
+                conn = None
+        if conn is None:
+            try:
+                conn = await asyncio.open_unix_connection(self.path)
+                line = await self._request(*conn, payload)
+            except (ConnectionError, OSError) as e:
+                if conn is not None:
+                    conn[1].close()
+                raise SessionStoreError(f"无法连接会话服务 {self.path}: {e}") from e
+
+        self._idle.append((loop, *conn))
+        response = json.loads(line)
+        if "error" in response:
+            raise SessionStoreError(response["error"])
+        return response["result"]
+
+    async def create(self, user_id: int, token: str, ip: str = "", user_agent: str = "") -> None:
+        await self._call("create", user_id, token, ip or "", user_agent or "")
+
+    async def get(self, user_id: int) -> Optional[dict]:
+        return await self._call("get", user_id)
+
+    async def refresh(self, user_id: int) -> bool:
+        return await self._call("refresh", user_id)
+
+    async def refresh_many(self, user_ids: List[int]) -> int:
+        return await self._call("refresh_many", list(user_ids))
+
+    async def delete(self, user_id: int) -> int:
+        return await self._call("delete", user_id)
+
+    async def delete_by_token(self, token: str) -> int:
+        return await self._call("delete_by_token", token)
+
+    async def count_online(self) -> int:
+        return await self._call("count_online")
+
+    async def sweep(self, limit: int) -> int:
+        return await self._call("sweep", limit)
+
+
+async def _handle_client(store: SessionStore, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                op = request["op"]
+                if op not in SOCKET_OPS:
+                    raise ValueError(f"未知操作: {op}")
+                response = {"result": await getattr(store, op)(*request.get("args", []))}
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_session_server(path: str, store: Optional[SessionStore] = None) -> asyncio.AbstractServer:
+    """在 path 上启动会话服务（会删除残留的 socket 文件）"""
+    store = store or MemorySessionStore()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(lambda r, w: _handle_client(store, r, w), path=path)
+    os.chmod(path, 0o660)
+    return server
+
+
+async def serve(path: str) -> None:
+    server = await start_session_server(path)
+    print(f"✅ 会话服务已启动：{path}")
+    async with server:
+        await server.serve_forever()
+
+
+# ==================== 当前实现 ====================
+
+_store: Optional[SessionStore] = None
+
+
+def create_session_store(kind: str) -> SessionStore:
+    if kind == "memory":
+        return MemorySessionStore()
+    if kind == "socket":
+        return SocketSessionStore(settings.SESSION_STORE_SOCKET)
+    if kind == "sql":
+        return SqlSessionStore()
+    raise ValueError(f"未知的 SESSION_STORE: {kind}（可选 memory / socket / sql）")
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    if _store is None:
+        _store = create_session_store(settings.SESSION_STORE)
+    return _store
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "serve":
+        print("用法: python -m app.core.session_store serve [socket路径]")
+        sys.exit(1)
+    socket_path = sys.argv[2] if len(sys.argv) > 2 else settings.SESSION_STORE_SOCKET
+    try:
+        asyncio.run(serve(socket_path))
+    except KeyboardInterrupt:
+        pass
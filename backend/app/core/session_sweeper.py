@@ -0,0 +1,86 @@
+"""
+过期会话的后台清理
+
+登录和心跳不再同步清理过期会话，改为启动时开启的后台任务：每隔
+SESSION_SWEEP_INTERVAL_SECONDS 按批删除（每批 SESSION_SWEEP_BATCH_SIZE 条），
+批次之间让出事件循环，单轮最多 SESSION_SWEEP_MAX_BATCHES 批，
+剩余的留到下一轮，避免一次长时间占用数据库写锁。
+
+每轮删除的数量和耗时记录在 sweeper_stats() 中，由 /api/system/status 返回。
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.core.session_crud import cleanup_expired_sessions
+
+_task: Optional[asyncio.Task] = None
+_stats = {
+    "runs": 0,
+    "errors": 0,
+    "total_removed": 0,
+    "last_run_at": None,
+    "last_removed": 0,
+    "last_batches": 0,
+    "last_duration_ms": 0.0,
+}
+
+
+async def sweep_once() -> int:
+    """执行一轮清理，返回删除的会话数"""
+    batch_size = settings.SESSION_SWEEP_BATCH_SIZE
+    start = time.perf_counter()
+    removed, batches = 0, 0
+    while batches < settings.SESSION_SWEEP_MAX_BATCHES:
+        deleted = await cleanup_expired_sessions(batch_size)
+        removed += deleted
+        batches += 1
+        if deleted < batch_size:
+            break
+        await asyncio.sleep(0)
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    _stats["runs"] += 1
+    _stats["total_removed"] += removed
+    _stats["last_run_at"] = datetime.utcnow().isoformat()
+    _stats["last_removed"] = removed
+    _stats["last_batches"] = batches
+    _stats["last_duration_ms"] = round(duration_ms, 2)
+    if removed:
+        print(f"🧹 已清理 {removed} 个过期会话（{batches} 批，耗时 {duration_ms:.1f}ms）")
+    return removed
+
+
+async def _run() -> None:
+    while True:
+        await asyncio.sleep(settings.SESSION_SWEEP_INTERVAL_SECONDS)
+        try:
+            await sweep_once()
+        except Exception as e:
+            _stats["errors"] += 1
+            print(f"⚠️  过期会话清理失败：{e}")
+
+
+def start_session_sweeper() -> None:
+    """在当前事件循环中启动后台清理任务（应用启动时调用）"""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_run())
+
+
+async def stop_session_sweeper() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def sweeper_stats() -> dict:
+    return dict(_stats, running=_task is not None and not _task.done())
@@ -0,0 +1,237 @@
+"""
+存储用量统计
+
+系统状态中的存储用量直接取自 albums.total_bytes 的合计：每个专辑的字节数
+在剧集上传、删除时按 Episode.file_size 同步维护（见 album_stats.py），
+不再在每次请求时遍历媒体目录。
+
+磁盘上的实际情况可能与记录不一致（手工删改文件、上传中断遗留的文件），
+rescan_storage 用 os.scandir 逐个专辑目录扫描并与数据库比较：
+
+- 剧集记录的 file_size 与实际文件大小不符（fix=True 时修正）
+- 专辑的 total_bytes 与剧集 file_size 合计不符（drifted_albums，fix=True 时重新计算专辑汇总）
+- 记录存在但文件缺失
+- 磁盘上的字节数与剧集记录不符（disk_mismatched_albums，含缺失文件造成的差异，只报告）
+- 目录中未被任何剧集引用的文件（孤儿文件，只统计，不删除）
+- 媒体目录下已不存在的专辑目录
+
+目录遍历和孤儿判定规则与 media_reconcile 共用（孤儿文件由 media_reconcile 清理）。
+
+扫描速度限制在 STORAGE_RESCAN_FILES_PER_SECOND 以内，避免挤占线上请求的磁盘 IO。
+可作为后台任务定期执行（STORAGE_RESCAN_INTERVAL_SECONDS > 0），或手动执行：
+
+    python -m app.core.storage_accounting [--fix]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+import anyio
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.album_stats import refresh_album_stats
+from app.core.catalog_cache import bump_catalog_version
+from app.core.config import settings
+from app.core.ingest import album_media_dir
+from app.core.media_reconcile import deleted_album_dirs, iter_media_files
+from app.models.models import Album, Episode
+
+# 报告中最多列出的不一致专辑数
+REPORT_LIMIT = 100
+
+_last_report: Optional[dict] = None
+_task: Optional[asyncio.Task] = None
+
+
+async def storage_totals(db) -> dict:
+    """专辑数、剧集数和音频文件总字节数（一次查询 albums 表）"""
+    albums, episodes, total_bytes = (await db.execute(
+        select(
+            func.count(Album.id),
+            func.coalesce(func.sum(Album.episode_count), 0),
+            func.coalesce(func.sum(Album.total_bytes), 0),
+        )
+    )).one()
+    return {"albums": albums, "episodes": episodes, "bytes": total_bytes}
+
+
+class _Throttle:
+    """把处理速度限制在每秒 rate 个条目以内"""
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.count = 0
+        self.start = time.monotonic()
+
+    def tick(self) -> None:
+        self.count += 1
+        if self.rate > 0 and self.count % 256 == 0:
+            ahead = self.count / self.rate - (time.monotonic() - self.start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+def _scan_files(directory: str, throttle: _Throttle) -> Iterator[Tuple[str, int]]:
+    """列出目录中的文件（绝对路径）及大小"""
+    for entry in iter_media_files(directory):
+        throttle.tick()
+        try:
+            yield entry.path, entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            continue
+
+
+def rescan_storage(db: Session, fix: bool = False) -> dict:
+    """扫描媒体目录并与数据库比较，返回报告；fix=True 时修正文件大小与专辑汇总（会提交事务）"""
+    started = time.perf_counter()
+    throttle = _Throttle(settings.STORAGE_RESCAN_FILES_PER_SECOND)
+    report = {
+        "started_at": datetime.utcnow().isoformat(),
+        "fixed": fix,
+        "albums": 0,
+        "files": 0,
+        "disk_bytes": 0,
+        "recorded_bytes": 0,
+        "size_mismatches": 0,
+        "missing_files": 0,
+        "orphan_files": 0,
+        "orphan_bytes": 0,
+        "orphan_album_dirs": [],
+        "drifted_albums": [],
+        "disk_mismatched_albums": [],
+    }
+
+    albums = db.execute(select(Album.id, Album.total_bytes).order_by(Album.id)).all()
+    for album_id, recorded_bytes in albums:
+        report["albums"] += 1
+        report["recorded_bytes"] += recorded_bytes or 0
+
+        # 每次只在内存中保存一个专辑目录的文件列表
+        on_disk: Dict[str, int] = dict(_scan_files(album_media_dir(album_id), throttle))
+        episodes = db.execute(
+            select(Episode.id, Episode.file_path, Episode.file_size).where(Episode.album_id == album_id)
+        ).all()
+
+        # 与 refresh_album_stats 相同，按全部剧集的 file_size 合计
+        episode_bytes = sum(file_size or 0 for _, _, file_size in episodes)
+        actual_bytes, missing, corrections = 0, 0, []
+        for episode_id, file_path, file_size in episodes:
+            if not file_path:
+                continue
+            size = on_disk.pop(os.path.abspath(file_path), None)
+            if size is None:
+                missing += 1
+                continue
+            report["files"] += 1
+            actual_bytes += size
+            if size != (file_size or 0):
+                report["size_mismatches"] += 1
+                corrections.append({"id": episode_id, "file_size": size})
+
+        report["missing_files"] += missing
+        report["disk_bytes"] += actual_bytes
+        report["orphan_files"] += len(on_disk)
+        report["orphan_bytes"] += sum(on_disk.values())
+
+        drifted = episode_bytes != (recorded_bytes or 0)
+        if drifted and len(report["drifted_albums"]) < REPORT_LIMIT:
+            report["drifted_albums"].append({
+                "album_id": album_id,
+                "recorded_bytes": recorded_bytes or 0,
+                "episode_bytes": episode_bytes,
+            })
+        if actual_bytes != episode_bytes and len(report["disk_mismatched_albums"]) < REPORT_LIMIT:
+            report["disk_mismatched_albums"].append({
+                "album_id": album_id,
+                "episode_bytes": episode_bytes,
+                "disk_bytes": actual_bytes,
+                "missing_files": missing,
+            })
+        if fix and (corrections or drifted):
+            if corrections:
+                db.execute(update(Episode), corrections)
+            refresh_album_stats(db, [album_id])
+            db.commit()
+            bump_catalog_version()
+
+    # 媒体目录下没有对应专辑的目录（专辑已删除，文件未清理）
+    for directory, name in deleted_album_dirs(str(album_id) for album_id, _ in albums):
+        files = list(_scan_files(directory, throttle))
+        report["orphan_files"] += len(files)
+        report["orphan_bytes"] += sum(size for _, size in files)
+        report["orphan_album_dirs"].append(name)
+
+    report["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return report
+
+
+async def run_rescan(fix: bool = False) -> dict:
+    """在线程中执行扫描（不阻塞事件循环），记录最近一次报告"""
+    global _last_report
+    from app.db.base import SessionLocal
+
+    def _rescan() -> dict:
+        db = SessionLocal()
+        try:
+            return rescan_storage(db, fix=fix)
+        finally:
+            db.close()
+
+    report = await anyio.to_thread.run_sync(_rescan)
+    _last_report = report
+    print(
+        f"📊 存储扫描完成：{report['files']} 个文件，{report['size_mismatches']} 个大小不符，"
+        f"{report['missing_files']} 个缺失，{report['orphan_files']} 个孤儿文件，耗时 {report['duration_ms']:.0f}ms"
+    )
+    return report
+
+
+def last_rescan_report() -> Optional[dict]:
+    return _last_report
+
+
+async def _run() -> None:
+    while True:
+        await asyncio.sleep(settings.STORAGE_RESCAN_INTERVAL_SECONDS)
+        try:
+            await run_rescan(fix=settings.STORAGE_RESCAN_FIX)
+        except Exception as e:
+            print(f"⚠️  存储扫描失败：{e}")
+
+
+def start_storage_rescan() -> None:
+    """STORAGE_RESCAN_INTERVAL_SECONDS > 0 时启动定期扫描（应用启动时调用）"""
+    global _task
+    if settings.STORAGE_RESCAN_INTERVAL_SECONDS <= 0:
+        return
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_run())
+
+
+async def stop_storage_rescan() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+if __name__ == "__main__":
+    import json
+
+    from app.db.base import SessionLocal
+
+    session = SessionLocal()
+    try:
+        result = rescan_storage(session, fix="--fix" in sys.argv[1:])
+    finally:
+        session.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -0,0 +1,182 @@
+"""
+音频流式响应
+
+按固定大小的块发送文件的指定字节区间，单个请求占用的内存与区间大小无关：
+- ASGI 服务器支持 ``http.response.zerocopysend`` 扩展时，交给服务器用 sendfile 零拷贝发送
+- 否则在线程池中分块读取文件，不阻塞事件循环
+"""
+
+import os
+import uuid
+from typing import List, Mapping, Optional, Tuple
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class _FileRangeSender:
+    """文件区间发送逻辑，供单区间与多区间响应共用"""
+
+    path: str
+    chunk_size: int
+
+    async def _send_range(
+        self,
+        scope: Scope,
+        send: Send,
+        start: int,
+        end: int,
+        more_body: bool,
+    ) -> None:
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            await self._send_zerocopy(send, start, end, more_body)
+        else:
+            await self._send_chunked(send, start, end, more_body)
+
+    async def _send_zerocopy(self, send: Send, start: int, end: int, more_body: bool) -> None:
+        """由服务器调用 os.sendfile 直接从文件描述符发送"""
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            await send({
+                "type": ZEROCOPY_EXTENSION,
+                "file": file,
+                "offset": start,
+                "count": end - start + 1,
+                "more_body": more_body,
+            })
+        finally:
+            await anyio.to_thread.run_sync(file.close)
+
+    async def _send_chunked(self, send: Send, start: int, end: int, more_body: bool) -> None:
+        """在线程池中分块读取，每次只持有一个块"""
+        remaining = end - start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(start, os.SEEK_SET)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    # 文件在发送过程中被截断
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": more_body or remaining > 0,
+                })
+
+        if remaining > 0 and not more_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class RangeFileResponse(_FileRangeSender, Response):
+    """发送文件 [start, end] 区间（闭区间）的流式响应"""
+
+    def __init__(
+        self,
+        path: str,
+        start: int,
+        end: int,
+        status_code: int = 206,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+    ) -> None:
+        self.path = path
+        self.start = start
+        self.end = end
+        self.status_code = status_code
+        self.media_type = media_type
+        self.chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+        self.background = None
+        self.init_headers(headers)
+        self.headers.setdefault("content-length", str(self.content_length))
+
+    @property
+    def content_length(self) -> int:
+        return max(self.end - self.start + 1, 0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if scope.get("method") == "HEAD" or self.content_length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        await self._send_range(scope, send, self.start, self.end, more_body=False)
+
+
+class MultipartRangeFileResponse(_FileRangeSender, Response):
+    """多区间请求的 multipart/byteranges 响应（RFC 9110 §14.6）"""
+
+    def __init__(
+        self,
+        path: str,
+        ranges: List[Tuple[int, int]],
+        file_size: int,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+    ) -> None:
+        self.path = path
+        self.ranges = ranges
+        self.file_size = file_size
+        self.part_media_type = media_type or "application/octet-stream"
+        self.boundary = uuid.uuid4().hex
+        self.status_code = 206
+        self.media_type = f"multipart/byteranges; boundary={self.boundary}"
+        self.chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+        self.background = None
+        self.init_headers(headers)
+        self.headers.setdefault("content-length", str(self.content_length))
+
+    def _part_header(self, start: int, end: int) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f"Content-Type: {self.part_media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{self.file_size}\r\n"
+            "\r\n"
+        ).encode("latin-1")
+
+    @property
+    def _closing(self) -> bytes:
+        return f"\r\n--{self.boundary}--\r\n".encode("latin-1")
+
+    @property
+    def content_length(self) -> int:
+        length = len(self._closing)
+        for index, (start, end) in enumerate(self.ranges):
+            if index:
+                length += 2  # 上一段数据后的 CRLF
+            length += len(self._part_header(start, end)) + end - start + 1
+        return length
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if scope.get("method") == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        for index, (start, end) in enumerate(self.ranges):
+            prefix = b"\r\n" if index else b""
+            await send({
+                "type": "http.response.body",
+                "body": prefix + self._part_header(start, end),
+                "more_body": True,
+            })
+            await self._send_range(scope, send, start, end, more_body=True)
+
+        await send({"type": "http.response.body", "body": self._closing, "more_body": False})
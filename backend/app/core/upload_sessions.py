@@ -0,0 +1,282 @@
+"""
+可续传的分块上传
+
+每个上传会话在暂存目录中对应两个文件：
+- <upload_id>.data：按文件总大小预分配的数据文件，分块按偏移写入（可并行上传）
+- <upload_id>.json：会话信息与已接收的字节区间
+
+区间记录的读写通过 flock 加锁，多个 worker 同时接收同一会话的分块也不会丢失进度。
+写入分块时对数据文件持有共享锁（多个分块可并行写入），完成上传时需要取得排他锁，
+因此不会把仍在写入的数据文件移动到专辑目录。
+会话只依赖磁盘上的文件，服务重启后可以继续上传。
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Tuple
+
+import anyio
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.ingest import StoredFile, UploadRejected, album_media_dir
+from app.core.ranges import coalesce_ranges
+
+
+class UploadSessionNotFound(Exception):
+    """上传会话不存在或已过期"""
+
+
+def staging_dir() -> str:
+    return settings.UPLOAD_STAGING_DIR or os.path.join(settings.MEDIA_DIR, ".staging")
+
+
+def _valid_upload_id(upload_id: str) -> bool:
+    # upload_id 由服务端生成，只允许十六进制字符，防止路径穿越
+    return bool(upload_id) and all(c in "0123456789abcdef" for c in upload_id)
+
+
+def _paths(upload_id: str) -> Tuple[str, str]:
+    if not _valid_upload_id(upload_id):
+        raise UploadSessionNotFound(upload_id)
+    base = os.path.join(staging_dir(), upload_id)
+    return base + ".data", base + ".json"
+
+
+def _read_meta(meta_file) -> dict:
+    meta_file.seek(0)
+    return json.load(meta_file)
+
+
+def _write_meta(meta_file, meta: dict) -> None:
+    meta_file.seek(0)
+    meta_file.truncate()
+    json.dump(meta, meta_file)
+    meta_file.flush()
+
+
+def _open_meta(upload_id: str):
+    _, meta_path = _paths(upload_id)
+    try:
+        meta_file = open(meta_path, "r+")
+    except FileNotFoundError:
+        raise UploadSessionNotFound(upload_id)
+    fcntl.flock(meta_file, fcntl.LOCK_EX)
+    return meta_file
+
+
+def _remove_files(paths) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _session_status(meta: dict) -> dict:
+    received = sum(end - start for start, end in meta["received"])
+    # 从头开始连续接收到的位置，顺序上传的客户端从这里继续
+    next_offset = 0
+    if meta["received"] and meta["received"][0][0] == 0:
+        next_offset = meta["received"][0][1]
+    return {
+        "upload_id": meta["upload_id"],
+        "album_id": meta["album_id"],
+        "episode_id": meta.get("episode_id"),
+        "filename": meta["filename"],
+        "total_size": meta["total_size"],
+        "received_bytes": received,
+        "next_offset": next_offset,
+        "ranges": meta["received"],
+        "complete": received == meta["total_size"],
+    }
+
+
+def cleanup_stale_sessions() -> int:
+    """删除超过 UPLOAD_SESSION_TTL_SECONDS 未更新的会话，返回删除数量"""
+    directory = staging_dir()
+    if not os.path.isdir(directory):
+        return 0
+    deadline = time.time() - settings.UPLOAD_SESSION_TTL_SECONDS
+    removed = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            upload_id = entry.name[:-len(".json")]
+            # 暂存目录中的其他文件不处理；并发清理时文件可能已被删除
+            if not entry.name.endswith(".json") or not _valid_upload_id(upload_id):
+                continue
+            try:
+                stale = entry.stat().st_mtime < deadline
+            except FileNotFoundError:
+                continue
+            if stale:
+                _remove_files(_paths(upload_id))
+                removed += 1
+    return removed
+
+
+def create_session(album_id: int, filename: str, total_size: int, episode_id: Optional[int] = None) -> dict:
+    """创建上传会话并预分配数据文件"""
+    if total_size <= 0:
+        raise UploadRejected(f"文件为空: {filename}")
+    if total_size > settings.UPLOAD_MAX_FILE_SIZE:
+        limit_mb = settings.UPLOAD_MAX_FILE_SIZE // 1024 // 1024
+        raise UploadRejected(f"文件大小超过限制（最大{limit_mb}MB）: {filename}")
+
+    cleanup_stale_sessions()
+    os.makedirs(staging_dir(), exist_ok=True)
+
+    upload_id = uuid.uuid4().hex
+    data_path, meta_path = _paths(upload_id)
+    with open(data_path, "wb") as f:
+        f.truncate(total_size)
+
+    meta = {
+        "upload_id": upload_id,
+        "album_id": album_id,
+        "episode_id": episode_id,
+        "filename": filename,
+        "total_size": total_size,
+        "created_at": time.time(),
+        "received": [],
+    }
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return _session_status(meta)
+
+
+def get_session(upload_id: str) -> dict:
+    meta_file = _open_meta(upload_id)
+    try:
+        return _session_status(_read_meta(meta_file))
+    finally:
+        meta_file.close()
+
+
+def _record_chunk(upload_id: str, start: int, end: int) -> dict:
+    """把 [start, end) 合并进已接收区间"""
+    meta_file = _open_meta(upload_id)
+    try:
+        meta = _read_meta(meta_file)
+        # coalesce_ranges 使用闭区间
+        ranges = [(s, e - 1) for s, e in meta["received"]] + [(start, end - 1)]
+        meta["received"] = [[s, e + 1] for s, e in coalesce_ranges(ranges)]
+        _write_meta(meta_file, meta)
+        return _session_status(meta)
+    finally:
+        meta_file.close()
+
+
+def _open_data(upload_id: str) -> int:
+    """打开数据文件并持有共享锁；会话已完成或已放弃时抛出 UploadSessionNotFound"""
+    data_path, _ = _paths(upload_id)
+    try:
+        fd = os.open(data_path, os.O_WRONLY)
+    except FileNotFoundError:
+        raise UploadSessionNotFound(upload_id)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        # 等待锁期间数据文件可能已被移动到专辑目录
+        if os.fstat(fd).st_ino != os.stat(data_path).st_ino:
+            raise UploadSessionNotFound(upload_id)
+    except FileNotFoundError:
+        os.close(fd)
+        raise UploadSessionNotFound(upload_id)
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+async def write_chunk(upload_id: str, offset: int, request: Request) -> dict:
+    """
+    把请求体按偏移写入数据文件，边接收边写，不整体缓存分块
+
+    从打开数据文件到记录区间一直持有数据文件的共享锁。
+    """
+    status = await anyio.to_thread.run_sync(get_session, upload_id)
+    total_size = status["total_size"]
+    if offset < 0 or offset > total_size:
+        raise UploadRejected(f"偏移超出文件范围: {offset}")
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and offset + int(content_length) > total_size:
+        raise UploadRejected("分块超出文件总大小")
+
+    fd = await anyio.to_thread.run_sync(_open_data, upload_id)
+    position = offset
+    try:
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            if position + len(chunk) > total_size:
+                raise UploadRejected("分块超出文件总大小")
+            await anyio.to_thread.run_sync(os.pwrite, fd, chunk, position)
+            position += len(chunk)
+
+        if position == offset:
+            return status
+        return await anyio.to_thread.run_sync(_record_chunk, upload_id, offset, position)
+    finally:
+        # 关闭文件同时释放共享锁
+        await anyio.to_thread.run_sync(os.close, fd)
+
+
+def complete_session(upload_id: str) -> Tuple[dict, StoredFile]:
+    """
+    校验全部字节已接收，把数据文件移动到专辑目录并删除会话
+
+    未接收完整或仍有分块正在写入时抛出 UploadRejected。
+    加锁顺序与 write_chunk 相同：先数据文件，后会话信息。
+    """
+    data_path, meta_path = _paths(upload_id)
+    try:
+        data_fd = os.open(data_path, os.O_RDONLY)
+    except FileNotFoundError:
+        raise UploadSessionNotFound(upload_id)
+    try:
+        try:
+            fcntl.flock(data_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadRejected("仍有分块正在写入，请稍后重试")
+        return _complete_locked(upload_id, data_path, meta_path)
+    finally:
+        os.close(data_fd)
+
+
+def _complete_locked(upload_id: str, data_path: str, meta_path: str) -> Tuple[dict, StoredFile]:
+    meta_file = _open_meta(upload_id)
+    try:
+        meta = _read_meta(meta_file)
+        status = _session_status(meta)
+        if not status["complete"]:
+            raise UploadRejected(
+                f"文件尚未上传完整: {status['received_bytes']}/{status['total_size']}"
+            )
+
+        file_ext = Path(meta["filename"]).suffix or ".mp3"
+        file_dir = album_media_dir(meta["album_id"])
+        os.makedirs(file_dir, exist_ok=True)
+        file_path = os.path.join(file_dir, f"{uuid.uuid4()}{file_ext}")
+        try:
+            os.replace(data_path, file_path)
+        except OSError:
+            # 暂存目录与媒体目录不在同一文件系统
+            shutil.move(data_path, file_path)
+        os.remove(meta_path)
+    finally:
+        meta_file.close()
+
+    return status, StoredFile(file_path=file_path, file_size=meta["total_size"])
+
+
+def abort_session(upload_id: str) -> None:
+    meta_file = _open_meta(upload_id)
+    try:
+        _remove_files(_paths(upload_id))
+    finally:
+        meta_file.close()
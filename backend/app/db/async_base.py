@@ -0,0 +1,78 @@
+"""
+异步数据库会话
+
+async def 接口中直接调用同步 Session 会在查询期间阻塞事件循环，
+同一 worker 的其他请求都要排队。热点接口（音频流查询、剧集列表、
+登录、心跳、鉴权）改用 AsyncSession：
+
+- SQLite 使用 aiosqlite（查询在独立线程中执行），PostgreSQL 使用 asyncpg
+- 连接同样应用 profile.py 的 SQLite 调优配置，读写分离与同步引擎一致
+
+其余管理接口仍使用 base.get_db 的同步会话。
+"""
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .base import DATABASE_READ_URL, DATABASE_URL
+from .profile import apply_sqlite_profile, engine_options, is_memory_sqlite
+
+# 同步驱动 -> 异步驱动
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """把 DATABASE_URL 转换为对应异步驱动的 URL"""
+    scheme, _, rest = url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"不支持异步访问的数据库: {scheme}")
+    return f"{ASYNC_DRIVERS[backend]}://{rest}"
+
+
+def create_async_db_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    """创建异步引擎，连接池与 SQLite 调优配置和同步引擎一致"""
+    options = engine_options(url)
+    if url.startswith("sqlite") and not is_memory_sqlite(url):
+        # aiosqlite 对文件数据库默认不使用连接池，每次会话都新建连接和线程
+        options["poolclass"] = AsyncAdaptedQueuePool
+
+    engine = create_async_engine(to_async_url(url), **options)
+    if url.startswith("sqlite"):
+        apply_sqlite_profile(engine.sync_engine, read_only=read_only)
+    return engine
+
+
+async_engine = create_async_db_engine(DATABASE_URL)
+
+if is_memory_sqlite(DATABASE_READ_URL):
+    async_read_engine = async_engine
+else:
+    async_read_engine = create_async_db_engine(DATABASE_READ_URL, read_only=True)
+
+# 提交后不过期对象，接口返回前无需再次查询
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    """获取异步数据库会话"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """获取异步只读数据库会话（只用于查询的接口）"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engines() -> None:
+    """关闭时释放连接（aiosqlite 每个连接占用一个线程）"""
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
@@ -1,21 +1,28 @@
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+from app.core.config import settings
+from .profile import create_db_engine, is_memory_sqlite
 
 
 # 数据库URL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/audio_drama.db")
+# 只读库URL（如 PostgreSQL 只读副本），为空时使用主库
+DATABASE_READ_URL = settings.DATABASE_READ_URL or DATABASE_URL
 
-# 创建引擎
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-    echo=False
-)
+# 创建引擎（SQLite 连接时应用 WAL 等调优配置，见 profile.py）
+engine = create_db_engine(DATABASE_URL)
+
+# 只读引擎：供 GET 接口使用，独立的连接池，不与写事务争用连接
+# （内存数据库每个引擎是独立的库，只能共用主引擎）
+if is_memory_sqlite(DATABASE_READ_URL):
+    read_engine = engine
+else:
+    read_engine = create_db_engine(DATABASE_READ_URL, read_only=True)
 
 # Session工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Base类
 Base = declarative_base()
@@ -30,13 +37,27 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """获取只读数据库会话（只用于查询的接口）"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db():
     """初始化数据库表"""
     from ..models.models import User, Album, Episode, Session
+    from . import indexes  # 注册索引，新数据库由 create_all 创建
+    from .migrations import run_migrations
 
     # 创建所有表
     Base.metadata.create_all(bind=engine)
 
+    # 执行未完成的版本迁移
+    run_migrations(engine)
+
     # 插入默认管理员
     db = SessionLocal()
     try:
@@ -0,0 +1,77 @@
+"""
+数据库索引
+
+每个索引对应实际的查询形状（过滤列在前，排序列按相同方向在后），
+查询变化时在这里调整，并新增迁移调用 sync_indexes 应用到已有数据库。
+test_indexes.py 用 EXPLAIN QUERY PLAN 验证每个查询都命中对应索引、无需临时排序。
+
+索引在导入本模块时注册到表上，新数据库由 create_all 直接创建。
+"""
+
+from typing import List, NamedTuple
+
+from sqlalchemy import Index, inspect, text
+from sqlalchemy.engine import Connection
+
+from app.models.models import Album, Episode, Session, User
+
+
+class IndexSpec(NamedTuple):
+    index: Index
+    queries: str  # 使用该索引的查询
+
+
+INDEXES: List[IndexSpec] = [
+    IndexSpec(
+        Index("ix_albums_list", Album.sort_order, Album.created_at.desc(), Album.id.desc()),
+        "albums.get_albums：ORDER BY sort_order, created_at DESC, id DESC（页码与游标分页）",
+    ),
+    IndexSpec(
+        Index("ix_episodes_album_order", Episode.album_id, Episode.sort_order, Episode.created_at, Episode.id),
+        "albums.get_album_episodes / episodes.get_episodes：WHERE album_id = ? ORDER BY sort_order, created_at, id；"
+        "以及按 album_id 计数、汇总（album_stats）",
+    ),
+    IndexSpec(
+        Index("ix_users_created", User.created_at.desc(), User.id.desc()),
+        "users.get_users：ORDER BY created_at DESC, id DESC",
+    ),
+    IndexSpec(
+        Index("ix_sessions_expires_at", Session.expires_at),
+        "SqlSessionStore.sweep / count_online：按 expires_at 范围删除、计数",
+    ),
+    IndexSpec(
+        Index("ix_sessions_user_expires", Session.user_id, Session.expires_at),
+        "SqlSessionStore.get / refresh / delete：WHERE user_id = ? [AND expires_at > ?]",
+    ),
+]
+
+# 已被上面的组合索引覆盖（或与唯一约束重复）的旧索引
+OBSOLETE_INDEXES = [
+    # init_db.create_indexes 手工创建的单列索引
+    "idx_users_username",
+    "idx_albums_sort_order",
+    "idx_albums_created_at",
+    "idx_episodes_album_id",
+    "idx_episodes_sort_order",
+    "idx_sessions_token",
+    "idx_sessions_user_id",
+    # 模型中 index=True 生成的单列索引
+    "ix_albums_sort_order",
+    "ix_episodes_album_id",
+    "ix_episodes_sort_order",
+    "ix_sessions_user_id",
+]
+
+
+def sync_indexes(conn: Connection) -> None:
+    """删除过时的索引，创建缺失的索引"""
+    for name in OBSOLETE_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    inspector = inspect(conn)
+    for spec in INDEXES:
+        table = spec.index.table.name
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        if spec.index.name not in existing:
+            spec.index.create(conn)
+    conn.execute(text("ANALYZE"))
@@ -17,6 +17,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 from sqlalchemy import text
 from app.db.base import engine, SessionLocal, Base
+from app.db.indexes import sync_indexes
 from app.models.models import User
 import bcrypt
 
@@ -69,34 +70,17 @@ def create_default_admin():
 
 
 def create_indexes():
-    """创建数据库索引"""
+    """创建数据库索引（声明见 app/db/indexes.py），并删除过时的单列索引"""
     print("📇 正在创建索引...")
-    
-    db = SessionLocal()
+
     try:
-        # 使用原生 SQL 创建索引
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)",
-            "CREATE INDEX IF NOT EXISTS idx_albums_sort_order ON albums(sort_order)",
-            "CREATE INDEX IF NOT EXISTS idx_albums_created_at ON albums(created_at DESC)",
-            "CREATE INDEX IF NOT EXISTS idx_episodes_album_id ON episodes(album_id)",
-            "CREATE INDEX IF NOT EXISTS idx_episodes_sort_order ON episodes(sort_order)",
-            "CREATE INDEX IF NOT EXISTS idx_sessions_token ON sessions(token)",
-            "CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id)",
-        ]
-        
-        for sql in indexes:
-            db.execute(text(sql))
-        
-        db.commit()
+        with engine.begin() as conn:
+            sync_indexes(conn)
         print("✅ 索引创建完成")
-        
+
     except Exception as e:
-        db.rollback()
         print(f"❌ 创建索引失败：{e}")
         raise
-    finally:
-        db.close()
 
 
 def create_views():
@@ -105,23 +89,9 @@ def create_views():
     
     db = SessionLocal()
     try:
-        # 专辑详情视图
-        view_sql = """
-        CREATE VIEW IF NOT EXISTS album_detail AS
-        SELECT
-            a.id,
-            a.title,
-            a.cover_image,
-            a.description,
-            a.sort_order,
-            a.episode_count,
-            a.created_at,
-            a.updated_at,
-            COALESCE(SUM(e.duration), 0) as total_duration
-        FROM albums a
-        LEFT JOIN episodes e ON a.id = e.album_id
-        GROUP BY a.id
-        """
+        # 专辑详情视图（汇总数据已物化在 albums 表中，见迁移 2）
+        from app.db.migrations import ALBUM_DETAIL_VIEW
+        view_sql = ALBUM_DETAIL_VIEW.replace("CREATE VIEW", "CREATE VIEW IF NOT EXISTS")
         db.execute(text(view_sql))
         db.commit()
         print("✅ 视图创建完成")
@@ -148,6 +118,11 @@ def init_db():
     # 创建表
     create_tables()
     
+    # 执行版本迁移
+    print("📦 正在执行数据库迁移...")
+    from app.db.migrations import run_migrations
+    print(f"✅ 已执行 {run_migrations(engine)} 个迁移")
+
     # 创建索引
     create_indexes()
     
@@ -0,0 +1,131 @@
+"""
+数据库版本迁移
+
+create_all 只会创建缺失的表，不会修改已有表和数据。结构或数据的变更
+写成按版本号递增的迁移函数，已执行的版本记录在 schema_version 表中，
+每个迁移在独立事务中执行，启动时（init_db）自动补齐未执行的迁移。
+
+新增迁移：编写 def _xxx(conn) 并追加到 MIGRATIONS 末尾，版本号不可复用。
+"""
+
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+# 数据迁移每批处理的行数
+BATCH_SIZE = 100
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _externalize_inline_covers(conn: Connection) -> None:
+    """把 albums.cover_image 中的 Base64 封面移入封面存储，列中只保留引用"""
+    from app.core.cover_store import COVER_URL_PREFIX, externalize_cover
+
+    last_id, moved = 0, 0
+    while True:
+        rows = conn.execute(
+            text(
+                "SELECT id, cover_image FROM albums "
+                "WHERE id > :last_id AND cover_image NOT LIKE :prefix "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "prefix": COVER_URL_PREFIX + "%", "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        for album_id, cover_image in rows:
+            reference = externalize_cover(cover_image)
+            if reference != cover_image:
+                conn.execute(
+                    text("UPDATE albums SET cover_image = :cover WHERE id = :id"),
+                    {"cover": reference, "id": album_id},
+                )
+                moved += 1
+        last_id = rows[-1][0]
+    print(f"✅ 已迁移 {moved} 个内联封面到封面存储")
+
+
+# 专辑详情视图：直接读取物化的汇总列
+ALBUM_DETAIL_VIEW = """
+CREATE VIEW album_detail AS
+SELECT
+    id, title, cover_image, description, sort_order,
+    episode_count, total_duration, total_bytes, last_episode_at,
+    created_at, updated_at
+FROM albums
+"""
+
+
+def _add_album_aggregates(conn: Connection) -> None:
+    """albums 增加汇总列，重建 album_detail 视图，并按 episodes 计算初始值"""
+    from app.core.album_stats import reconcile_album_stats
+
+    existing = {column["name"] for column in inspect(conn).get_columns("albums")}
+    for name, ddl in (
+        ("total_duration", "INTEGER NOT NULL DEFAULT 0"),
+        ("total_bytes", "INTEGER NOT NULL DEFAULT 0"),
+        ("last_episode_at", "DATETIME"),
+    ):
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE albums ADD COLUMN {name} {ddl}"))
+
+    conn.execute(text("DROP VIEW IF EXISTS album_detail"))
+    conn.execute(text(ALBUM_DETAIL_VIEW))
+
+    with Session(bind=conn) as session:
+        print(f"✅ 已计算 {reconcile_album_stats(session)} 个专辑的汇总数据")
+
+
+def _composite_indexes(conn: Connection) -> None:
+    """用按查询设计的组合索引替换手工创建的单列索引"""
+    from app.db.indexes import sync_indexes
+
+    sync_indexes(conn)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "move inline base64 covers to the cover store", _externalize_inline_covers),
+    Migration(2, "materialized album aggregates", _add_album_aggregates),
+    Migration(3, "composite indexes matched to query shapes", _composite_indexes),
+]
+
+
+def run_migrations(engine: Engine) -> int:
+    """执行所有未执行的迁移，返回本次执行的数量"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, "
+            "description VARCHAR(200) NOT NULL, "
+            "applied_at DATETIME NOT NULL)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_version"))}
+
+    count = 0
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version in applied:
+            continue
+        print(f"📦 正在执行数据库迁移 {migration.version}: {migration.description}")
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(
+                text(
+                    "INSERT INTO schema_version (version, description, applied_at) "
+                    "VALUES (:version, :description, :applied_at)"
+                ),
+                {
+                    "version": migration.version,
+                    "description": migration.description,
+                    "applied_at": datetime.utcnow(),
+                },
+            )
+        count += 1
+    return count
@@ -0,0 +1,82 @@
+"""
+数据库连接配置（SQLite 生产环境调优）
+
+默认的回滚日志模式下，写事务会阻塞所有读：登录、心跳的每次 commit
+都会和音频流的元数据查询互相等待。每个新连接建立时设置：
+
+- journal_mode=WAL：读写互不阻塞（持久化在数据库文件中，只需写连接设置）
+- synchronous=NORMAL：WAL 模式下只在检查点时 fsync，断电不会损坏数据库
+- busy_timeout：写锁被占用时等待而不是立即报 database is locked
+- mmap_size / cache_size：用内存映射和更大的页缓存减少读盘与拷贝
+- 只读连接额外设置 query_only，误写会直接报错
+
+连接池大小由 DB_POOL_SIZE / DB_MAX_OVERFLOW 配置，应与每个 worker 的
+并发请求数（线程池大小）相当。
+"""
+
+from typing import List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+
+def sqlite_pragmas(read_only: bool = False) -> List[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}",
+        # 负数表示以 KB 为单位
+        f"PRAGMA cache_size = -{settings.SQLITE_CACHE_SIZE_KB}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        pragmas.insert(0, f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine, read_only: bool = False) -> None:
+    """在每个新建的连接上执行调优 PRAGMA"""
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url)
+
+
+def engine_options(url: str) -> dict:
+    """create_engine / create_async_engine 共用的参数"""
+    is_sqlite = url.startswith("sqlite")
+
+    options = {"echo": False}
+    if is_sqlite:
+        options["connect_args"] = {"check_same_thread": False}
+    if not is_memory_sqlite(url):
+        # 内存数据库使用 SingletonThreadPool / StaticPool，不能设置池大小
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_pre_ping=not is_sqlite,
+        )
+    return options
+
+
+def create_db_engine(url: str, read_only: bool = False, tuned: bool = True) -> Engine:
+    """创建引擎：SQLite 应用调优配置，其他数据库只配置连接池"""
+    engine = create_engine(url, **engine_options(url))
+    if url.startswith("sqlite") and tuned:
+        apply_sqlite_profile(engine, read_only=read_only)
+    return engine
@@ -1,18 +1,20 @@
 import os
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
-from app.db.base import get_db, init_db
+from app.db.async_base import AsyncReadSessionLocal
+from app.db.base import init_db
 from app.core.config import settings
-from app.api import auth, albums, episodes, upload, stream, users
+from app.core.serialization import FastJSONResponse
+from app.api import auth, albums, episodes, upload, stream, users, covers, media
 
 # 创建 FastAPI 应用
 app = FastAPI(
     title="极简广播剧管理系统 API",
     description="极简广播剧管理与在线收听系统的后端 API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS 中间件
@@ -47,11 +49,7 @@ async def health_check():
 async def get_online_count():
     """获取当前在线人数"""
     from app.core.session_crud import get_current_online_count
-    db = next(get_db())
-    try:
-        count = await get_current_online_count(db)
-    finally:
-        db.close()
+    count = await get_current_online_count()
     return {
         "success": True,
         "data": {
@@ -60,32 +58,40 @@ async def get_online_count():
         }
     }
 
+# 在线人数趋势
+@app.get("/api/online/history")
+async def get_online_history(minutes: int = Query(60, ge=1, le=settings.ONLINE_HISTORY_MINUTES)):
+    """获取最近若干分钟的在线人数统计（每分钟一项）"""
+    from app.core.online_tracker import online
+    return {
+        "success": True,
+        "data": {
+            "current_online": online.current,
+            "items": online.history(minutes)
+        }
+    }
+
 # 系统状态
 @app.get("/api/system/status")
 async def system_status():
     """系统状态"""
     from app.core.session_crud import get_current_online_count
-    from sqlalchemy import func
-    from app.models.models import Album, Episode
-    import os
-
-    db = next(get_db())
-    try:
-        online_count = await get_current_online_count(db)
-        total_albums = db.query(func.count(Album.id)).scalar()
-        total_episodes = db.query(func.count(Episode.id)).scalar()
-    finally:
-        db.close()
-
-    media_dir = "/media/albums"
-    if os.path.exists(media_dir):
-        total_size = sum(
-            os.path.getsize(os.path.join(dirpath, filename))
-            for dirpath, _, filenames in os.walk(media_dir)
-            for filename in filenames
-        )
-    else:
-        total_size = 0
+    from app.core.storage_accounting import last_rescan_report, storage_totals
+    from app.core.episode_cache import cache_stats
+    from app.core.security import token_cache_stats
+    from app.api.deps import user_cache_stats
+    from app.core.cover_variants import variant_cache_stats
+    from app.core.catalog_cache import catalog_cache_stats
+    from app.core.session_sweeper import sweeper_stats
+    from app.core.heartbeat import heartbeat_stats
+
+    online_count = await get_current_online_count()
+    # 专辑数、剧集数、存储用量均取自 albums 表的汇总列
+    async with AsyncReadSessionLocal() as db:
+        totals = await storage_totals(db)
+    total_albums = totals["albums"]
+    total_episodes = totals["episodes"]
+    total_size = totals["bytes"]
 
     return {
         "success": True,
@@ -95,7 +101,17 @@ async def system_status():
             "total_albums": total_albums or 0,
             "total_episodes": total_episodes or 0,
             "storage_used": total_size,
-            "storage_used_mb": round(total_size / 1024 / 1024, 2)
+            "storage_used_mb": round(total_size / 1024 / 1024, 2),
+            "cache": {
+                "episode_files": cache_stats(),
+                "tokens": token_cache_stats(),
+                "users": user_cache_stats(),
+                "cover_variants": variant_cache_stats(),
+                "catalog": catalog_cache_stats()
+            },
+            "session_sweeper": sweeper_stats(),
+            "heartbeats": heartbeat_stats(),
+            "storage_rescan": last_rescan_report()
         }
     }
 
@@ -106,6 +122,8 @@ app.include_router(episodes.router, prefix="/api/admin")
 app.include_router(upload.router, prefix="/api/admin")
 app.include_router(stream.router, prefix="/api")
 app.include_router(users.router, prefix="/api/admin")
+app.include_router(media.router, prefix="/api/admin")
+app.include_router(covers.router, prefix="/api")
 
 # ==================== 静态文件服务（SPA 前端）====================
 # 注意：必须放在所有 API 路由之后，确保 API 优先匹配
@@ -148,8 +166,34 @@ async def startup_event():
     except Exception as e:
         print(f"❌ 数据库初始化失败：{e}")
         raise
+    from app.core.heartbeat import start_heartbeat_flusher
+    from app.core.online_tracker import start_online_tracker
+    from app.core.session_sweeper import start_session_sweeper
+    from app.core.storage_accounting import start_storage_rescan
+    start_session_sweeper()
+    start_heartbeat_flusher()
+    start_online_tracker()
+    start_storage_rescan()
     print("✅ 应用初始化完成")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时释放后台资源"""
+    from app.core.audio_probe import shutdown_probe_executor
+    from app.core.cover_variants import shutdown_variant_executor
+    from app.core.heartbeat import stop_heartbeat_flusher
+    from app.core.online_tracker import stop_online_tracker
+    from app.core.session_sweeper import stop_session_sweeper
+    from app.core.storage_accounting import stop_storage_rescan
+    from app.db.async_base import dispose_async_engines
+    await stop_session_sweeper()
+    await stop_heartbeat_flusher()
+    await stop_online_tracker()
+    await stop_storage_rescan()
+    shutdown_probe_executor()
+    shutdown_variant_executor()
+    await dispose_async_engines()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
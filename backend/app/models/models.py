@@ -3,6 +3,8 @@ from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..db.base import Base
 
+# 索引统一在 app/db/indexes.py 中按查询声明
+
 
 class User(Base):
     __tablename__ = "users"
@@ -25,8 +27,12 @@ class Album(Base):
     title = Column(String(200), nullable=False)
     cover_image = Column(String(500), nullable=False)
     description = Column(Text, nullable=True)
-    sort_order = Column(Integer, default=0, index=True)
+    sort_order = Column(Integer, default=0)
+    # 汇总数据（由 app.core.album_stats 维护）
     episode_count = Column(Integer, default=0)
+    total_duration = Column(Integer, nullable=False, default=0, server_default="0")  # 秒
+    total_bytes = Column(Integer, nullable=False, default=0, server_default="0")
+    last_episode_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -37,12 +43,12 @@ class Episode(Base):
     __tablename__ = "episodes"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    album_id = Column(Integer, ForeignKey("albums.id", ondelete="CASCADE"), nullable=False, index=True)
+    album_id = Column(Integer, ForeignKey("albums.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(200), nullable=False)
     file_path = Column(String(500), nullable=True)  # 允许创建时为空，后续上传
     file_size = Column(Integer, default=0)
     duration = Column(Integer, default=0)
-    sort_order = Column(Integer, default=0, index=True)
+    sort_order = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     album = relationship("Album", back_populates="episodes")
@@ -52,7 +58,7 @@ class Session(Base):
     __tablename__ = "sessions"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     token = Column(String(255), unique=True, nullable=False, index=True)
     ip_address = Column(String(45), nullable=True)
     user_agent = Column(String(500), nullable=True)
@@ -40,7 +40,7 @@ class LoginResponse(BaseModel):
 # ==================== Album ====================
 class AlbumCreate(BaseModel):
     title: str
-    cover_image: Optional[str] = None  # Base64编码的图片，可选
+    cover_image: Optional[str] = None  # 封面引用（/api/covers/<哈希>），Base64会自动转存，可选
     description: Optional[str] = None
     sort_order: int = 0
 
@@ -59,6 +59,9 @@ class AlbumResponse(BaseModel):
     description: Optional[str] = None
     sort_order: int
     episode_count: int
+    total_duration: int = 0  # 秒
+    total_bytes: int = 0
+    last_episode_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -67,10 +70,11 @@ class AlbumResponse(BaseModel):
 
 
 class AlbumsListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # include_total=false 时不计算
     page: int
     page_size: int
     items: list[AlbumResponse]
+    next_cursor: Optional[str] = None  # 下一页游标，没有下一页时为空
 
 
 # ==================== Episode ====================
@@ -109,6 +113,13 @@ class UploadResponse(BaseModel):
     episodes: list[EpisodeResponse]
 
 
+class UploadSessionCreate(BaseModel):
+    album_id: int
+    filename: str
+    total_size: int
+    episode_id: Optional[int] = None  # 为已创建的剧集上传文件时指定
+
+
 # ==================== Stream ====================
 class StreamTokenRequest(BaseModel):
     episode_id: int
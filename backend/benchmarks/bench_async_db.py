@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+同步会话 vs 异步会话：单个 worker 的并发能力
+
+启动一个 uvicorn worker（子进程），提供两个相同的剧集列表接口：
+- /sync  ：async def 中直接使用同步 Session（改造前的写法，查询阻塞事件循环）
+- /async ：使用 AsyncSession（aiosqlite，查询在独立线程中执行）
+
+客户端以不同并发数持续请求，输出吞吐量、p50 / p99 延迟，以及 worker 内
+同时处于数据库查询中的请求数峰值（in flight）。同步会话的峰值始终为 1。
+
+使用方法:
+    python benchmarks/bench_async_db.py [每轮秒数] [剧集数]
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if "DATABASE_URL" not in os.environ:
+    DATA_DIR = tempfile.mkdtemp(prefix="bench_async_db_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/bench.db"
+
+from fastapi import Depends, FastAPI
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.pagination import EPISODE_SORT_KEYS
+from app.db import indexes  # noqa: F401  注册索引
+from app.db.async_base import dispose_async_engines, get_async_read_db
+from app.db.base import Base, engine, get_read_db
+from app.models.models import Album, Episode
+
+CONCURRENCY = [1, 8, 32, 128]
+
+app = FastAPI()
+
+
+class InFlight:
+    """统计同时处于数据库查询中的请求数"""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        self.current -= 1
+
+
+in_flight = InFlight()
+
+
+def _order_by():
+    return [key.order_by() for key in EPISODE_SORT_KEYS]
+
+
+@app.get("/sync")
+async def sync_episodes(db: Session = Depends(get_read_db)):
+    with in_flight:
+        episodes = db.query(Episode).filter(Episode.album_id == 1).order_by(*_order_by()).all()
+    return {"count": len(episodes)}
+
+
+@app.get("/async")
+async def async_episodes(db: AsyncSession = Depends(get_async_read_db)):
+    with in_flight:
+        result = await db.execute(select(Episode).where(Episode.album_id == 1).order_by(*_order_by()))
+        episodes = result.scalars().all()
+    return {"count": len(episodes)}
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    peak, in_flight.peak = in_flight.peak, 0
+    return {"peak": peak}
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await dispose_async_engines()
+
+
+def _populate(episodes: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Album), [{"title": "bench", "cover_image": "", "episode_count": episodes}])
+        conn.execute(insert(Episode), [
+            {"album_id": 1, "title": f"第{i + 1}集", "file_path": f"/media/albums/1/{i}.mp3", "sort_order": i}
+            for i in range(episodes)
+        ])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _load(client, path: str, concurrency: int, seconds: float):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    await client.post("/stats/reset")
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    peak = (await client.post("/stats/reset")).json()["peak"]
+    return latencies, peak
+
+
+async def _run(base_url: str, seconds: float) -> None:
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(CONCURRENCY))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        for _ in range(50):
+            try:
+                await client.get("/docs")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+        print(f"{'接口':<8} {'并发':>5} {'吞吐(次/秒)':>12} {'p50(ms)':>9} {'p99(ms)':>9} {'in flight 峰值':>14}")
+        for path in ("/sync", "/async"):
+            await _load(client, path, 4, 0.5)  # 预热连接池
+            for concurrency in CONCURRENCY:
+                latencies, peak = await _load(client, path, concurrency, seconds)
+                latencies.sort()
+                print(
+                    f"{path:<8} {concurrency:>5} {len(latencies) / seconds:>12.0f}"
+                    f" {latencies[len(latencies) // 2] * 1000:>9.2f}"
+                    f" {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:>9.2f}"
+                    f" {peak:>14}"
+                )
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    episodes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    _populate(episodes)
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.bench_async_db:app",
+         "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=os.environ.copy(),
+    )
+    print(f"数据库: {os.environ['DATABASE_URL']}，专辑剧集数 {episodes}，每轮 {seconds:.0f} 秒，1 个 worker\n")
+    try:
+        asyncio.run(_run(f"http://127.0.0.1:{port}", seconds))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+时长扫描基准：帧头扫描 vs mutagen vs 读取全部内容
+
+环境中没有解码器，"读取全部内容"（按 64KB 顺序读完整个文件）作为完整解码的 IO 下限。
+
+使用方法:
+    python benchmarks/bench_duration_scan.py [文件大小MB]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutagen import File as MutagenFile
+
+from app.core.duration_scanner import scan_duration
+from test_duration_fix import flac_file, mp3_frame, mp4_file, xing_frame
+
+
+def _read_all(path):
+    with open(path, "rb") as f:
+        while f.read(65536):
+            pass
+
+
+def _mutagen(path):
+    try:
+        audio_file = MutagenFile(path)
+    except Exception:
+        return None
+    return audio_file.info.length if audio_file else None
+
+
+def _timed(func, path, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(path)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _build_files(directory, size_mb):
+    size = size_mb * 1024 * 1024
+    vbr_block = mp3_frame(32) + mp3_frame(320) + mp3_frame(128)
+    vbr = vbr_block * (size // len(vbr_block))
+    xing = xing_frame(len(vbr) // len(vbr_block) * 3) + vbr
+    flac = flac_file(44100, 2, 44100 * 3600) + b"\x00" * size
+    mp4 = mp4_file(600, 600 * 3600, mdat_size=size)
+
+    files = {"VBR MP3（逐帧）": vbr, "VBR MP3（Xing）": xing, "FLAC": flac, "M4A": mp4}
+    paths = {}
+    for name, data in files.items():
+        fd, path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        paths[name] = path
+    return paths
+
+
+def main(size_mb):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = _build_files(directory, size_mb)
+        print(f"文件大小：约 {size_mb} MB")
+        print(f"{'文件':<16}{'扫描 (ms)':>12}{'mutagen (ms)':>14}{'全部读取 (ms)':>16}{'扫描时长 (s)':>14}{'mutagen 时长 (s)':>18}")
+        for name, path in paths.items():
+            scan_time, scanned = _timed(scan_duration, path)
+            mutagen_time, mutagen_duration = _timed(_mutagen, path)
+            read_time, _ = _timed(_read_all, path)
+            duration = f"{scanned.duration:.1f}" if scanned else "-"
+            mutagen_text = f"{mutagen_duration:.1f}" if mutagen_duration else "-"
+            print(f"{name:<16}{scan_time * 1000:>12.1f}{mutagen_time * 1000:>14.1f}{read_time * 1000:>16.1f}"
+                  f"{duration:>14}{mutagen_text:>18}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+列表接口序列化压测：每个条目的耗时
+
+对比两条路径（同一数据库、相同排序与返回字段）：
+
+- 原路径：select(Model) 加载 ORM 对象 -> 逐行构造 dict / AlbumResponse ->
+  FastAPI 按 response_model 校验、序列化（serialize_response）-> JSONResponse（标准库 json）
+- 新路径：按列 select() 取 Row 元组 -> row_dicts -> orjson（app/core/serialization.py）
+
+分别统计查询、构造、序列化三个阶段，输出每个条目的微秒数。
+
+使用方法:
+    python benchmarks/bench_list_serialization.py [剧集数] [专辑数] [轮数]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATA_DIR = tempfile.mkdtemp(prefix="bench_list_serialization_")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/app.db"
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api.albums import ALBUM_LIST_COLUMNS, _album_to_response
+from app.api.episodes import EPISODE_LIST_COLUMNS
+from app.core.pagination import ALBUM_SORT_KEYS, EPISODE_SORT_KEYS
+from app.core.serialization import FastJSONResponse, row_dicts
+from app.db import indexes  # noqa: F401  注册索引
+from app.db.base import Base, engine
+from app.models.models import Album, Episode
+from app.models.schemas import AlbumsListResponse
+
+
+def _populate(episodes: int, albums: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Album), [
+            {
+                "title": f"专辑{i}", "cover_image": f"/api/covers/{i:064x}", "description": "简介" * 20,
+                "sort_order": i % 10, "episode_count": episodes if i == 0 else 0,
+                "created_at": now - timedelta(minutes=i), "updated_at": now,
+            }
+            for i in range(albums)
+        ])
+        conn.execute(insert(Episode), [
+            {
+                "album_id": 1, "title": f"第{i + 1}集", "file_path": f"/media/albums/1/{i}.mp3",
+                "duration": 1800 + i, "sort_order": i, "created_at": now + timedelta(seconds=i),
+            }
+            for i in range(episodes)
+        ])
+
+
+def _episode_order():
+    return [key.order_by() for key in EPISODE_SORT_KEYS]
+
+
+def _album_order():
+    return [key.order_by() for key in ALBUM_SORT_KEYS]
+
+
+# ---------- 原路径 ----------
+
+def episodes_before(db):
+    start = time.perf_counter()
+    episodes = db.execute(
+        select(Episode).where(Episode.album_id == 1).order_by(*_episode_order())
+    ).scalars().all()
+    queried = time.perf_counter()
+    content = {
+        "album_id": 1,
+        "items": [
+            {
+                "id": ep.id,
+                "album_id": ep.album_id,
+                "title": ep.title,
+                "duration": ep.duration,
+                "sort_order": ep.sort_order,
+                "created_at": ep.created_at,
+                "stream_url": f"/api/stream/{ep.id}"
+            }
+            for ep in episodes
+        ],
+        "next_cursor": None,
+    }
+    built = time.perf_counter()
+    body = JSONResponse(asyncio.run(serialize_response(field=DICT_FIELD, response_content=content))).body
+    return queried - start, built - queried, time.perf_counter() - built, len(episodes), body
+
+
+def albums_before(db):
+    start = time.perf_counter()
+    albums = db.execute(select(Album).order_by(*_album_order())).scalars().all()
+    queried = time.perf_counter()
+    content = AlbumsListResponse(
+        total=len(albums), page=1, page_size=len(albums),
+        items=[_album_to_response(album) for album in albums], next_cursor=None
+    )
+    built = time.perf_counter()
+    body = JSONResponse(asyncio.run(serialize_response(field=ALBUMS_FIELD, response_content=content))).body
+    return queried - start, built - queried, time.perf_counter() - built, len(albums), body
+
+
+# ---------- 新路径 ----------
+
+def episodes_after(db):
+    start = time.perf_counter()
+    rows = db.execute(
+        select(*EPISODE_LIST_COLUMNS).where(Episode.album_id == 1).order_by(*_episode_order())
+    ).all()
+    queried = time.perf_counter()
+    items = row_dicts(rows)
+    for item in items:
+        item["stream_url"] = f"/api/stream/{item['id']}"
+    content = {"album_id": 1, "items": items, "next_cursor": None}
+    built = time.perf_counter()
+    body = FastJSONResponse(content).body
+    return queried - start, built - queried, time.perf_counter() - built, len(rows), body
+
+
+def albums_after(db):
+    start = time.perf_counter()
+    rows = db.execute(select(*ALBUM_LIST_COLUMNS).order_by(*_album_order())).all()
+    queried = time.perf_counter()
+    content = {"total": len(rows), "page": 1, "page_size": len(rows), "items": row_dicts(rows), "next_cursor": None}
+    built = time.perf_counter()
+    body = FastJSONResponse(content).body
+    return queried - start, built - queried, time.perf_counter() - built, len(rows), body
+
+
+DICT_FIELD = create_response_field(name="episodes", type_=dict)
+ALBUMS_FIELD = create_response_field(name="albums", type_=AlbumsListResponse)
+
+
+def measure(SessionFactory, function, rounds: int):
+    """每轮使用新的会话（与请求一致），返回各阶段每个条目的微秒数和最后一次的响应内容"""
+    totals = [0.0, 0.0, 0.0]
+    count, body = 0, b""
+    for _ in range(rounds):
+        db = SessionFactory()
+        try:
+            *stages, count, body = function(db)
+        finally:
+            db.close()
+        for index, value in enumerate(stages):
+            totals[index] += value
+    return [total / rounds / count * 1_000_000 for total in totals], body
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    albums = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    _populate(episodes, albums)
+    SessionFactory = sessionmaker(bind=engine)
+    print(f"数据目录: {DATA_DIR}")
+    print(f"单个专辑 {episodes} 集，专辑列表 {albums} 个，每种路径 {rounds} 轮（微秒/条目）\n")
+    print(f"{'':<14}{'查询':>9}{'构造':>9}{'序列化':>9}{'合计':>9}")
+
+    for label, before, after in (
+        ("剧集列表", episodes_before, episodes_after),
+        ("专辑列表", albums_before, albums_after),
+    ):
+        measure(SessionFactory, before, 2)  # 预热
+        measure(SessionFactory, after, 2)
+        old, old_body = measure(SessionFactory, before, rounds)
+        new, new_body = measure(SessionFactory, after, rounds)
+        for name, stages in (("原路径", old), ("新路径", new)):
+            print(f"{label} {name:<8}" + "".join(f"{value:>9.2f}" for value in stages) + f"{sum(stages):>9.2f}")
+        print(f"{'':<14}合计加速 {sum(old) / sum(new):.1f}x，响应内容{'一致' if old_body == new_body else '不一致'}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+媒体目录核对压测
+
+生成若干专辑、每个专辑若干个音频文件（空文件）及对应的剧集记录，
+其中约 1% 为孤儿文件、1% 的记录缺少文件，另有几个已删除专辑的目录，
+分别计时只报告和 reclaim 两种模式，并输出核对后进程的峰值内存。
+
+使用方法:
+    python benchmarks/bench_media_reconcile.py [专辑数] [每个专辑的文件数]
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATA_DIR = tempfile.mkdtemp(prefix="bench_media_reconcile_")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/app.db"
+os.environ["MEDIA_DIR"] = f"{DATA_DIR}/albums"
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.media_reconcile import reconcile_media
+from app.db import indexes  # noqa: F401  注册索引
+from app.db.base import Base, engine
+from app.models.models import Album, Episode
+
+DELETED_ALBUMS = 5
+
+
+def _touch(path: str) -> None:
+    open(path, "wb").close()
+
+
+def _populate(albums: int, per_album: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Album), [{"title": f"专辑{i}", "cover_image": ""} for i in range(albums)])
+        for album_id in range(1, albums + 1):
+            directory = os.path.join(settings.MEDIA_DIR, str(album_id))
+            os.makedirs(directory)
+            rows = []
+            for i in range(per_album):
+                path = os.path.join(directory, f"{i}.mp3")
+                if i % 100 != 1:  # 1% 的记录缺少文件
+                    _touch(path)
+                if i % 100 != 2:  # 1% 的文件没有剧集记录
+                    rows.append({"album_id": album_id, "title": f"第{i + 1}集", "file_path": path})
+            conn.execute(insert(Episode), rows)
+
+    for album_id in range(albums + 1, albums + 1 + DELETED_ALBUMS):
+        directory = os.path.join(settings.MEDIA_DIR, str(album_id))
+        os.makedirs(directory)
+        for i in range(per_album):
+            _touch(os.path.join(directory, f"{i}.mp3"))
+
+
+def main():
+    albums = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    per_album = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    # 生成的文件都是刚写入的，允许立即删除
+    settings.MEDIA_RECONCILE_MIN_AGE_SECONDS = 0
+
+    print(f"数据目录: {DATA_DIR}")
+    start = time.perf_counter()
+    _populate(albums, per_album)
+    print(f"生成 {albums} 个专辑 × {per_album} 个文件（另有 {DELETED_ALBUMS} 个已删除专辑的目录），"
+          f"耗时 {time.perf_counter() - start:.1f}s\n")
+
+    SessionLocal = sessionmaker(bind=engine)
+    for reclaim in (False, True, False):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            report = reconcile_media(db, reclaim=reclaim)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+        scanned = report["referenced_files"] + report["orphan_files"]
+        print(
+            f"  {'reclaim' if reclaim else '只报告':<8} {elapsed:>6.2f}s  {scanned / elapsed:>9.0f} 文件/秒"
+            f"  缺失 {report['missing_files']}  孤儿 {report['orphan_files']}  已删除 {report['reclaimed_files']}"
+        )
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\n峰值内存: {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
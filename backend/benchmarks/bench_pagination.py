@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+分页查询耗时对比：OFFSET 分页 vs 游标分页
+
+在临时 SQLite 数据库中生成 10 万条剧集（同一专辑）和 100 万个用户，
+分别测量翻到不同深度时单页查询的耗时。游标分页依赖与排序键一致的索引
+（app/db/indexes.py）。
+
+使用方法:
+    python benchmarks/bench_pagination.py [剧集数] [用户数]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATA_DIR = tempfile.mkdtemp(prefix="bench_pagination_")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/bench.db"
+
+from sqlalchemy import insert, text
+
+from app.core.pagination import EPISODE_SORT_KEYS, USER_SORT_KEYS, cursor_for, paginate
+from app.db import indexes  # noqa: F401  注册索引
+from app.db.base import Base, SessionLocal, engine
+from app.models.models import Album, Episode, User
+
+PAGE_SIZE = 100
+REPEAT = 5
+
+
+def _populate(episodes: int, users: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    base_time = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Album), [{"title": "bench", "cover_image": "", "episode_count": episodes}])
+        for start in range(0, episodes, 50000):
+            conn.execute(insert(Episode), [
+                {
+                    "album_id": 1,
+                    "title": f"第{i + 1}集",
+                    "file_path": f"/media/albums/1/{i}.mp3",
+                    "duration": 1800,
+                    # 大量相同的 sort_order，考验排序键中 created_at / id 的作用
+                    "sort_order": i // 10,
+                    "created_at": base_time + timedelta(seconds=i),
+                }
+                for i in range(start, min(start + 50000, episodes))
+            ])
+        for start in range(0, users, 100000):
+            conn.execute(insert(User), [
+                {
+                    "username": f"user{i}",
+                    "password_hash": "x",
+                    "role": "user",
+                    "created_at": base_time + timedelta(seconds=i // 3),
+                }
+                for i in range(start, min(start + 100000, users))
+            ])
+        conn.execute(text("ANALYZE"))
+
+
+def _timed(func) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def _compare(name: str, query_factory, keys, total: int) -> None:
+    print(f"\n{name}（共 {total} 行，每页 {PAGE_SIZE} 行）")
+    print(f"{'翻页深度':>10}{'OFFSET':>12}{'游标':>12}{'COUNT':>12}")
+    db = SessionLocal()
+    try:
+        query = query_factory(db)
+        for depth in (0, total // 10, total // 2, total - PAGE_SIZE):
+            depth -= depth % PAGE_SIZE
+            # 以该深度前一行生成游标，等价于从头逐页翻到这里
+            anchor = query.order_by(*(key.order_by() for key in keys)).offset(depth - 1).first() if depth else None
+            cursor = cursor_for(anchor, keys) if anchor is not None else None
+
+            offset_ms = _timed(lambda: query.order_by(*(key.order_by() for key in keys))
+                               .offset(depth).limit(PAGE_SIZE).all())
+            cursor_ms = _timed(lambda: paginate(query, keys, PAGE_SIZE, cursor=cursor))
+            count_ms = _timed(lambda: query.count())
+            print(f"{depth:>10}{offset_ms:>10.2f}ms{cursor_ms:>10.2f}ms{count_ms:>10.2f}ms")
+    finally:
+        db.close()
+
+
+def main(episodes: int, users: int) -> None:
+    print(f"生成数据：{episodes} 条剧集，{users} 个用户 ...")
+    started = time.perf_counter()
+    _populate(episodes, users)
+    print(f"完成（{time.perf_counter() - started:.1f}s），数据库：{DATA_DIR}/bench.db")
+
+    _compare("剧集", lambda db: db.query(Episode).filter(Episode.album_id == 1), EPISODE_SORT_KEYS, episodes)
+    _compare("用户", lambda db: db.query(User), USER_SORT_KEYS, users)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000000,
+    )
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Range 请求头解析微基准
+
+使用方法:
+    python benchmarks/bench_range_parser.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.ranges import RangeNotSatisfiable, parse_range_header
+
+FILE_SIZE = 100 * 1024 * 1024  # 100MB
+
+CASES = {
+    "单区间": "bytes=1048576-2097151",
+    "开放区间": "bytes=1048576-",
+    "后缀区间": "bytes=-65536",
+    "多区间": "bytes=0-1023, 4096-8191, 2048-5000, 65536-131071",
+    "越界 (416)": f"bytes={FILE_SIZE + 1}-",
+    "非法 (忽略)": "bytes=abc-def",
+}
+
+
+def _parse(header):
+    try:
+        parse_range_header(header, FILE_SIZE)
+    except RangeNotSatisfiable:
+        pass
+
+
+def main():
+    number = 200000
+    print(f"{'用例':<12}{'每次耗时 (µs)':>16}")
+    for name, header in CASES.items():
+        seconds = min(timeit.repeat(lambda: _parse(header), number=number, repeat=3))
+        print(f"{name:<12}{seconds / number * 1e6:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+SQLite 调优配置压测：登录写入与音频流查询并发
+
+多个线程模拟登录（清理过期会话 + 写入会话 + 更新登录时间，一个事务提交），
+同时多个线程模拟音频流的剧集查询，分别在默认配置（回滚日志、无调优）和
+app/db/profile.py 的调优配置（WAL + 独立只读引擎）下运行相同时长，
+输出两类操作的吞吐量、p50 / p99 延迟和 database is locked 错误数。
+
+使用方法:
+    python benchmarks/bench_sqlite_profile.py [秒数] [登录线程数] [查询线程数]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATA_DIR = tempfile.mkdtemp(prefix="bench_sqlite_profile_")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/app.db"
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db import indexes  # noqa: F401  注册索引
+from app.db.base import Base
+from app.db.profile import create_db_engine
+from app.models.models import Album, Episode, Session as SessionModel, User
+
+EPISODES = 5000
+USERS = 1000
+
+
+def _populate(engine) -> None:
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Album), [{"title": "bench", "cover_image": "", "episode_count": EPISODES}])
+        conn.execute(insert(Episode), [
+            {"album_id": 1, "title": f"第{i + 1}集", "file_path": f"/media/albums/1/{i}.mp3", "sort_order": i}
+            for i in range(EPISODES)
+        ])
+        conn.execute(insert(User), [
+            {"username": f"user{i}", "password_hash": "x", "role": "user"} for i in range(USERS)
+        ])
+        # 一部分已过期的会话，登录时的清理语句有实际工作
+        conn.execute(insert(SessionModel), [
+            {"user_id": i % USERS + 1, "token": f"old-{i}", "expires_at": now - timedelta(seconds=1)}
+            for i in range(USERS)
+        ])
+
+
+def _percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def record(self, latency: float = None) -> None:
+        with self.lock:
+            if latency is None:
+                self.errors += 1
+            else:
+                self.latencies.append(latency)
+
+
+def _login(SessionFactory, worker: int, seq: int) -> None:
+    user_id = (worker * 7919 + seq) % USERS + 1
+    now = datetime.utcnow()
+    db = SessionFactory()
+    try:
+        db.query(SessionModel).filter(SessionModel.expires_at <= now).delete()
+        db.add(SessionModel(
+            user_id=user_id,
+            token=f"t-{worker}-{seq}",
+            expires_at=now + timedelta(seconds=60),
+        ))
+        db.query(User).filter(User.id == user_id).update({"last_login_at": now})
+        db.commit()
+    finally:
+        db.close()
+
+
+def _stream_lookup(SessionFactory, worker: int, seq: int) -> None:
+    episode_id = (worker * 104729 + seq) % EPISODES + 1
+    db = SessionFactory()
+    try:
+        db.query(Episode.album_id, Episode.file_path).filter(Episode.id == episode_id).first()
+    finally:
+        db.close()
+
+
+def _worker(operation, SessionFactory, worker: int, recorder: Recorder, deadline: float) -> None:
+    seq = 0
+    while time.perf_counter() < deadline:
+        seq += 1
+        start = time.perf_counter()
+        try:
+            operation(SessionFactory, worker, seq)
+        except OperationalError:
+            recorder.record()
+            continue
+        recorder.record(time.perf_counter() - start)
+
+
+def run_profile(name: str, tuned: bool, seconds: float, writers: int, readers: int) -> None:
+    url = f"sqlite:///{DATA_DIR}/{name}.db"
+    write_engine = create_db_engine(url, tuned=tuned)
+    read_engine = create_db_engine(url, read_only=True, tuned=tuned) if tuned else write_engine
+    _populate(write_engine)
+
+    WriteSession = sessionmaker(bind=write_engine)
+    ReadSession = sessionmaker(bind=read_engine)
+    logins, lookups = Recorder(), Recorder()
+
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=_worker, args=(_login, WriteSession, i, logins, deadline))
+        for i in range(writers)
+    ] + [
+        threading.Thread(target=_worker, args=(_stream_lookup, ReadSession, i, lookups, deadline))
+        for i in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"\n[{name}] {'WAL + 调优 PRAGMA + 只读引擎' if tuned else '默认配置（回滚日志）'}")
+    for label, recorder in (("登录", logins), ("流查询", lookups)):
+        print(
+            f"  {label:<6} {len(recorder.latencies) / seconds:>9.0f} 次/秒"
+            f"  p50 {_percentile(recorder.latencies, 0.50):>7.2f} ms"
+            f"  p99 {_percentile(recorder.latencies, 0.99):>8.2f} ms"
+            f"  锁错误 {recorder.errors}"
+        )
+
+    write_engine.dispose()
+    read_engine.dispose()
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    print(f"数据目录: {DATA_DIR}")
+    print(f"每种配置运行 {seconds:.0f} 秒，登录线程 {writers} 个，流查询线程 {readers} 个")
+    run_profile("default", tuned=False, seconds=seconds, writers=writers, readers=readers)
+    run_profile("tuned", tuned=True, seconds=seconds, writers=writers, readers=readers)
+
+
+if __name__ == "__main__":
+    main()
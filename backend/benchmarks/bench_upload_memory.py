@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+上传落盘峰值内存对比：整体读入 vs 分块流式写入
+
+使用方法:
+    python benchmarks/bench_upload_memory.py [文件大小MB]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MEDIA_DIR = tempfile.mkdtemp(prefix="bench_upload_")
+os.environ["MEDIA_DIR"] = MEDIA_DIR
+
+import aiofiles
+from fastapi import UploadFile
+
+from app.core.ingest import store_upload
+
+
+def _make_upload(size: int) -> UploadFile:
+    """与 multipart 解析结果一致：内容已经落在临时文件中"""
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    block = os.urandom(1024 * 1024)
+    written = 0
+    while written < size:
+        written += spool.write(block[: size - written])
+    spool.seek(0)
+    return UploadFile(file=spool, size=size, filename="bench.mp3")
+
+
+async def _read_all(upload_file: UploadFile) -> None:
+    """旧实现：一次性读入内存再写文件"""
+    file_content = await upload_file.read()
+    path = os.path.join(MEDIA_DIR, "read_all.mp3")
+    async with aiofiles.open(path, "wb") as f:
+        await f.write(file_content)
+    os.remove(path)
+
+
+async def _streamed(upload_file: UploadFile) -> None:
+    stored = await store_upload(upload_file, album_id=0)
+    os.remove(stored.file_path)
+
+
+async def _measure(name: str, func, size: int) -> None:
+    upload_file = _make_upload(size)
+    tracemalloc.start()
+    started = time.perf_counter()
+    await func(upload_file)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await upload_file.close()
+    print(f"{name:<10}{peak / 1024 / 1024:>12.2f} MB{elapsed * 1000:>12.1f} ms")
+
+
+async def main(size_mb: int) -> None:
+    size = size_mb * 1024 * 1024
+    print(f"文件大小：{size_mb} MB")
+    print(f"{'方式':<10}{'峰值内存':>15}{'耗时':>15}")
+    await _measure("整体读入", _read_all, size)
+    await _measure("流式写入", _streamed, size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
@@ -14,8 +14,8 @@ CREATE TABLE IF NOT EXISTS users (
     is_active BOOLEAN DEFAULT 1
 );
 
--- 索引
-CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
+-- 索引（与 app/db/indexes.py 保持一致）
+CREATE INDEX IF NOT EXISTS ix_users_created ON users(created_at DESC, id DESC);
 
 -- ====================================
 -- 2. 专辑表 (albums)
@@ -27,13 +27,15 @@ CREATE TABLE IF NOT EXISTS albums (
     description TEXT,
     sort_order INTEGER DEFAULT 0,
     episode_count INTEGER DEFAULT 0,
+    total_duration INTEGER NOT NULL DEFAULT 0,
+    total_bytes INTEGER NOT NULL DEFAULT 0,
+    last_episode_at DATETIME,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 索引
-CREATE INDEX IF NOT EXISTS idx_albums_sort_order ON albums(sort_order);
-CREATE INDEX IF NOT EXISTS idx_albums_created_at ON albums(created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_albums_list ON albums(sort_order, created_at DESC, id DESC);
 
 -- ====================================
 -- 3. 单集表 (episodes)
@@ -51,8 +53,7 @@ CREATE TABLE IF NOT EXISTS episodes (
 );
 
 -- 索引
-CREATE INDEX IF NOT EXISTS idx_episodes_album_id ON episodes(album_id);
-CREATE INDEX IF NOT EXISTS idx_episodes_sort_order ON episodes(sort_order);
+CREATE INDEX IF NOT EXISTS ix_episodes_album_order ON episodes(album_id, sort_order, created_at, id);
 
 -- ====================================
 -- 4. 会话审计表 (sessions) - 可选
@@ -69,8 +70,8 @@ CREATE TABLE IF NOT EXISTS sessions (
 );
 
 -- 索引
-CREATE INDEX IF NOT EXISTS idx_sessions_token ON sessions(token);
-CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id);
+CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions(expires_at);
+CREATE INDEX IF NOT EXISTS ix_sessions_user_expires ON sessions(user_id, expires_at);
 
 -- ====================================
 -- 插入默认数据
@@ -87,18 +88,10 @@ ON CONFLICT(username) DO NOTHING;
 -- 创建视图（方便查询）
 -- ====================================
 
--- 专辑详情视图（包含剧集统计）
+-- 专辑详情视图（汇总数据已物化在 albums 表中）
 CREATE VIEW IF NOT EXISTS album_detail AS
 SELECT
-    a.id,
-    a.title,
-    a.cover_image,
-    a.description,
-    a.sort_order,
-    a.episode_count,
-    a.created_at,
-    a.updated_at,
-    COALESCE(SUM(e.duration), 0) as total_duration
-FROM albums a
-LEFT JOIN episodes e ON a.id = e.album_id
-GROUP BY a.id;
+    id, title, cover_image, description, sort_order,
+    episode_count, total_duration, total_bytes, last_episode_at,
+    created_at, updated_at
+FROM albums;
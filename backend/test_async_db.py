@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+异步数据库层测试
+
+- DATABASE_URL 到异步驱动 URL 的转换
+- paginate_async 与同步 paginate 翻页结果一致
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.pagination import EPISODE_SORT_KEYS, paginate, paginate_async
+from app.db.async_base import create_async_db_engine, to_async_url
+from app.db.base import Base
+from app.models.models import Album, Episode
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite:///./data/audio_drama.db", "sqlite+aiosqlite:///./data/audio_drama.db"),
+    ("sqlite+pysqlite:////var/lib/app.db", "sqlite+aiosqlite:////var/lib/app.db"),
+    ("postgresql://u:p@db:5432/app", "postgresql+asyncpg://u:p@db:5432/app"),
+    ("postgresql+psycopg2://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+])
+def test_to_async_url(url, expected):
+    assert to_async_url(url) == expected
+
+
+def test_to_async_url_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        to_async_url("mysql://u:p@db/app")
+
+
+def test_paginate_async_matches_sync(tmp_path):
+    url = f"sqlite:///{tmp_path}/pages.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Album), [{"title": "a", "cover_image": ""}])
+        conn.execute(insert(Episode), [
+            {"album_id": 1, "title": f"第{i}集", "file_path": f"{i}.mp3", "sort_order": i // 3}
+            for i in range(25)
+        ])
+
+    with Session(engine) as db:
+        expected, cursor = [], None
+        while True:
+            page = paginate(db.query(Episode).filter(Episode.album_id == 1), EPISODE_SORT_KEYS, 7, cursor=cursor)
+            expected.append([episode.id for episode in page.items])
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+    engine.dispose()
+
+    async def collect():
+        async_engine = create_async_db_engine(url, read_only=True)
+        pages, cursor = [], None
+        try:
+            async with AsyncSession(async_engine) as db:
+                while True:
+                    page = await paginate_async(
+                        db, select(Episode).where(Episode.album_id == 1), EPISODE_SORT_KEYS, 7, cursor=cursor
+                    )
+                    pages.append([episode.id for episode in page.items])
+                    if page.next_cursor is None:
+                        break
+                    cursor = page.next_cursor
+        finally:
+            await async_engine.dispose()
+        return pages
+
+    assert asyncio.run(collect()) == expected
+    assert sum(len(page) for page in expected) == 25
+
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+目录接口响应缓存测试
+
+命中时不再调用 build；If-None-Match 匹配返回 304；
+bump_catalog_version 后重新生成；build 抛出的异常不缓存。
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core import catalog_cache
+
+
+def make_request(query: str = "", etag: str = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/admin/albums",
+        "query_string": query.encode(),
+        "headers": headers,
+    })
+
+
+def respond(request, build):
+    return asyncio.run(catalog_cache.catalog_response(request, build))
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    catalog_cache._cache.clear()
+    yield
+
+
+def test_hit_revalidate_and_bump():
+    calls = []
+
+    async def build():
+        calls.append(1)
+        return {"items": [{"title": "专辑"}], "n": len(calls)}
+
+    first = respond(make_request("page=1&page_size=20"), build)
+    assert first.status_code == 200
+    assert first.body == '{"items":[{"title":"专辑"}],"n":1}'.encode()
+
+    # 参数顺序不同也命中
+    second = respond(make_request("page_size=20&page=1"), build)
+    assert second.body == first.body and len(calls) == 1
+
+    etag = first.headers["etag"]
+    not_modified = respond(make_request("page=1&page_size=20", etag=etag), build)
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    catalog_cache.bump_catalog_version()
+    third = respond(make_request("page=1&page_size=20", etag=etag), build)
+    assert third.status_code == 200
+    assert third.headers["etag"] != etag
+    assert len(calls) == 2
+
+
+def test_errors_are_not_cached():
+    async def build():
+        raise HTTPException(status_code=404, detail="专辑不存在")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            respond(make_request("x=1"), build)
+    assert len(catalog_cache._cache) == 0
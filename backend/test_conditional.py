@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+HTTP 条件请求测试
+
+If-None-Match / If-Modified-Since 的 304 判断、If-Range 的强校验，
+以及按凭据有效期生成的 Cache-Control。
+"""
+
+from app.core.conditional import (
+    http_date,
+    if_range_matches,
+    is_not_modified,
+    make_file_etag,
+    private_cache_control,
+)
+
+MTIME = 1_700_000_000.5
+ETAG = make_file_etag(7, 1024, MTIME)
+LAST_MODIFIED = http_date(MTIME)
+OLDER = http_date(MTIME - 3600)
+NEWER = http_date(MTIME + 3600)
+
+
+def test_not_modified_by_etag():
+    assert is_not_modified({"if-none-match": ETAG}, ETAG, MTIME)
+    assert is_not_modified({"if-none-match": f'"other", {ETAG}'}, ETAG, MTIME)
+    assert is_not_modified({"if-none-match": "*"}, ETAG, MTIME)
+    # If-None-Match 使用弱比较
+    assert is_not_modified({"if-none-match": f"W/{ETAG}"}, ETAG, MTIME)
+    assert not is_not_modified({"if-none-match": '"other"'}, ETAG, MTIME)
+
+
+def test_if_none_match_takes_precedence():
+    # ETag 不匹配时，即使 If-Modified-Since 满足也不返回 304
+    assert not is_not_modified({"if-none-match": '"other"', "if-modified-since": NEWER}, ETAG, MTIME)
+    assert is_not_modified({"if-none-match": ETAG, "if-modified-since": OLDER}, ETAG, MTIME)
+
+
+def test_not_modified_by_date():
+    assert is_not_modified({"if-modified-since": LAST_MODIFIED}, ETAG, MTIME)
+    assert is_not_modified({"if-modified-since": NEWER}, ETAG, MTIME)
+    assert not is_not_modified({"if-modified-since": OLDER}, ETAG, MTIME)
+    # 格式错误的日期忽略
+    assert not is_not_modified({"if-modified-since": "yesterday"}, ETAG, MTIME)
+    assert not is_not_modified({}, ETAG, MTIME)
+
+
+def test_if_range():
+    assert if_range_matches({}, ETAG, MTIME)
+    # If-Range 使用强比较，弱 ETag 永远不匹配
+    assert if_range_matches({"if-range": ETAG}, ETAG, MTIME)
+    assert not if_range_matches({"if-range": f"W/{ETAG}"}, ETAG, MTIME)
+    assert not if_range_matches({"if-range": '"other"'}, ETAG, MTIME)
+    # 日期必须与 Last-Modified 完全一致
+    assert if_range_matches({"if-range": LAST_MODIFIED}, ETAG, MTIME)
+    assert not if_range_matches({"if-range": NEWER}, ETAG, MTIME)
+    assert not if_range_matches({"if-range": OLDER}, ETAG, MTIME)
+    assert not if_range_matches({"if-range": "garbage"}, ETAG, MTIME)
+
+
+def test_private_cache_control():
+    assert private_cache_control(None) == "private, no-cache, no-transform"
+    assert private_cache_control(1000, now=1000) == "private, no-cache, no-transform"
+    assert private_cache_control(900, now=1000) == "private, no-cache, no-transform"
+    assert private_cache_control(1600.9, now=1000) == "private, max-age=600, must-revalidate, no-transform"
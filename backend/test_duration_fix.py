@@ -1,79 +1,167 @@
 #!/usr/bin/env python3
 """
-测试 duration 解析修复后的逻辑
-"""
+音频时长解析测试
 
-import tempfile
-import os
-from pathlib import Path
+覆盖 mutagen 解析失败时的后备逻辑：帧头/容器头扫描（app.core.duration_scanner）
+以及最终的文件大小估算。测试用的音频文件全部在内存中按格式规范合成。
+"""
 
-# 导入修复后的模块
-import sys
-sys.path.insert(0, '/home/duoduo/.openclaw/workspace/audio-drama-system/backend')
+import struct
 
+import pytest
 from mutagen import File
 
-def test_duration_parsing():
-    """测试 duration 解析逻辑"""
-    print("=== Duration 解析测试 ===\n")
-
-    # 测试 1: 无效文件（37 字节，类似真实案例）
-    print("测试 1: 无效音频文件 (37 bytes)")
-    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as f:
-        invalid_file = f.name
-        f.write(b'invalid audio data' * 2)
-        f.write(b'x' * 13)  # 总共 37 bytes
-
-    try:
-        # 旧逻辑：mutagen 解析失败，duration 保持 0
-        duration_old = 0
-        try:
-            audio_file = File(invalid_file)
-            if audio_file and hasattr(audio_file.info, 'length'):
-                duration_old = int(audio_file.info.length)
-        except Exception:
-            # ❌ 文件大小估算没有执行
-            pass
-
-        # 新逻辑：mutagen 解析失败，使用文件大小估算
-        duration_new = 0
-        file_size = 37
-        try:
-            audio_file = File(invalid_file)
-            if audio_file and hasattr(audio_file.info, 'length') and audio_file.info.length:
-                duration_new = int(audio_file.info.length)
-            else:
-                # ✅ 使用文件大小估算
-                duration_new = int(file_size / 16384)
-        except Exception:
-            # ✅ 使用文件大小估算
-            duration_new = int(file_size / 16384)
-
-        print(f"  文件大小: {file_size} bytes")
-        print(f"  旧逻辑 duration: {duration_old}s ❌")
-        print(f"  新逻辑 duration: {duration_new}s ✅")
-        print(f"  文件大小估算: {int(file_size / 16384)}s\n")
-    finally:
-        os.unlink(invalid_file)
-
-    # 测试 2: 正常文件大小估算
-    print("测试 2: 大文件估算 (3.5 MB)")
-    file_size = 3500000  # ~3.5 MB
-    estimated = int(file_size / 16384)  # 128kbps
-    print(f"  文件大小: {file_size / 1024 / 1024:.2f} MB")
-    print(f"  估算时长: {estimated}s = {estimated // 60}分{estimated % 60}秒\n")
-
-    # 测试 3: 中等文件估算
-    print("测试 3: 中等文件估算 (1 MB)")
-    file_size = 1000000  # ~1 MB
-    estimated = int(file_size / 16384)
-    print(f"  文件大小: {file_size / 1024 / 1024:.2f} MB")
-    print(f"  估算时长: {estimated}s = {estimated // 60}分{estimated % 60}秒\n")
-
-    print("=== 总结 ===")
-    print("✅ 修复后的代码能正确处理 mutagen 解析失败的情况")
-    print("✅ 无论 mutagen 是否工作，都能获得非零的 duration")
-    print("✅ 播放器进度条能正常显示")
-
-if __name__ == '__main__':
-    test_duration_parsing()
+from app.core.audio_probe import FALLBACK_BYTES_PER_SECOND, probe_file
+from app.core.duration_scanner import scan_duration
+
+# MPEG1 Layer III 码率索引（kbps -> index）
+MP3_BITRATE_INDEX = {32: 1, 64: 5, 128: 9, 192: 11, 320: 14}
+
+
+def mp3_frame(bitrate_kbps=128, padding=0, mono=False, payload=b""):
+    """合成一个 MPEG1 Layer III 44.1kHz 帧"""
+    header = bytes([
+        0xFF,
+        0xFB,
+        (MP3_BITRATE_INDEX[bitrate_kbps] << 4) | (padding << 1),
+        0xC0 if mono else 0x00,
+    ])
+    frame_length = 144 * bitrate_kbps * 1000 // 44100 + padding
+    body = payload[: frame_length - 4]
+    return header + body + b"\x00" * (frame_length - 4 - len(body))
+
+
+def padded_cbr_frames(count, bitrate_kbps=128):
+    """按编码器的方式插入填充字节，使平均帧长与码率完全一致"""
+    remainder = 144 * bitrate_kbps * 1000 % 44100
+    frames, accumulated = [], 0
+    for _ in range(count):
+        accumulated += remainder
+        padding = 1 if accumulated >= 44100 else 0
+        accumulated -= 44100 * padding
+        frames.append(mp3_frame(bitrate_kbps, padding=padding))
+    return b"".join(frames)
+
+
+def xing_frame(frames, lame_delay=None, lame_padding=None):
+    """带 Xing 头（可选 LAME 扩展）的首帧"""
+    xing = b"Xing" + struct.pack(">II", 0x01, frames)
+    if lame_delay is not None:
+        lame = bytearray(b"LAME3.100" + b"\x00" * 15)
+        lame[21] = lame_delay >> 4
+        lame[22] = ((lame_delay & 0x0F) << 4) | (lame_padding >> 8)
+        lame[23] = lame_padding & 0xFF
+        xing += bytes(lame)
+    return mp3_frame(128, payload=b"\x00" * 32 + xing)
+
+
+def id3v2_tag(size):
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3\x04\x00\x00" + syncsafe + b"\x00" * size
+
+
+def flac_file(sample_rate, channels, total_samples):
+    info = (sample_rate << 44) | ((channels - 1) << 41) | (15 << 36) | total_samples
+    streaminfo = struct.pack(">HH", 4096, 4096) + b"\x00" * 6 + info.to_bytes(8, "big") + b"\x00" * 16
+    return b"fLaC" + bytes([0x80]) + len(streaminfo).to_bytes(3, "big") + streaminfo + b"\x00" * 64
+
+
+def mp4_box(box_type, payload):
+    return struct.pack(">I", 8 + len(payload)) + box_type + payload
+
+
+def mp4_file(timescale, duration, version=0, mdat_size=4096):
+    if version == 1:
+        mvhd_body = b"\x01\x00\x00\x00" + b"\x00" * 16 + struct.pack(">IQ", timescale, duration)
+    else:
+        mvhd_body = b"\x00\x00\x00\x00" + b"\x00" * 8 + struct.pack(">II", timescale, duration)
+    mvhd_body += b"\x00" * 80
+    return (
+        mp4_box(b"ftyp", b"M4A \x00\x00\x00\x00")
+        + mp4_box(b"mdat", b"\x00" * mdat_size)
+        + mp4_box(b"moov", mp4_box(b"mvhd", mvhd_body))
+    )
+
+
+@pytest.fixture
+def write_file(tmp_path):
+    def _write(name, data):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return str(path)
+    return _write
+
+
+def test_cbr_mp3_walks_every_frame(write_file):
+    frames = 1000
+    path = write_file("cbr.mp3", mp3_frame(128) * frames)
+    result = scan_duration(path)
+    assert result.codec == "mp3"
+    assert result.sample_rate == 44100
+    assert result.duration == pytest.approx(frames * 1152 / 44100)
+
+
+def test_cbr_mp3_matches_mutagen(write_file):
+    # mutagen 对 CBR 按文件大小/码率计算，帧长准确时两者一致
+    path = write_file("cbr.mp3", id3v2_tag(300) + padded_cbr_frames(2000))
+    assert scan_duration(path).duration == pytest.approx(File(path).info.length, abs=0.05)
+
+
+def test_vbr_mp3_without_header_sums_frames(write_file):
+    # 码率各不相同，按文件大小估算会严重偏离
+    data = mp3_frame(32) * 500 + mp3_frame(320) * 500 + mp3_frame(64, mono=True) * 500
+    path = write_file("vbr.mp3", data)
+    assert scan_duration(path).duration == pytest.approx(1500 * 1152 / 44100)
+
+
+def test_xing_header_frame_count(write_file):
+    path = write_file("xing.mp3", id3v2_tag(100) + xing_frame(10000) + mp3_frame(64) * 20)
+    assert scan_duration(path).duration == pytest.approx(10000 * 1152 / 44100)
+
+
+def test_lame_delay_and_padding_are_removed(write_file):
+    path = write_file("lame.mp3", xing_frame(10000, lame_delay=576, lame_padding=1000) + mp3_frame(128) * 5)
+    expected = (10000 * 1152 - 576 - 1000) / 44100
+    assert scan_duration(path).duration == pytest.approx(expected)
+
+
+def test_vbri_header(write_file):
+    vbri = b"VBRI" + struct.pack(">HHHII", 1, 0, 75, 0, 7000)
+    path = write_file("vbri.mp3", mp3_frame(128, payload=b"\x00" * 32 + vbri) + mp3_frame(128) * 5)
+    assert scan_duration(path).duration == pytest.approx(7000 * 1152 / 44100)
+
+
+def test_flac_streaminfo(write_file):
+    path = write_file("a.flac", flac_file(48000, 2, 48000 * 754))
+    result = scan_duration(path)
+    assert (result.codec, result.sample_rate, result.channels) == ("flac", 48000, 2)
+    assert result.duration == pytest.approx(754)
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_mp4_mvhd(write_file, version):
+    path = write_file("a.m4a", mp4_file(600, 600 * 1234, version=version))
+    assert scan_duration(path).duration == pytest.approx(1234)
+
+
+def test_unrecognized_files(write_file):
+    assert scan_duration(write_file("empty.mp3", b"")) is None
+    assert scan_duration(write_file("junk.mp3", b"invalid audio data" * 2 + b"x")) is None
+
+
+def test_probe_falls_back_to_size_estimate(write_file):
+    """旧案例：37 字节的损坏文件，mutagen 与扫描都失败时按 128kbps 估算"""
+    data = b"invalid audio data" * 2 + b"x"
+    info = probe_file(write_file("broken.mp3", data), len(data))
+    assert info.estimated
+    assert info.duration == int(len(data) / FALLBACK_BYTES_PER_SECOND)
+
+
+def test_probe_uses_scanner_when_mutagen_fails(write_file):
+    # 没有 trak 的 M4A：mutagen 得到的时长为 0，mvhd 中仍有总时长
+    data = mp4_file(600, 600 * 3600)
+    path = write_file("no_trak.m4a", data)
+    assert not File(path).info.length
+    info = probe_file(path, len(data))
+    assert not info.estimated
+    assert (info.codec, info.duration) == ("mp4", 3600)
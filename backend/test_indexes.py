@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+索引覆盖测试
+
+对每个热点查询执行 EXPLAIN QUERY PLAN，确认命中 app/db/indexes.py 中
+声明的索引，且排序由索引完成（计划中没有 USE TEMP B-TREE FOR ORDER BY）。
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, delete, func, select, update
+
+from app.core.pagination import ALBUM_SORT_KEYS, EPISODE_SORT_KEYS, USER_SORT_KEYS, _after
+from app.db.base import Base
+from app.db.indexes import INDEXES, OBSOLETE_INDEXES, sync_indexes  # 导入时注册索引
+from app.models.models import Album, Episode, Session as SessionModel, User
+
+NOW = datetime(2024, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def query_plan(engine, statement) -> str:
+    compiled = statement.compile(bind=engine)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def ordered(keys):
+    return [key.order_by() for key in keys]
+
+
+def cursor_values(keys):
+    return [NOW if key.name == "created_at" else 1 for key in keys]
+
+
+@pytest.mark.parametrize("statement, index", [
+    # 专辑列表（页码 / 游标）
+    (select(Album).order_by(*ordered(ALBUM_SORT_KEYS)).limit(21).offset(40), "ix_albums_list"),
+    (select(Album).where(_after(ALBUM_SORT_KEYS, cursor_values(ALBUM_SORT_KEYS)))
+     .order_by(*ordered(ALBUM_SORT_KEYS)).limit(21), "ix_albums_list"),
+    # 专辑的剧集列表（全部 / 游标）与计数
+    (select(Episode).where(Episode.album_id == 1).order_by(*ordered(EPISODE_SORT_KEYS)), "ix_episodes_album_order"),
+    (select(Episode).where(Episode.album_id == 1, _after(EPISODE_SORT_KEYS, cursor_values(EPISODE_SORT_KEYS)))
+     .order_by(*ordered(EPISODE_SORT_KEYS)).limit(101), "ix_episodes_album_order"),
+    (select(func.count()).select_from(Episode).where(Episode.album_id == 1), "ix_episodes_album_order"),
+    # 用户列表（全部 / 游标）
+    (select(User).order_by(*ordered(USER_SORT_KEYS)), "ix_users_created"),
+    (select(User).where(_after(USER_SORT_KEYS, cursor_values(USER_SORT_KEYS)))
+     .order_by(*ordered(USER_SORT_KEYS)).limit(101), "ix_users_created"),
+    # 会话
+    (select(func.count()).select_from(SessionModel).where(SessionModel.expires_at > NOW), "ix_sessions_expires_at"),
+    (delete(SessionModel).where(SessionModel.expires_at <= NOW), "ix_sessions_expires_at"),
+    (select(SessionModel).where(SessionModel.user_id == 1, SessionModel.expires_at > NOW), "ix_sessions_user_expires"),
+    (update(SessionModel).where(SessionModel.user_id == 1).values(expires_at=NOW), "ix_sessions_user_expires"),
+])
+def test_query_uses_index(engine, statement, index):
+    plan = query_plan(engine, statement)
+    assert index in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+def test_album_stats_subqueries_use_index(engine):
+    from app.core.album_stats import _aggregate
+
+    statement = update(Album).where(Album.id == 1).values(
+        episode_count=_aggregate(func.count(Episode.id)),
+        total_duration=_aggregate(func.sum(Episode.duration), 0),
+    )
+    plan = query_plan(engine, statement)
+    assert "SCAN episodes" not in plan, plan
+    assert "ix_episodes_album_order" in plan, plan
+
+
+def test_sync_indexes_replaces_legacy_indexes():
+    legacy = create_engine("sqlite://")
+    Base.metadata.create_all(bind=legacy)
+    with legacy.begin() as conn:
+        # 还原为旧数据库：没有组合索引，只有手工创建的单列索引
+        for spec in INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX {spec.index.name}")
+        conn.exec_driver_sql("CREATE INDEX idx_episodes_sort_order ON episodes(sort_order)")
+        conn.exec_driver_sql("CREATE INDEX idx_sessions_user_id ON sessions(user_id)")
+
+        sync_indexes(conn)
+        sync_indexes(conn)  # 重复执行无副作用
+
+        names = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {spec.index.name for spec in INDEXES} <= names
+    assert not names & set(OBSOLETE_INDEXES)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+剧集 sort_order 预留测试
+
+新剧集的 sort_order 取专辑中当前最大值 + 1：删除剧集后不会与剩余剧集重复，
+也不受其他专辑的剧集影响。
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.ingest import reserve_sort_orders
+from app.db.base import Base
+from app.models.models import Album, Episode
+
+
+def test_reserve_after_delete_and_across_albums():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add_all([Album(id=1, title="a", cover_image=""), Album(id=2, title="b", cover_image="")])
+        # 剧集 id 与专辑 id 错开，其他专辑的 sort_order 更大
+        db.add_all([
+            Episode(id=10, album_id=2, title="b1", sort_order=50),
+            Episode(id=11, album_id=1, title="a1", sort_order=1),
+            Episode(id=12, album_id=1, title="a2", sort_order=2),
+            Episode(id=13, album_id=1, title="a3", sort_order=3),
+        ])
+        db.commit()
+
+        db.delete(db.get(Episode, 12))
+        db.commit()
+
+        assert reserve_sort_orders(db, 1) == 4
+        assert reserve_sort_orders(db, 2) == 51
+        db.rollback()
+    engine.dispose()
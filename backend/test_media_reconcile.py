@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+媒体目录核对测试
+
+构造孤儿文件、缺失文件、上传遗留的 .part 文件和已删除专辑的目录，
+确认报告内容以及 reclaim 只删除足够旧的孤儿文件。
+"""
+
+import os
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.media_reconcile import reconcile_media
+from app.core.storage_accounting import rescan_storage
+from app.db.base import Base
+from app.models.models import Album, Episode
+
+OLD = time.time() - 7200
+
+
+def write(path, size, mtime=OLD):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    media_dir = str(tmp_path / "albums")
+    monkeypatch.setattr(settings, "MEDIA_DIR", media_dir)
+    monkeypatch.setattr(settings, "MEDIA_RECONCILE_MIN_AGE_SECONDS", 3600)
+
+    engine = create_engine(f"sqlite:///{tmp_path}/t.db")
+    Base.metadata.create_all(bind=engine)
+    db = Session(engine)
+    db.add_all([Album(id=1, title="a", cover_image=""), Album(id=2, title="b", cover_image="")])
+    db.add_all([
+        Episode(album_id=1, title="ok", file_path=write(f"{media_dir}/1/ok.mp3", 10)),
+        Episode(album_id=1, title="missing", file_path=f"{media_dir}/1/missing.mp3"),
+        # 记录的路径不在专辑目录下，但文件存在
+        Episode(album_id=2, title="elsewhere", file_path=write(f"{tmp_path}/legacy/x.mp3", 10)),
+    ])
+    db.commit()
+
+    write(f"{media_dir}/1/orphan.mp3", 40)
+    write(f"{media_dir}/1/failed.mp3.part", 5)
+    write(f"{media_dir}/1/fresh.mp3", 7, mtime=time.time())  # 刚落盘，尚未入库
+    write(f"{media_dir}/.staging/abc.data", 99)
+    write(f"{media_dir}/misc/notes.txt", 99)  # 不是专辑目录
+    write(f"{media_dir}/9/left-behind.mp3", 25)
+    write(f"{media_dir}/9/sub/deeper.mp3", 1)
+    yield db, media_dir
+    db.close()
+    engine.dispose()
+
+
+def test_report_only(media):
+    db, media_dir = media
+    report = reconcile_media(db)
+
+    assert report["albums"] == 2
+    assert report["referenced_files"] == 2
+    assert report["missing_files"] == 1
+    assert report["missing"][0]["file_path"].endswith("/1/missing.mp3")
+    assert report["orphan_files"] == 5
+    assert report["orphan_bytes"] == 40 + 5 + 7 + 25 + 1
+    assert report["orphan_album_dirs"] == ["9"]
+    assert report["reclaimed_files"] == 0
+    assert os.path.exists(f"{media_dir}/1/orphan.mp3")
+
+
+def test_reclaim_removes_old_orphans_and_deleted_album_dirs(media):
+    db, media_dir = media
+    report = reconcile_media(db, reclaim=True)
+
+    assert report["reclaimed_files"] == 4
+    assert report["reclaimed_bytes"] == 40 + 5 + 25 + 1
+    assert report["skipped_recent"] == 1
+    assert sorted(os.listdir(f"{media_dir}/1")) == ["fresh.mp3", "ok.mp3"]
+    assert not os.path.exists(f"{media_dir}/9")
+    assert os.path.exists(f"{media_dir}/.staging/abc.data")
+    assert os.path.exists(f"{media_dir}/misc/notes.txt")
+
+    report = reconcile_media(db, reclaim=True)
+    assert report["orphan_files"] == 1
+    assert report["missing_files"] == 1
+
+
+def test_single_album(media):
+    db, media_dir = media
+    report = reconcile_media(db, reclaim=True, album_id=2)
+    assert report["albums"] == 1
+    assert report["orphan_files"] == 0
+    assert os.path.exists(f"{media_dir}/9/left-behind.mp3")
+
+
+def test_orphans_match_storage_rescan(media, monkeypatch):
+    db, _ = media
+    monkeypatch.setattr(settings, "STORAGE_RESCAN_FILES_PER_SECOND", 0)
+    reconciled = reconcile_media(db)
+    rescanned = rescan_storage(db)
+    for key in ("orphan_files", "orphan_bytes", "orphan_album_dirs"):
+        assert reconciled[key] == rescanned[key]
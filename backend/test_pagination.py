@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+游标分页测试
+
+逐页翻完整个列表，结果必须与一次性排序查询完全一致（不重不漏），
+覆盖排序键大量重复、升降序混合的情况。
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.pagination import (
+    ALBUM_SORT_KEYS,
+    EPISODE_SORT_KEYS,
+    USER_SORT_KEYS,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+)
+from app.db.base import Base
+from app.models.models import Album, Episode, User
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    rng = random.Random(13)
+    base_time = datetime(2024, 1, 1)
+    # 很小的取值范围，制造大量重复的排序键
+    session.add_all(
+        Album(title=f"a{i}", cover_image="", sort_order=rng.randint(0, 3),
+              created_at=base_time + timedelta(minutes=rng.randint(0, 5)))
+        for i in range(157)
+    )
+    session.flush()
+    session.add_all(
+        Episode(album_id=1 + i % 2, title=f"e{i}", sort_order=rng.randint(0, 4),
+                created_at=base_time + timedelta(seconds=rng.randint(0, 3)))
+        for i in range(301)
+    )
+    session.add_all(
+        User(username=f"u{i}", password_hash="x", created_at=base_time + timedelta(hours=rng.randint(0, 9)))
+        for i in range(211)
+    )
+    session.commit()
+    yield session
+    session.close()
+
+
+def _walk(query, keys, limit):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = paginate(query, keys, limit, cursor=cursor)
+        ids.extend(row.id for row in page.items)
+        pages += 1
+        if page.next_cursor is None:
+            return ids, pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize("limit", [1, 7, 50, 1000])
+@pytest.mark.parametrize("model, keys, criteria", [
+    (Album, ALBUM_SORT_KEYS, ()),
+    (Episode, EPISODE_SORT_KEYS, (Episode.album_id == 2,)),
+    (User, USER_SORT_KEYS, ()),
+])
+def test_cursor_walk_matches_full_ordering(db, model, keys, criteria, limit):
+    query = db.query(model).filter(*criteria)
+    expected = [row.id for row in query.order_by(*(key.order_by() for key in keys)).all()]
+    ids, pages = _walk(query, keys, limit)
+    assert ids == expected
+    assert pages == max(-(-len(expected) // limit), 1)
+
+
+def test_offset_page_continues_with_cursor(db):
+    query = db.query(Album)
+    expected = [row.id for row in query.order_by(*(key.order_by() for key in ALBUM_SORT_KEYS)).all()]
+    first = paginate(query, ALBUM_SORT_KEYS, 20, offset=40)
+    second = paginate(query, ALBUM_SORT_KEYS, 20, cursor=first.next_cursor)
+    assert [row.id for row in first.items + second.items] == expected[40:80]
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", "bm90IGpzb24", "WzFd"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, ALBUM_SORT_KEYS)
+
+
+@pytest.mark.parametrize("values", [
+    [[1], {"a": 1}, 1],  # 列表、未知对象
+    [0, {"dt": "2024-01-01T00:00:00"}, "1"],  # 字符串当作 id
+    [True, {"dt": "2024-01-01T00:00:00"}, 1],  # bool 当作整数
+    [0, "2024-01-01T00:00:00", 1],  # 时间未按 {"dt": ...} 编码
+    [0, {"dt": 5}, 1],
+])
+def test_cursor_values_must_match_column_types(db, values):
+    with pytest.raises(InvalidCursor):
+        paginate(db.query(Album), ALBUM_SORT_KEYS, 10, cursor=encode_cursor(values))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Range 请求头解析测试
+
+除固定用例外，用随机生成的 Range 头与逐字节的参考实现做性质对比。
+"""
+
+import random
+
+import pytest
+
+from app.core.ranges import MAX_RANGES, RangeNotSatisfiable, coalesce_ranges, parse_range_header
+
+
+def test_single_ranges():
+    assert parse_range_header("bytes=0-99", 1000) == [(0, 99)]
+    assert parse_range_header("bytes=500-", 1000) == [(500, 999)]
+    assert parse_range_header("bytes=0-", 1000) == [(0, 999)]
+
+
+def test_suffix_range():
+    assert parse_range_header("bytes=-500", 1000) == [(500, 999)]
+    # 后缀长度超过文件大小时返回整个文件
+    assert parse_range_header("bytes=-5000", 1000) == [(0, 999)]
+
+
+def test_end_is_clamped_to_file_size():
+    assert parse_range_header("bytes=900-5000", 1000) == [(900, 999)]
+
+
+def test_unsatisfiable_raises_416():
+    with pytest.raises(RangeNotSatisfiable) as exc_info:
+        parse_range_header("bytes=1000-", 1000)
+    assert str(exc_info.value) == "bytes */1000"
+
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=-0", 1000)
+
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=0-10", 0)
+
+
+def test_invalid_headers_are_ignored():
+    for header in ["", "bytes", "bytes=", "bytes=,", "items=0-1", "bytes=abc",
+                   "bytes=5-2", "bytes=1-2-3", "bytes=--1", "bytes=0-1,x"]:
+        assert parse_range_header(header, 1000) is None, header
+
+
+def test_multi_range_coalescing():
+    assert parse_range_header("bytes=0-99,50-199,1000-1099", 2000) == [(0, 199), (1000, 1099)]
+    # 相邻区间同样合并，结果按起始位置排序
+    assert parse_range_header("bytes=200-299, 0-99, 100-199", 2000) == [(0, 299)]
+    # 部分区间无法满足时只返回可满足的部分
+    assert parse_range_header("bytes=0-9,5000-6000", 2000) == [(0, 9)]
+
+
+def test_too_many_ranges_are_ignored():
+    header = "bytes=" + ",".join(f"{i * 10}-{i * 10}" for i in range(MAX_RANGES + 1))
+    assert parse_range_header(header, 10000) is None
+
+
+def _reference_bytes(specs, file_size):
+    """逐字节计算 Range 头选中的字节集合"""
+    selected = set()
+    for first, last in specs:
+        if first is None:
+            selected.update(range(max(file_size - last, 0), file_size))
+        else:
+            stop = file_size if last is None else min(last + 1, file_size)
+            selected.update(range(first, stop))
+    return selected
+
+
+def _format_spec(first, last):
+    if first is None:
+        return f"-{last}"
+    return f"{first}-" if last is None else f"{first}-{last}"
+
+
+def test_matches_reference_model():
+    rng = random.Random(20240601)
+    for _ in range(2000):
+        file_size = rng.randint(0, 300)
+        specs = []
+        for _ in range(rng.randint(1, 5)):
+            kind = rng.random()
+            if kind < 0.2:
+                specs.append((None, rng.randint(0, 400)))
+            elif kind < 0.4:
+                specs.append((rng.randint(0, 400), None))
+            else:
+                first = rng.randint(0, 400)
+                specs.append((first, first + rng.randint(0, 100)))
+
+        header = "bytes=" + ", ".join(_format_spec(*spec) for spec in specs)
+        expected = _reference_bytes(specs, file_size)
+
+        try:
+            ranges = parse_range_header(header, file_size)
+        except RangeNotSatisfiable:
+            assert not expected, header
+            continue
+
+        assert ranges is not None, header
+        assert ranges == coalesce_ranges(ranges)
+        for (_, prev_end), (next_start, _) in zip(ranges, ranges[1:]):
+            assert next_start > prev_end + 1
+        assert all(0 <= start <= end < file_size for start, end in ranges)
+
+        actual = set()
+        for start, end in ranges:
+            actual.update(range(start, end + 1))
+        assert actual == expected, header
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+JSON 序列化快速路径测试
+
+按列查询的行经 row_dicts + orjson 输出的内容，与原来 ORM 对象经
+response_model 校验、标准库 json 编码的结果一致。
+"""
+
+import json
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.api.albums import ALBUM_LIST_COLUMNS, _album_to_response
+from app.core.serialization import FastJSONResponse, dumps, row_dicts
+from app.db.base import Base
+from app.models.models import Album
+
+
+def test_rows_match_model_serialization():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add_all([
+            Album(title="专辑", cover_image="x", description="\"引号\"", created_at=datetime(2026, 1, 2, 3, 4, 5),
+                  updated_at=datetime(2026, 1, 2, 3, 4, 5, 120), last_episode_at=None),
+            Album(title="b", cover_image="y", created_at=datetime(2026, 1, 2), updated_at=datetime(2026, 1, 2, 0, 0, 0, 999999)),
+        ])
+        db.commit()
+
+        rows = db.execute(select(*ALBUM_LIST_COLUMNS).order_by(Album.id)).all()
+        albums = db.execute(select(Album).order_by(Album.id)).scalars().all()
+        expected = json.dumps(
+            jsonable_encoder([_album_to_response(album) for album in albums]),
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode()
+        assert dumps(row_dicts(rows)) == expected
+    engine.dispose()
+
+
+def test_response_falls_back_for_models():
+    response = FastJSONResponse({"item": _album_to_response(Album(
+        id=1, title="t", cover_image="c", sort_order=0, episode_count=0, total_duration=0, total_bytes=0,
+        created_at=datetime(2026, 1, 1), updated_at=datetime(2026, 1, 1),
+    ))})
+    assert json.loads(response.body)["item"]["created_at"] == "2026-01-01T00:00:00"
+    assert row_dicts([]) == []
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+会话存储测试
+
+memory 存储的过期、刷新与清理，以及 socket 存储经会话服务的往返。
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.session_store import (
+    MemorySessionStore,
+    SessionStoreError,
+    SocketSessionStore,
+    start_session_server,
+)
+
+
+def test_memory_store_lifecycle():
+    async def scenario():
+        store = MemorySessionStore()
+        await store.create(1, "a", "127.0.0.1", "ua")
+        await store.create(1, "b")
+        await store.create(2, "c")
+        assert await store.count_online() == 3
+        assert (await store.get(1))["user_id"] == 1
+        assert await store.get(3) is None
+
+        assert await store.refresh(2)
+        assert not await store.refresh(3)
+        assert await store.delete_by_token("a") == 1
+        assert await store.delete(1) == 1
+        assert await store.count_online() == 1
+        assert await store.get(1) is None
+
+    asyncio.run(scenario())
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+def test_memory_store_expiry_and_sweep(monkeypatch):
+    from app.core import session_store
+
+    clock = FakeClock()
+    monkeypatch.setattr(session_store, "time", clock)
+
+    async def scenario():
+        store = MemorySessionStore()
+        for i in range(50):
+            await store.create(i, f"t{i}")
+        for _ in range(10):
+            await store.refresh(0)  # 刷新留下的旧堆条目不会误删会话
+
+        clock.now += settings.SESSION_EXPIRE_SECONDS + 1
+        # 已过期的会话不会被 get 返回，清理按 limit 分批进行
+        assert await store.get(1) is None
+        assert await store.sweep(20) == 20
+        assert await store.sweep(1000) == 30
+        assert await store.sweep(1000) == 0
+        assert await store.count_online() == 0
+
+        # 写操作不删除过期会话，count_online 只计数不删除，过期会话留给 sweep
+        await store.create(100, "a")
+        await store.create(101, "b")
+        clock.now += settings.SESSION_EXPIRE_SECONDS - 1
+        await store.refresh(101)
+        clock.now += 2
+        await store.create(102, "c")
+        assert await store.get(100) is None
+        assert await store.get(101) is not None
+        assert await store.count_online() == 2
+        assert await store.sweep(1000) == 1
+
+    asyncio.run(scenario())
+
+
+def test_socket_store_round_trip(tmp_path):
+    path = str(tmp_path / "sessions.sock")
+
+    async def scenario():
+        server = await start_session_server(path)
+        try:
+            worker_a, worker_b = SocketSessionStore(path), SocketSessionStore(path)
+            await worker_a.create(1, "t1", "10.0.0.1", "ua")
+            await worker_b.create(2, "t2")
+            # 两个 worker 看到同一份会话
+            assert await worker_a.count_online() == 2
+            assert (await worker_b.get(1))["ip"] == "10.0.0.1"
+            assert await worker_b.refresh(1)
+            assert await worker_a.delete(1) == 1
+            assert await worker_b.count_online() == 1
+            assert await worker_a.sweep(100) == 0
+        finally:
+            server.close()
+            await server.wait_closed()
+
+        with pytest.raises(SessionStoreError):
+            await SocketSessionStore(path).count_online()
+
+    asyncio.run(scenario())
+
+
+def test_sweeper_removes_in_bounded_batches(monkeypatch):
+    from app.core import session_store, session_sweeper
+
+    clock = FakeClock()
+    store = MemorySessionStore()
+    monkeypatch.setattr(session_store, "time", clock)
+    monkeypatch.setattr(session_store, "_store", store)
+    monkeypatch.setattr(settings, "SESSION_SWEEP_BATCH_SIZE", 10)
+    monkeypatch.setattr(settings, "SESSION_SWEEP_MAX_BATCHES", 3)
+
+    async def scenario():
+        for i in range(45):
+            await store.create(i, f"t{i}")
+        clock.now += settings.SESSION_EXPIRE_SECONDS + 1
+
+        # 每轮最多 3 批 × 10 条，剩余的留到下一轮
+        assert await session_sweeper.sweep_once() == 30
+        assert session_sweeper.sweeper_stats()["last_batches"] == 3
+        assert await session_sweeper.sweep_once() == 15
+        assert session_sweeper.sweeper_stats()["last_batches"] == 2
+        assert await session_sweeper.sweep_once() == 0
+
+    asyncio.run(scenario())
+
+
+def test_heartbeats_are_skipped_and_coalesced(monkeypatch):
+    from app.core import heartbeat, session_store
+    from app.core.heartbeat import HeartbeatAggregator
+
+    clock = FakeClock()
+    store = MemorySessionStore()
+    monkeypatch.setattr(session_store, "time", clock)
+    monkeypatch.setattr(heartbeat, "time", clock)
+    monkeypatch.setattr(session_store, "_store", store)
+    monkeypatch.setattr(settings, "SESSION_EXPIRE_SECONDS", 1800)
+    monkeypatch.setattr(settings, "HEARTBEAT_REFRESH_THRESHOLD_SECONDS", 1500)
+
+    async def scenario():
+        aggregator = HeartbeatAggregator()
+        for user_id in (1, 2):
+            await store.create(user_id, f"t{user_id}")
+            aggregator.note_created(user_id)
+
+        # 刚登录，剩余有效期高于阈值：心跳全部跳过，不写存储
+        for _ in range(10):
+            assert not aggregator.record(1)
+        assert await aggregator.flush() == 0
+
+        # 剩余有效期低于阈值后，多次心跳合并为一次写入
+        clock.now += 301
+        for _ in range(5):
+            aggregator.record(1)
+            aggregator.record(2)
+        assert await aggregator.flush() == 2
+        assert (await store.get(1))["expires_at"] == int(clock.now + 1800)
+        assert not aggregator.record(1)
+
+        stats = aggregator.stats()
+        assert stats["received"] == 21
+        assert stats["skipped"] == 11
+        assert stats["flushes"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_online_tracker_counts_and_history(monkeypatch):
+    from app.core import online_tracker
+    from app.core.online_tracker import OnlineTracker
+
+    clock = FakeClock()
+    clock.now = 1_700_000_000 - 1_700_000_000 % 60  # 分钟起点
+    monkeypatch.setattr(online_tracker, "time", clock)
+
+    tracker = OnlineTracker(history_minutes=10)
+    tracker.sync(5)
+    tracker.on_login()
+    tracker.on_login()
+    tracker.on_heartbeat()
+    clock.now += 60
+    tracker.on_logout(1)
+    clock.now += 180  # 中间两分钟没有事件
+    tracker.on_expired(3)
+    assert tracker.current == 3
+
+    history = tracker.history(10)
+    # 第一次记录之前的分钟不输出，没有事件的分钟沿用上一分钟的在线人数
+    assert [item["online_last"] for item in history] == [7, 6, 6, 6, 3]
+    assert history[0]["online_max"] == 7
+    assert history[0]["logins"] == 2 and history[0]["heartbeats"] == 1
+    assert history[1]["logouts"] == 1
+    assert history[2]["logins"] == 0
+    assert history[-1]["expired"] == 3
+
+    # 环形缓冲区只保留最近 10 分钟，更早的桶已被覆盖
+    clock.now += 60 * 20
+    assert [item["online_last"] for item in tracker.history(100)] == [3]
+
+
+def test_online_count_matches_store_after_expiry(monkeypatch):
+    from app.core import online_tracker, session_crud, session_store
+
+    clock = FakeClock()
+    store = MemorySessionStore()
+    tracker = online_tracker.OnlineTracker(history_minutes=10)
+    monkeypatch.setattr(session_store, "time", clock)
+    monkeypatch.setattr(online_tracker, "time", clock)
+    monkeypatch.setattr(session_store, "_store", store)
+    monkeypatch.setattr(online_tracker, "online", tracker)
+    monkeypatch.setattr(session_crud, "online", tracker)
+
+    async def scenario():
+        for i in range(5):
+            await session_crud.create_session(i, f"t{i}")
+        clock.now += settings.SESSION_EXPIRE_SECONDS + 1
+        await session_crud.create_session(5, "t5")
+
+        # 登录不会悄悄删除过期会话，过期数量全部经清理计入计数器
+        assert tracker.current == 6
+        assert await session_crud.cleanup_expired_sessions() == 5
+        assert tracker.current == 1
+        assert tracker.history(1)[-1]["expired"] == 5
+
+        # 校准前先清理，过期会话不会被重复扣除
+        await session_crud.create_session(6, "t6")
+        clock.now += settings.SESSION_EXPIRE_SECONDS + 1
+        await session_crud.create_session(7, "t7")
+        assert await online_tracker.resync_online_count() == 1
+        assert tracker.current == 1
+        assert await session_crud.cleanup_expired_sessions() == 0
+        assert tracker.current == 1
+
+    asyncio.run(scenario())
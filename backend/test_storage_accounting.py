@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+存储扫描测试
+
+在临时媒体目录中构造大小不符、缺失、孤儿文件和已删除专辑的目录，
+确认 rescan_storage 的报告与修正结果。
+"""
+
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.album_stats import reconcile_album_stats
+from app.core.config import settings
+from app.core.storage_accounting import rescan_storage
+from app.db.base import Base
+from app.models.models import Album, Episode
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    media_dir = tmp_path / "albums"
+    monkeypatch.setattr(settings, "MEDIA_DIR", str(media_dir))
+    monkeypatch.setattr(settings, "STORAGE_RESCAN_FILES_PER_SECOND", 0)
+
+    engine = create_engine(f"sqlite:///{tmp_path}/t.db")
+    Base.metadata.create_all(bind=engine)
+    db = Session(engine)
+    db.add(Album(id=1, title="a", cover_image=""))
+    db.add_all([
+        # 大小一致
+        Episode(album_id=1, title="ok", file_path=write(f"{media_dir}/1/ok.mp3", 100), file_size=100),
+        # 记录的大小与实际不符
+        Episode(album_id=1, title="resized", file_path=write(f"{media_dir}/1/resized.mp3", 300), file_size=50),
+        # 文件缺失
+        Episode(album_id=1, title="missing", file_path=f"{media_dir}/1/missing.mp3", file_size=70),
+    ])
+    db.commit()
+    reconcile_album_stats(db)
+
+    write(f"{media_dir}/1/orphan.mp3", 40)
+    write(f"{media_dir}/1/upload.mp3.part", 5)  # 上传遗留的临时文件，同样是孤儿文件
+    write(f"{media_dir}/.staging/abc.data", 999)  # 以 . 开头的目录
+    write(f"{media_dir}/misc/notes.txt", 999)  # 不是专辑目录
+    write(f"{media_dir}/9/left-behind.mp3", 25)  # 专辑已删除
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def test_rescan_reports_drift_and_orphans(media):
+    report = rescan_storage(media)
+
+    assert report["albums"] == 1
+    assert report["files"] == 2
+    assert report["recorded_bytes"] == 220
+    assert report["disk_bytes"] == 400
+    assert report["size_mismatches"] == 1
+    assert report["missing_files"] == 1
+    assert report["orphan_files"] == 3
+    assert report["orphan_bytes"] == 70
+    assert report["orphan_album_dirs"] == ["9"]
+    # 专辑汇总与剧集记录一致；磁盘与记录的差异单独报告
+    assert report["drifted_albums"] == []
+    assert report["disk_mismatched_albums"] == [
+        {"album_id": 1, "episode_bytes": 220, "disk_bytes": 400, "missing_files": 1}
+    ]
+    # 只报告，不修改
+    assert media.get(Album, 1).total_bytes == 220
+
+
+def test_rescan_fix_corrects_sizes_and_totals(media):
+    rescan_storage(media, fix=True)
+    media.expire_all()
+    # 缺失文件的剧集仍按记录计入，由 reconcile 工具处理
+    assert media.get(Album, 1).total_bytes == 100 + 300 + 70
+
+    report = rescan_storage(media)
+    assert report["size_mismatches"] == 0
+    assert report["drifted_albums"] == []
+    # 只剩缺失文件造成的差异
+    assert report["disk_mismatched_albums"] == [
+        {"album_id": 1, "episode_bytes": 470, "disk_bytes": 400, "missing_files": 1}
+    ]
+
+
+def test_rescan_fix_corrects_album_drift_without_size_mismatches(media):
+    rescan_storage(media, fix=True)
+    album = media.get(Album, 1)
+    album.total_bytes = 12345  # 专辑汇总单独漂移
+    media.commit()
+
+    report = rescan_storage(media)
+    assert report["size_mismatches"] == 0
+    assert report["drifted_albums"] == [{"album_id": 1, "recorded_bytes": 12345, "episode_bytes": 470}]
+
+    rescan_storage(media, fix=True)
+    media.expire_all()
+    assert media.get(Album, 1).total_bytes == 470
+    assert rescan_storage(media)["drifted_albums"] == []
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+可续传分块上传测试
+
+会话创建、乱序/重叠分块的区间合并与续传偏移、未完成时拒绝完成上传、
+完成上传创建或替换剧集、放弃上传，以及过期会话的清理。
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.api import upload
+from app.core import upload_sessions
+from app.core.audio_probe import AudioInfo
+from app.core.config import settings
+from app.core.ingest import UploadRejected
+from app.core.upload_sessions import UploadSessionNotFound
+from app.db.base import Base
+from app.models.models import Album, Episode
+
+DATA = bytes(range(256)) * 4  # 1024 字节
+
+
+class FakeRequest:
+    """只提供 write_chunk 用到的 headers 和 stream()"""
+
+    def __init__(self, body: bytes):
+        self.headers = {"content-length": str(len(body))}
+        self.body = body
+
+    async def stream(self):
+        for i in range(0, len(self.body), 100):
+            yield self.body[i:i + 100]
+
+
+def put(upload_id, offset, end):
+    return asyncio.run(upload_sessions.write_chunk(upload_id, offset, FakeRequest(DATA[offset:end])))
+
+
+@pytest.fixture
+def staging(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_DIR", str(tmp_path / "albums"))
+    monkeypatch.setattr(settings, "UPLOAD_STAGING_DIR", str(tmp_path / "staging"))
+    return str(tmp_path / "staging")
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    async def fake_probe(file_path, file_size):
+        return AudioInfo(duration=file_size // 100)
+
+    monkeypatch.setattr(upload, "probe_audio", fake_probe)
+    engine = create_engine(f"sqlite:///{tmp_path}/t.db")
+    Base.metadata.create_all(bind=engine)
+    session = Session(engine)
+    session.add(Album(id=1, title="a", cover_image=""))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def finalize(upload_id, db):
+    return asyncio.run(upload.finalize_upload_session(upload_id, db=db, current_user=None))["data"]
+
+
+def test_create_session(staging):
+    status = upload_sessions.create_session(1, "a.mp3", len(DATA))
+    assert status["received_bytes"] == 0 and status["next_offset"] == 0
+    assert not status["complete"]
+    assert os.path.getsize(os.path.join(staging, status["upload_id"] + ".data")) == len(DATA)
+    assert upload_sessions.get_session(status["upload_id"]) == status
+
+    with pytest.raises(UploadRejected):
+        upload_sessions.create_session(1, "empty.mp3", 0)
+    with pytest.raises(UploadSessionNotFound):
+        upload_sessions.get_session("../etc")
+
+
+def test_out_of_order_chunks_merge_and_resume(staging):
+    upload_id = upload_sessions.create_session(1, "a.mp3", len(DATA))["upload_id"]
+
+    status = put(upload_id, 512, 768)
+    assert status["ranges"] == [[512, 768]]
+    assert status["next_offset"] == 0  # 开头尚未接收
+
+    status = put(upload_id, 0, 300)
+    assert status["ranges"] == [[0, 300], [512, 768]]
+    assert status["next_offset"] == 300
+
+    # 重叠、相邻的分块合并为一个区间
+    status = put(upload_id, 200, 600)
+    assert status["ranges"] == [[0, 768]]
+    assert status["received_bytes"] == 768
+
+    # 续传：从 get_session 返回的 next_offset 继续
+    status = upload_sessions.get_session(upload_id)
+    assert status["next_offset"] == 768
+    status = put(upload_id, status["next_offset"], len(DATA))
+    assert status["complete"]
+
+    with pytest.raises(UploadRejected):
+        asyncio.run(upload_sessions.write_chunk(upload_id, 1000, FakeRequest(b"\0" * 100)))
+
+
+def test_finalize_rejected_while_incomplete(staging, db):
+    upload_id = upload_sessions.create_session(1, "a.mp3", len(DATA))["upload_id"]
+    put(upload_id, 0, 1000)
+    with pytest.raises(HTTPException) as excinfo:
+        finalize(upload_id, db)
+    assert excinfo.value.status_code == 400
+    # 会话保留，可以继续上传
+    assert upload_sessions.get_session(upload_id)["received_bytes"] == 1000
+
+
+def test_finalize_creates_and_replaces_episode(staging, db):
+    upload_id = upload_sessions.create_session(1, "first.mp3", len(DATA))["upload_id"]
+    put(upload_id, 0, len(DATA))
+    created = finalize(upload_id, db)
+    episode = db.get(Episode, created["episode_id"])
+    assert episode.title == "first" and episode.file_size == len(DATA)
+    with open(episode.file_path, "rb") as f:
+        assert f.read() == DATA
+    assert not os.listdir(staging)
+    with pytest.raises(UploadSessionNotFound):
+        upload_sessions.get_session(upload_id)
+
+    # 为已有剧集上传新文件
+    old_path = episode.file_path
+    upload_id = upload_sessions.create_session(1, "second.mp3", 500, episode_id=episode.id)["upload_id"]
+    put(upload_id, 0, 500)
+    replaced = finalize(upload_id, db)
+    assert replaced["episode_id"] == episode.id
+    db.refresh(episode)
+    assert episode.file_size == 500 and episode.duration == 5
+    assert episode.file_path != old_path
+    assert db.get(Album, 1).total_bytes == 500
+
+
+def test_finalize_removes_file_when_probe_fails(staging, db, monkeypatch):
+    async def broken_probe(file_path, file_size):
+        raise RuntimeError("probe failed")
+
+    monkeypatch.setattr(upload, "probe_audio", broken_probe)
+    upload_id = upload_sessions.create_session(1, "a.mp3", len(DATA))["upload_id"]
+    put(upload_id, 0, len(DATA))
+    with pytest.raises(RuntimeError):
+        finalize(upload_id, db)
+    assert os.listdir(os.path.join(settings.MEDIA_DIR, "1")) == []
+    assert db.query(Episode).count() == 0
+
+
+def test_chunk_after_finalize_or_abort_is_not_found(staging, db):
+    upload_id = upload_sessions.create_session(1, "a.mp3", len(DATA))["upload_id"]
+    put(upload_id, 0, len(DATA))
+
+    # 分块仍在写入（持有数据文件的共享锁）时不能完成上传
+    fd = upload_sessions._open_data(upload_id)
+    try:
+        with pytest.raises(UploadRejected):
+            upload_sessions.complete_session(upload_id)
+    finally:
+        os.close(fd)
+
+    finalize(upload_id, db)
+    with pytest.raises(UploadSessionNotFound):
+        upload_sessions._open_data(upload_id)
+
+    upload_id = upload_sessions.create_session(1, "b.mp3", len(DATA))["upload_id"]
+    upload_sessions.abort_session(upload_id)
+    assert not os.listdir(staging)
+    with pytest.raises(UploadSessionNotFound):
+        put(upload_id, 0, 100)
+    with pytest.raises(UploadSessionNotFound):
+        upload_sessions.abort_session(upload_id)
+
+
+def test_cleanup_stale_sessions(staging):
+    stale = upload_sessions.create_session(1, "old.mp3", 10)["upload_id"]
+    fresh = upload_sessions.create_session(1, "new.mp3", 10)["upload_id"]
+    old = time.time() - settings.UPLOAD_SESSION_TTL_SECONDS - 60
+    # 暂存目录中的其他文件不是上传会话，即使很旧也不处理
+    for name in (f"{stale}.json", "README.json"):
+        path = os.path.join(staging, name)
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                f.write("{}")
+        os.utime(path, (old, old))
+
+    assert upload_sessions.cleanup_stale_sessions() == 1
+    assert sorted(os.listdir(staging)) == sorted(["README.json", f"{fresh}.data", f"{fresh}.json"])
+    with pytest.raises(UploadSessionNotFound):
+        upload_sessions.get_session(stale)
+
+    # 创建会话时顺带清理，不受无关文件影响
+    upload_sessions.create_session(1, "another.mp3", 10)
+    assert upload_sessions.cleanup_stale_sessions() == 0